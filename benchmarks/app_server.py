@@ -0,0 +1,56 @@
+"""Run main:app for benchmarks, optionally on the SQLite stand-in.
+
+    python -m benchmarks.app_server --port 8000 --sqlite /tmp/bench.db --seed-rows 10000
+    python -m benchmarks.app_server --port 8000 --sqlite /tmp/bench.db --workers 4
+
+Without --sqlite the app uses the MySQL configured by DB_*. Everything else
+(SUMMARIZATION_MODE, OPENAI_BASE_URL, PUBSUB_BACKEND=fake, ...) comes from
+the environment, as in production. benchmarks.load starts this for you.
+With --workers the app is served by framework.server's forked workers
+(SERVER_* env applies) instead of a single uvicorn process.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--sqlite", help="SQLite file to use instead of MySQL (recreated)")
+    parser.add_argument("--seed-rows", type=int, default=0)
+    parser.add_argument("--seed-patients", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=0, help="serve with framework.server and this many workers")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        from tests import sqlite_shim
+
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.sqlite + suffix):
+                os.remove(args.sqlite + suffix)
+        sqlite_shim.install(args.sqlite)
+        if args.seed_rows:
+            sqlite_shim.seed(args.sqlite, args.seed_rows, args.seed_patients)
+
+    import uvicorn
+
+    from framework import server
+
+    server.prefork_defaults(args.workers)
+    # the shim lives in this process, so the app is passed as an object
+    import main as service
+
+    if args.workers:
+        # forked after the shim is installed, so every worker uses it
+        raise SystemExit(server.serve(
+            service.app, host=args.host, port=args.port, workers=args.workers,
+            log_level="warning", access_log=False,
+        ))
+    uvicorn.run(service.app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
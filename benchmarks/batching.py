@@ -0,0 +1,124 @@
+"""Micro-batching throughput benchmark against a local stub LLM.
+
+    python -m benchmarks.batching --jobs 400 --workers 32 --latency-ms 300
+
+Compares one round trip per job with the MicroBatcher feeding a stub
+batch-style API (one round trip per batch, plus a small per-item cost),
+and prints summaries/second and per-job added latency as JSON. Each is
+run from worker threads (sync mode's job workers) and from tasks on one
+event loop awaiting the batcher's futures (async mode).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.batcher import MicroBatcher
+
+
+def stub_call(text: str, latency: float) -> str:
+    time.sleep(latency)
+    return text[:20]
+
+
+def stub_batch_call(texts, latency: float, per_item: float) -> list:
+    time.sleep(latency + per_item * len(texts))
+    return [text[:20] for text in texts]
+
+
+def report(jobs: int, elapsed: float, latencies: list) -> dict:
+    latencies.sort()
+    return {
+        "jobs": jobs,
+        "elapsed_s": elapsed,
+        "throughput_per_second": jobs / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def run(jobs: int, workers: int, fn) -> dict:
+    latencies = []
+
+    def one(i):
+        start = time.monotonic()
+        fn(f"transcript {i} " * 50)
+        latencies.append(time.monotonic() - start)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(one, range(jobs)))
+    return report(jobs, time.monotonic() - start, latencies)
+
+
+def arun(jobs: int, workers: int, fn) -> dict:
+    """``run`` with ``workers`` concurrent tasks awaiting ``fn(text)``."""
+    latencies = []
+
+    async def main():
+        semaphore = asyncio.Semaphore(workers)
+
+        async def one(i):
+            async with semaphore:
+                start = time.monotonic()
+                await fn(f"transcript {i} " * 50)
+                latencies.append(time.monotonic() - start)
+
+        await asyncio.gather(*(one(i) for i in range(jobs)))
+
+    start = time.monotonic()
+    asyncio.run(main())
+    return report(jobs, time.monotonic() - start, latencies)
+
+
+async def astub_call(text: str, latency: float) -> str:
+    await asyncio.sleep(latency)
+    return text[:20]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--per-item-ms", type=float, default=5)
+    parser.add_argument("--window-ms", type=float, default=20)
+    parser.add_argument("--max-size", type=int, default=16)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    per_item = args.per_item_ms / 1000
+
+    def batcher() -> MicroBatcher:
+        return MicroBatcher(
+            lambda texts: stub_batch_call(texts, latency, per_item),
+            window_ms=args.window_ms,
+            max_size=args.max_size,
+            max_in_flight=args.max_in_flight,
+        )
+
+    direct = run(args.jobs, args.workers, lambda text: stub_call(text, latency))
+
+    sync_batcher = batcher()
+    batched = run(args.jobs, args.workers, lambda text: sync_batcher.submit(text).result())
+    batched["batcher"] = sync_batcher.stats()
+
+    async_direct = arun(args.jobs, args.workers, lambda text: astub_call(text, latency))
+
+    # what agenerate_clinical_summary_batched does
+    async_batcher = batcher()
+    async_batched = arun(args.jobs, args.workers, lambda text: asyncio.wrap_future(async_batcher.submit(text)))
+    async_batched["batcher"] = async_batcher.stats()
+
+    print(json.dumps(
+        {"direct": direct, "batched": batched, "async_direct": async_direct, "async_batched": async_batched},
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Per-request overhead of event emission, against the in-memory FakePublisher.
+
+    python -m benchmarks.events --requests 100000 --publish-latency-ms 1
+
+Measures the time a handler spends in ``events.emit`` with events disabled,
+enabled, and enabled with a slow publisher (which must not slow callers
+down, only fill the buffer), and prints JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from services.events import EventEmitter, FakePublisher
+
+
+def measure(emitter: EventEmitter, requests: int) -> dict:
+    start = time.perf_counter()
+    for i in range(requests):
+        emitter.emit("summarization.created", summarization_id=i, patient_id="p1")
+    elapsed = time.perf_counter() - start
+
+    flush_start = time.perf_counter()
+    emitter.close(timeout=60)
+    flush = time.perf_counter() - flush_start
+
+    return {
+        "requests": requests,
+        "per_request_us": elapsed / requests * 1e6,
+        "shutdown_flush_s": flush,
+        "stats": emitter.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--buffer-size", type=int, default=10000)
+    parser.add_argument("--publish-latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    topic = "projects/bench/topics/events"
+    results = {
+        "disabled": measure(EventEmitter(FakePublisher, topic, enabled=False), args.requests),
+        "enabled": measure(EventEmitter(FakePublisher, topic, args.buffer_size, enabled=True), args.requests),
+        "enabled_slow_publisher": measure(
+            EventEmitter(lambda: FakePublisher(latency=args.publish_latency_ms / 1000), topic, args.buffer_size, enabled=True),
+            min(args.requests, 20000),
+        ),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""OpenAI-compatible chat completions server that injects latency and errors.
+
+    python -m benchmarks.fake_openai --port 8100 --latency-ms 300 --tail-ms 3000 \\
+        --tail-rate 0.05 --error-rate 0.05 --rate-limit-rate 0.05
+
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=x uvicorn main:app
+
+Serves POST /v1/chat/completions (plain and ``stream=true``). Each request
+sleeps around ``latency_ms`` (log-normal jitter); a ``tail_rate`` share
+sleeps ``tail_ms`` instead, ``hang_rate`` never answers within a client
+timeout, and ``error_rate`` / ``rate_limit_rate`` answer 500 / 429 (with
+Retry-After). GET /stats reports what was served. The summary is the first
+words of the prompt, so results are deterministic.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import asdict, dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class FaultConfig:
+    latency_ms: float = 300.0
+    jitter: float = 0.3  # sigma of the log-normal latency
+    tail_rate: float = 0.0
+    tail_ms: float = 3000.0
+    hang_rate: float = 0.0
+    hang_ms: float = 120000.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 1.0
+    stream_chunks: int = 10
+    seed: int = 0
+
+
+def _summary(messages: list) -> str:
+    words = (messages[-1]["content"] if messages else "").split()
+    return "SUMMARY: " + " ".join(words[:30])
+
+
+def _completion(model: str, text: str, prompt_tokens: int) -> dict:
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(text) // 4,
+            "total_tokens": prompt_tokens + len(text) // 4,
+        },
+    }
+
+
+def _chunk(model: str, text: str, finish: bool = False) -> str:
+    payload = {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": {} if finish else {"content": text}, "finish_reason": "stop" if finish else None}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def make_app(config: FaultConfig) -> FastAPI:
+    app = FastAPI(title="fake-openai")
+    rng = random.Random(config.seed)
+    counts = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "tail": 0, "hung": 0}
+
+    def latency() -> float:
+        roll = rng.random()
+        if roll < config.hang_rate:
+            counts["hung"] += 1
+            return config.hang_ms / 1000
+        if roll < config.hang_rate + config.tail_rate:
+            counts["tail"] += 1
+            return config.tail_ms / 1000
+        return config.latency_ms / 1000 * rng.lognormvariate(0, config.jitter)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        counts["requests"] += 1
+
+        roll = rng.random()
+        if roll < config.rate_limit_rate:
+            counts["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                headers={"retry-after": str(config.retry_after)},
+            )
+        delay = latency()
+        if roll < config.rate_limit_rate + config.error_rate:
+            await asyncio.sleep(delay)
+            counts["errors"] += 1
+            return JSONResponse(status_code=500, content={"error": {"message": "injected failure", "type": "server_error"}})
+
+        model = body.get("model", "fake")
+        text = _summary(body.get("messages", []))
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay)
+            counts["ok"] += 1
+            return _completion(model, text, prompt_tokens)
+
+        words = text.split(" ")
+        step = max(1, len(words) // config.stream_chunks)
+
+        async def events():
+            # the first token arrives after most of the delay, the rest trickle in
+            await asyncio.sleep(delay * 0.7)
+            for i in range(0, len(words), step):
+                yield _chunk(model, (" " if i else "") + " ".join(words[i:i + step]))
+                await asyncio.sleep(delay * 0.3 / config.stream_chunks)
+            yield _chunk(model, "", finish=True)
+            yield "data: [DONE]\n\n"
+            counts["ok"] += 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    def stats():
+        return dict(counts, config=asdict(config))
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    for name, value in asdict(FaultConfig()).items():
+        parser.add_argument("--" + name.replace("_", "-"), type=type(value), default=value)
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+
+    import uvicorn
+
+    uvicorn.run(make_app(FaultConfig(**args)), host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Steady-state memory of the in-memory job store under sustained async load.
+
+    python -m benchmarks.job_store --jobs 200000 --max-entries 10000 --text-bytes 4000
+
+Pushes jobs through the same lifecycle as /summarizations/async (pending
+with its transcript, processing, completed with a summary) and samples
+traced memory as it goes. With the cap in place memory levels off once
+``max_entries`` finished jobs are held; prints JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from services.job_store import JobRecord, MemoryJobStore
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=200000)
+    parser.add_argument("--max-entries", type=int, default=10000)
+    parser.add_argument("--ttl", type=float, default=3600)
+    parser.add_argument("--text-bytes", type=int, default=4000)
+    parser.add_argument("--summary-bytes", type=int, default=600)
+    parser.add_argument("--samples", type=int, default=10)
+    args = parser.parse_args()
+
+    store = MemoryJobStore(max_entries=args.max_entries, ttl=args.ttl)
+    text = "t" * args.text_bytes
+    summary = "s" * args.summary_bytes
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    every = max(1, args.jobs // args.samples)
+    samples = []
+
+    start = time.perf_counter()
+    for i in range(args.jobs):
+        job_id = f"{i:036d}"
+        # a fresh copy per job, as each request body would be
+        store.add(JobRecord(job_id, patient_id="p1", input_text=text[:-1] + "t", model="gpt-4o-mini"))
+        store.update(job_id, status="processing")
+        store.update(job_id, status="completed", summary=summary)
+        if (i + 1) % every == 0:
+            stats = store.stats()
+            samples.append({
+                "jobs": i + 1,
+                "entries": stats["entries"],
+                "traced_bytes": tracemalloc.get_traced_memory()[0] - base,
+                "store_bytes": stats["bytes"],
+            })
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "jobs": args.jobs,
+        "ops_per_second": args.jobs * 3 / elapsed,
+        "samples": samples,
+        "stats": store.stats(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""LLM call layer (services/resilience.py) against the fault-injecting fake.
+
+    python -m benchmarks.llm_resilience --calls 400 --concurrency 16 \\
+        --tail-rate 0.05 --error-rate 0.05 --rate-limit-rate 0.02
+
+Starts benchmarks.fake_openai in-process, points the OpenAI client at it
+and runs the same calls without and with hedging (LLM_TIMEOUT, retries,
+breaker and quotas come from the usual env vars). Prints end-to-end
+p50/p95/p99, errors by type and the caller's counters as JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+
+
+def serve(config, port: int):
+    import uvicorn
+
+    from benchmarks.fake_openai import make_app
+
+    server = uvicorn.Server(uvicorn.Config(make_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="fake-openai", daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def run(calls: int, concurrency: int, hedge: bool) -> dict:
+    from services import llm
+    from services.resilience import ResilientCaller
+
+    llm.caller = ResilientCaller(hedge=hedge)
+    latencies, errors = [], {}
+    lock = threading.Lock()
+
+    def one(i: int):
+        request = llm.medical_request(f"transcript {i} " + "the patient reports chest pain " * 20)
+        started = time.perf_counter()
+        try:
+            llm._call(request)
+        except Exception as e:
+            with lock:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            return
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(calls)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def pct(q: float):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else None
+
+    stats = llm.caller.stats()
+    return {
+        "hedge": hedge,
+        "calls": calls,
+        "succeeded": len(latencies),
+        "errors": errors,
+        "throughput_per_second": calls / elapsed,
+        "p50_ms": pct(0.5),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "caller": {k: stats[k] for k in ("attempts", "retries", "rate_limited", "timeouts", "hedges", "hedge_wins")},
+        "breaker": stats["breaker"],
+    }
+
+
+def main():
+    from benchmarks.fake_openai import FaultConfig
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8101)
+    for name, value in asdict(FaultConfig()).items():
+        parser.add_argument("--" + name.replace("_", "-"), type=type(value), default=value)
+    args = vars(parser.parse_args())
+    calls, concurrency, port = args.pop("calls"), args.pop("concurrency"), args.pop("port")
+
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    server = serve(FaultConfig(**args), port)
+
+    results = [run(calls, concurrency, hedge) for hedge in (False, True)]
+    server.should_exit = True
+    print(json.dumps({"fault_config": args, "runs": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""Open-loop load test of the whole service against local stand-ins.
+
+    python -m benchmarks.load --mix mixed --rps 50 --duration 30 --out run.json
+    python -m benchmarks.load --mix read=80,write=15,async=5 --mode async --rps 100
+    python -m benchmarks.load --replay captured.jsonl --rps 20
+    python -m benchmarks.load --url http://staging:8000 --mix read --rps 200
+
+Boots benchmarks.fake_openai and benchmarks.app_server (main:app on the
+SQLite stand-in with PUBSUB_BACKEND=fake, or on the MySQL from DB_* with
+--mysql) as subprocesses, then fires operations at a fixed rate from a
+seeded RNG, so two runs with the same flags send the same traffic.
+
+Operations:
+  read    GET /summarizations for a seeded patient, following up to
+          --pages "next" links
+  write   POST /summarizations (synchronous LLM call)
+  async   POST /summarizations/async, then poll GET /jobs/{id} until done
+  delete  DELETE /summarizations/patient/{id} for a seeded patient
+  replay  one line of a --replay JSONL file:
+          {"method": "GET", "path": "/summarizations", "params": {...}, "json": ...}
+
+Latency is measured from when a request was scheduled, not when it was
+sent, so a backed-up client does not hide server queueing. Prints (or
+writes to --out) JSON with throughput, per-endpoint p50/p95/p99, status
+and error counts, async job completion times and the service's own
+stats endpoints at the end of the run.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+
+MIXES = {
+    "read": {"read": 1},
+    "write": {"write": 1},
+    "async": {"async": 1},
+    "delete": {"delete": 1},
+    "mixed": {"read": 70, "write": 15, "async": 10, "delete": 5},
+}
+STATS_ENDPOINTS = ("/llm/stats", "/db/pool", "/jobs/queue", "/jobs/store", "/events/stats", "/cache/summaries")
+
+_WORDS = (
+    "patient reports intermittent chest pain radiating to the left arm with shortness of breath "
+    "history of hypertension and type two diabetes on metformin blood pressure elevated today "
+    "plan includes ecg troponin and cardiology referral follow up in two weeks"
+).split()
+
+
+def _percentiles(samples: List[float]) -> dict:
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None, "mean_ms": None}
+    ordered = sorted(samples)
+
+    def pct(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": ordered[-1] * 1000,
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+    }
+
+
+class Recorder:
+    """Per-endpoint latencies and outcomes for requests started after warm-up."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+        self.errors: Dict[str, int] = {}
+        self.job_seconds: List[float] = []
+        self.job_outcomes: Dict[str, int] = {}
+        self.recording = False
+
+    def record(self, endpoint: str, seconds: float, status: Optional[int], error: Optional[str] = None):
+        if not self.recording:
+            return
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        statuses = self.statuses.setdefault(endpoint, {})
+        key = str(status) if status is not None else "transport_error"
+        statuses[key] = statuses.get(key, 0) + 1
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        total = failed = 0
+        for endpoint, samples in sorted(self.latencies.items()):
+            statuses = self.statuses[endpoint]
+            errors = sum(n for status, n in statuses.items() if status == "transport_error" or int(status) >= 500)
+            total += len(samples)
+            failed += errors
+            endpoints[endpoint] = dict(
+                _percentiles(samples),
+                requests=len(samples),
+                throughput_per_second=len(samples) / elapsed,
+                error_rate=errors / len(samples),
+                statuses=statuses,
+            )
+        everything = [s for samples in self.latencies.values() for s in samples]
+        return {
+            "overall": dict(
+                _percentiles(everything),
+                requests=total,
+                throughput_per_second=total / elapsed,
+                error_rate=failed / total if total else 0.0,
+            ),
+            "endpoints": endpoints,
+            "async_jobs": dict(_percentiles(self.job_seconds), outcomes=self.job_outcomes),
+            "transport_errors": self.errors,
+        }
+
+
+# -----------------------------------------------------------------------------
+# Operations
+# -----------------------------------------------------------------------------
+class Workload:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, args, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.args = args
+        self.rng = rng
+        from tests.sqlite_shim import patient_ids
+
+        self.patients = patient_ids(args.seed_patients)
+        self._deletable = list(self.patients)
+        rng.shuffle(self._deletable)
+        self.replay_lines: List[dict] = []
+        if args.replay:
+            with open(args.replay) as f:
+                self.replay_lines = [json.loads(line) for line in f if line.strip()]
+        self._replay_index = 0
+
+    async def request(self, endpoint: str, scheduled: float, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(endpoint, time.perf_counter() - scheduled, None, type(e).__name__)
+            return None
+        self.recorder.record(endpoint, time.perf_counter() - scheduled, response.status_code)
+        return response
+
+    def transcript(self) -> str:
+        return " ".join(self.rng.choice(_WORDS) for _ in range(self.args.text_words)) + "."
+
+    async def read(self, scheduled: float):
+        params = {"patient_id": self.rng.choice(self.patients), "limit": self.args.page_size}
+        response = await self.request("GET /summarizations", scheduled, "GET", "/summarizations", params=params)
+        for _ in range(self.args.pages - 1):
+            url = response.links.get("next", {}).get("url") if response is not None else None
+            if not url:
+                return
+            response = await self.request("GET /summarizations (next)", time.perf_counter(), "GET", url)
+
+    async def write(self, scheduled: float):
+        params = {"patient_id": self.rng.choice(self.patients), "input_text": self.transcript()}
+        await self.request("POST /summarizations", scheduled, "POST", "/summarizations", params=params)
+
+    async def submit_async(self, scheduled: float):
+        params = {"patient_id": self.rng.choice(self.patients), "input_text": self.transcript()}
+        response = await self.request("POST /summarizations/async", scheduled, "POST", "/summarizations/async", params=params)
+        if response is None or response.status_code != 202:
+            return
+        job_id = response.json()["job_id"]
+        deadline = scheduled + self.args.job_timeout
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(self.args.poll_interval)
+            poll = await self.request("GET /jobs/{id}", time.perf_counter(), "GET", f"/jobs/{job_id}")
+            status = poll.json().get("status") if poll is not None and poll.status_code == 200 else None
+            if status in ("completed", "failed"):
+                self._job_done(status, time.perf_counter() - scheduled)
+                return
+        self._job_done("timed_out", time.perf_counter() - scheduled)
+
+    def _job_done(self, outcome: str, seconds: float):
+        if self.recorder.recording:
+            self.recorder.job_seconds.append(seconds)
+            self.recorder.job_outcomes[outcome] = self.recorder.job_outcomes.get(outcome, 0) + 1
+
+    async def delete(self, scheduled: float):
+        # each seeded patient is deleted once, then the pool refills
+        if not self._deletable:
+            self._deletable = list(self.patients)
+        patient_id = self._deletable.pop()
+        await self.request(
+            "DELETE /summarizations/patient/{id}", scheduled, "DELETE", f"/summarizations/patient/{patient_id}"
+        )
+
+    async def replay(self, scheduled: float):
+        line = self.replay_lines[self._replay_index % len(self.replay_lines)]
+        self._replay_index += 1
+        method = line.get("method", "GET").upper()
+        endpoint = f"{method} " + re.sub(r"/\d+(?=/|$)", "/{id}", line["path"])
+        await self.request(endpoint, scheduled, method, line["path"], params=line.get("params"), json=line.get("json"))
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    if value in MIXES:
+        return MIXES[value]
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in MIXES["mixed"]:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+async def drive(args) -> dict:
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.request_timeout, limits=limits) as client:
+        workload = Workload(client, recorder, args, rng)
+        if args.replay:
+            operations, weights = [workload.replay], [1.0]
+        else:
+            mix = parse_mix(args.mix)
+            handlers = {"read": workload.read, "write": workload.write, "async": workload.submit_async, "delete": workload.delete}
+            operations = [handlers[name] for name in mix]
+            weights = list(mix.values())
+
+        in_flight = asyncio.Semaphore(args.max_in_flight)
+        tasks = set()
+        dropped = 0
+
+        async def run(operation, scheduled: float):
+            try:
+                await operation(scheduled)
+            finally:
+                in_flight.release()
+
+        start = time.perf_counter()
+        measure_from = start + args.warmup
+        total = int(args.rps * (args.warmup + args.duration))
+        for i in range(total):
+            scheduled = start + i / args.rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not recorder.recording and scheduled >= measure_from:
+                recorder.recording = True
+            if in_flight.locked():
+                dropped += recorder.recording  # client saturated: counted, not queued
+                continue
+            await in_flight.acquire()
+            task = asyncio.create_task(run(rng.choices(operations, weights)[0], scheduled))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        scheduling_done = time.perf_counter()
+        if tasks:
+            await asyncio.wait(tasks, timeout=args.drain_timeout)
+        elapsed = max(scheduling_done - measure_from, 1e-9)
+
+        server_stats = {}
+        for path in STATS_ENDPOINTS:
+            try:
+                response = await client.get(path)
+                if response.status_code == 200:
+                    server_stats[path] = response.json()
+            except httpx.HTTPError:
+                pass
+
+    report = recorder.report(elapsed)
+    report["dropped_operations"] = dropped
+    report["server_stats"] = server_stats
+    return report
+
+
+# -----------------------------------------------------------------------------
+# Stand-ins
+# -----------------------------------------------------------------------------
+def _wait_healthy(process: subprocess.Popen, url: str, path: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args)} exited with {process.returncode}")
+        try:
+            if httpx.get(url + path, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url}{path} did not come up within {timeout}s")
+
+
+def boot(args) -> List[subprocess.Popen]:
+    processes = []
+    openai_url = f"http://127.0.0.1:{args.openai_port}"
+    processes.append(subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_openai", "--port", str(args.openai_port),
+        "--latency-ms", str(args.openai_latency_ms), "--tail-rate", str(args.openai_tail_rate),
+        "--tail-ms", str(args.openai_tail_ms), "--error-rate", str(args.openai_error_rate),
+        "--rate-limit-rate", str(args.openai_rate_limit_rate), "--seed", str(args.seed),
+    ]))
+    _wait_healthy(processes[-1], openai_url, "/stats")
+
+    env = dict(
+        os.environ,
+        SUMMARIZATION_MODE=args.mode,
+        OPENAI_BASE_URL=openai_url + "/v1",
+        OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "fake"),
+        PUBSUB_BACKEND="fake",
+    )
+    command = [sys.executable, "-m", "benchmarks.app_server", "--port", str(args.port),
+               "--seed-patients", str(args.seed_patients)]
+    if not args.mysql:
+        command += ["--sqlite", args.sqlite, "--seed-rows", str(args.seed_rows)]
+    processes.append(subprocess.Popen(command, env=env))
+    _wait_healthy(processes[-1], args.url, "/health/ready")
+    return processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    traffic = parser.add_argument_group("traffic")
+    traffic.add_argument("--mix", default="mixed", help="read|write|async|delete|mixed or name=weight,...")
+    traffic.add_argument("--replay", help="JSONL file of requests to replay instead of --mix")
+    traffic.add_argument("--rps", type=float, default=20)
+    traffic.add_argument("--duration", type=float, default=30, help="measured seconds")
+    traffic.add_argument("--warmup", type=float, default=5, help="seconds of traffic before measuring")
+    traffic.add_argument("--seed", type=int, default=0)
+    traffic.add_argument("--pages", type=int, default=3)
+    traffic.add_argument("--page-size", type=int, default=10)
+    traffic.add_argument("--text-words", type=int, default=200)
+    traffic.add_argument("--poll-interval", type=float, default=0.25)
+    traffic.add_argument("--job-timeout", type=float, default=60)
+    traffic.add_argument("--max-in-flight", type=int, default=512)
+    traffic.add_argument("--request-timeout", type=float, default=30)
+    traffic.add_argument("--drain-timeout", type=float, default=60)
+
+    service = parser.add_argument_group("service")
+    service.add_argument("--url", help="load an already running service instead of booting one")
+    service.add_argument("--port", type=int, default=8010)
+    service.add_argument("--mode", choices=("sync", "async"), default="sync", help="SUMMARIZATION_MODE")
+    service.add_argument("--mysql", action="store_true", help="use the MySQL from DB_* instead of SQLite")
+    service.add_argument("--sqlite", default="/tmp/summarization-bench.db")
+    service.add_argument("--seed-rows", type=int, default=10000)
+    service.add_argument("--seed-patients", type=int, default=200)
+
+    upstream = parser.add_argument_group("fake OpenAI")
+    upstream.add_argument("--openai-port", type=int, default=8110)
+    upstream.add_argument("--openai-latency-ms", type=float, default=300)
+    upstream.add_argument("--openai-tail-rate", type=float, default=0.0)
+    upstream.add_argument("--openai-tail-ms", type=float, default=3000)
+    upstream.add_argument("--openai-error-rate", type=float, default=0.0)
+    upstream.add_argument("--openai-rate-limit-rate", type=float, default=0.0)
+
+    parser.add_argument("--out", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    processes = []
+    if args.url is None:
+        args.url = f"http://127.0.0.1:{args.port}"
+        processes = boot(args)
+    try:
+        report = asyncio.run(drive(args))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+
+    report = dict({"config": vars(args)}, **report)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Bytes on the wire and serialization time of GET /summarizations pages.
+
+    python -m benchmarks.payload --pages 200 --limit 20,100
+
+Builds list pages from synthetic rows and compares the response path from
+before sparse fieldsets (every field, four links per row, FastAPI's
+jsonable_encoder pass then JSONResponse) with the variants now offered:
+?links=compact, ?links=none and ?fields=summary, all rendered through
+utils.responses (orjson when installed). For each variant it reports raw
+bytes, gzip/zstd bytes (zstd only when zstandard is installed) and the
+time to serialize and to compress a page. Prints JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from middleware.compression import available_encodings, compress
+from utils.projection import parse_fields, project
+from utils.responses import FastJSONResponse, encoder_name
+
+WORDS = (
+    "patient reports chest pain shortness of breath fever blood pressure elevated "
+    "heart rate normal medication dose daily referral cardiology imaging diabetes "
+    "hypertension dizziness follow up history denies allergies stable"
+).split()
+
+VARIANTS = {
+    # name: (fields, links)
+    "links_compact": (None, "compact"),
+    "links_none": (None, "none"),
+    "fields_summary": ("summary", "none"),
+}
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def timed(render: Callable[[], bytes], runs: int) -> tuple:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        body = render()
+        samples.append(time.perf_counter() - started)
+    return body, {
+        "p50_us": percentile(samples, 0.5) * 1e6,
+        "p95_us": percentile(samples, 0.95) * 1e6,
+        "mean_us": statistics.fmean(samples) * 1e6,
+    }
+
+
+def make_rows(count: int, text_words: int, rng: random.Random) -> List[dict]:
+    return [
+        {
+            "id": row_id,
+            "patient_id": "patient-00001",
+            "input_text": " ".join(rng.choices(WORDS, k=text_words)),
+            "summary": " ".join(rng.choices(WORDS, k=text_words // 10)),
+        }
+        for row_id in range(1, count + 1)
+    ]
+
+
+def measure(render: Callable[[], bytes], runs: int) -> dict:
+    body, serialize = timed(render, runs)
+    result = {"bytes": len(body), "serialize": serialize}
+    for encoding in available_encodings():
+        compressed, compress_time = timed(lambda: compress(body, encoding), runs)
+        result[encoding] = {"bytes": len(compressed), "compress": compress_time}
+    return result
+
+
+def bench_page(args, limit: int) -> dict:
+    rows = make_rows(limit, args.text_words, random.Random(args.seed))
+    collection = "/summarizations?patient_id=patient-00001"
+
+    # before: full rows built in the route, then FastAPI's default response path
+    full = [project(row, parse_fields(None), "full", collection) for row in rows]
+    results = {"before": measure(lambda: JSONResponse(jsonable_encoder(full)).body, args.pages)}
+    results["full"] = measure(lambda: FastJSONResponse(full).body, args.pages)
+
+    for name, (fields, links) in VARIANTS.items():
+        selected = parse_fields(fields)
+        page = [project(row, selected, links, collection) for row in rows]
+        results[name] = measure(lambda: FastJSONResponse(page).body, args.pages)
+
+    before = results["before"]["bytes"]
+    for result in results.values():
+        result["bytes_vs_before"] = result["bytes"] / before
+    return {"limit": limit, "variants": results}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200, help="renders timed per variant")
+    parser.add_argument("--limit", default="20,100", help="page sizes, comma separated")
+    parser.add_argument("--text-words", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    runs = [bench_page(args, int(limit)) for limit in args.limit.split(",")]
+    print(json.dumps({"encoder": encoder_name(), "encodings": available_encodings(), "runs": runs}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Query latency of GET /summarizations/search against corpus size.
+
+    python -m benchmarks.search --sizes 1000,10000,50000 --queries 200
+    python -m benchmarks.search --mysql --queries 200   # FULLTEXT, DB_* env
+
+Builds the in-process inverted index (SEARCH_BACKEND=memory) over
+synthetic transcripts whose words follow a Zipf distribution, then times
+queries for a common, a mid-frequency and a rare term, a two-term query
+and a patient-scoped query, plus building the highlighted page. With
+``--mysql`` the same query mix runs through MATCH ... AGAINST on the
+configured database instead, at whatever size its summaries table has.
+Prints JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from services.search import InvertedIndex, fulltext_query, query_terms, search_page
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(samples: List[float]) -> dict:
+    return {
+        "p50_ms": percentile(samples, 0.5) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "max_ms": max(samples) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+    }
+
+
+class Corpus:
+    def __init__(self, vocabulary: int, patients: int, text_words: int, seed: int):
+        self.rng = random.Random(seed)
+        self.words = [f"term{rank:05d}" for rank in range(vocabulary)]
+        cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary)))
+        # one long Zipf-distributed stream, sliced at random offsets: drawing
+        # every word separately would dominate the run time
+        self.stream = self.rng.choices(self.words, cum_weights=cum_weights, k=max(100000, vocabulary * 10))
+        self.patients = [f"patient-{i:05d}" for i in range(patients)]
+        self.text_words = text_words
+
+    def text(self, words: int) -> str:
+        start = self.rng.randrange(len(self.stream) - words)
+        return " ".join(self.stream[start:start + words])
+
+    def row(self, doc_id: int) -> dict:
+        return {
+            "id": doc_id,
+            "patient_id": self.rng.choice(self.patients),
+            "input_text": self.text(self.text_words),
+            "summary": self.text(self.text_words // 10),
+        }
+
+    def queries(self) -> Dict[str, dict]:
+        rare = self.words[len(self.words) // 2]
+        return {
+            "common": {"q": self.words[10]},
+            "mid": {"q": self.words[500]},
+            "rare": {"q": rare},
+            "two_terms": {"q": f"{self.words[50]} {self.words[2000]}"},
+            "patient_scoped": {"q": self.words[50], "patient_id": self.patients[0]},
+        }
+
+
+def bench_index(args, size: int) -> dict:
+    corpus = Corpus(args.vocabulary, args.patients, args.text_words, args.seed)
+    rows = [corpus.row(doc_id) for doc_id in range(1, size + 1)]
+    index = InvertedIndex()
+
+    started = time.perf_counter()
+    for row in rows:
+        index.add_row(row)
+    build = time.perf_counter() - started
+    by_id = {row["id"]: row for row in rows}
+
+    results = {}
+    for name, query in corpus.queries().items():
+        terms = query_terms(query["q"])
+        rank, page = [], []
+        for _ in range(args.queries):
+            started = time.perf_counter()
+            ranked = index.search(terms, query.get("patient_id"), args.limit + 1)
+            rank.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            search_page([(by_id[doc_id], score) for doc_id, score in ranked], terms, args.limit)
+            page.append(time.perf_counter() - started)
+        with index._lock:
+            matched = sum(len(index._postings.get(term, ())) for term in terms)
+        results[name] = {"postings": matched, "rank": summarize(rank), "page": summarize(page)}
+
+    stats = index.stats()
+    return {
+        "documents": size,
+        "terms": stats["terms"],
+        "build_seconds": build,
+        "docs_per_second": size / build,
+        "queries": results,
+    }
+
+
+def bench_mysql(args) -> dict:
+    from framework.db import get_pool
+
+    corpus = Corpus(args.vocabulary, args.patients, args.text_words, args.seed)
+    results = {}
+    with get_pool().connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) AS count FROM summaries")
+        size = cursor.fetchone()["count"]
+        for name, query in corpus.queries().items():
+            terms = query_terms(query["q"])
+            sql, params = fulltext_query(terms, query.get("patient_id"), args.limit + 1, 0)
+            samples = []
+            for _ in range(args.queries):
+                started = time.perf_counter()
+                cursor.execute(sql, params)
+                cursor.fetchall()
+                samples.append(time.perf_counter() - started)
+            results[name] = summarize(samples)
+    return {"backend": "mysql", "documents": size, "queries": results}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--patients", type=int, default=100)
+    parser.add_argument("--text-words", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mysql", action="store_true", help="time MATCH ... AGAINST on the configured database")
+    args = parser.parse_args()
+
+    if args.mysql:
+        print(json.dumps(bench_mysql(args), indent=2))
+        return
+
+    runs = [bench_index(args, int(size)) for size in args.sizes.split(",")]
+    print(json.dumps({"backend": "memory", "runs": runs}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Cold-start benchmark: import time and time-to-first-request.
+
+    python -m benchmarks.startup --runs 5
+
+Each run starts a fresh interpreter, so nothing is cached between runs.
+``import_s`` is how long ``import main`` takes; ``first_request_s`` is
+from spawning uvicorn until ``GET /health/live`` first answers 200 (the
+database and API clients are created in the background and are not
+needed for it). Prints medians and per-run numbers as JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(env: dict) -> float:
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_first_request(env: dict, timeout: float) -> float:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/health/live"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {proc.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"no response from {url} within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--no-warmup", action="store_true", help="set WARMUP_ON_STARTUP=0")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.no_warmup:
+        env["WARMUP_ON_STARTUP"] = "0"
+
+    imports = [measure_import(env) for _ in range(args.runs)]
+    first = [measure_first_request(env, args.timeout) for _ in range(args.runs)]
+
+    print(json.dumps({
+        "runs": args.runs,
+        "import_s": statistics.median(imports),
+        "first_request_s": statistics.median(first),
+        "import_runs": imports,
+        "first_request_runs": first,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Closed-loop throughput of framework.server against its worker count.
+
+    python -m benchmarks.workers --workers 1,2,4 --concurrency 64 --duration 20
+    python -m benchmarks.workers --endpoint live --workers 1,2,4,8 --mode async
+
+For each worker count, boots benchmarks.app_server --workers N on the
+SQLite stand-in and keeps --concurrency requests in flight from --clients
+client processes for --duration seconds (after --warmup), then drains it
+with SIGTERM and records how long that took. Endpoints:
+
+  read    GET /summarizations for a random seeded patient (DB read + JSON)
+  live    GET /health/live (server and framework overhead only)
+
+The read cache is off unless --read-cache is given, so every read reaches
+the database. The clients share the machine with the server: on a host
+with few cores they compete for CPU, and the curve flattens early. Prints
+JSON with requests/s, latency percentiles and the speedup over the first
+worker count.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from typing import List
+
+import httpx
+
+from benchmarks.load import _percentiles, _wait_healthy
+from tests.sqlite_shim import patient_ids
+from framework.server import available_cpus
+
+
+def paths_for(args) -> List[str]:
+    if args.endpoint == "live":
+        return ["/health/live"]
+    return [f"/summarizations?patient_id={patient}&limit={args.page_size}" for patient in patient_ids(args.seed_patients)]
+
+
+async def _drive(url: str, paths: List[str], concurrency: int, warmup: float, duration: float, seed: int) -> dict:
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=30, limits=limits) as client:
+        measure_from = time.perf_counter() + warmup
+        stop = measure_from + duration
+
+        async def loop(rng: random.Random):
+            nonlocal errors
+            while True:
+                started = time.perf_counter()
+                if started >= stop:
+                    return
+                try:
+                    ok = (await client.get(rng.choice(paths))).status_code < 500
+                except httpx.HTTPError:
+                    ok = False
+                if started >= measure_from:
+                    if ok:
+                        latencies.append(time.perf_counter() - started)
+                    else:
+                        errors += 1
+
+        await asyncio.gather(*(loop(random.Random(seed * 1000 + i)) for i in range(concurrency)))
+    return {"latencies": latencies, "errors": errors}
+
+
+def client_process(url: str, paths: List[str], concurrency: int, warmup: float, duration: float, seed: int) -> dict:
+    return asyncio.run(_drive(url, paths, concurrency, warmup, duration, seed))
+
+
+def bench_workers(args, workers: int) -> dict:
+    url = f"http://127.0.0.1:{args.port}"
+    env = dict(os.environ, SUMMARIZATION_MODE=args.mode, PUBSUB_BACKEND="fake",
+               OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "fake"))
+    env["READ_CACHE_BACKEND"] = "memory" if args.read_cache else "off"
+    server = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.app_server", "--port", str(args.port), "--workers", str(workers),
+        "--sqlite", args.sqlite, "--seed-rows", str(args.seed_rows), "--seed-patients", str(args.seed_patients),
+    ], env=env)
+    try:
+        _wait_healthy(server, url, "/health/live")
+        paths = paths_for(args)
+        per_client = max(1, args.concurrency // args.clients)
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.starmap(client_process, [
+                (url, paths, per_client, args.warmup, args.duration, args.seed + i) for i in range(args.clients)
+            ])
+    finally:
+        started = time.perf_counter()
+        server.send_signal(signal.SIGTERM)
+        code = server.wait(timeout=120)
+        drain = time.perf_counter() - started
+
+    latencies = [sample for result in results for sample in result["latencies"]]
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": sum(result["errors"] for result in results),
+        "throughput_rps": len(latencies) / args.duration,
+        "latency": _percentiles(latencies),
+        "drain_seconds": drain,
+        "exit_code": code,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="worker counts, comma separated")
+    parser.add_argument("--endpoint", choices=("read", "live"), default="read")
+    parser.add_argument("--mode", choices=("sync", "async"), default="sync", help="SUMMARIZATION_MODE")
+    parser.add_argument("--concurrency", type=int, default=64, help="requests in flight, over all clients")
+    parser.add_argument("--clients", type=int, default=2, help="client processes")
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds per worker count")
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--read-cache", action="store_true", help="keep the in-process read cache on")
+    parser.add_argument("--port", type=int, default=8012)
+    parser.add_argument("--sqlite", default="/tmp/summarization-workers.db")
+    parser.add_argument("--seed-rows", type=int, default=10000)
+    parser.add_argument("--seed-patients", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    runs = [bench_workers(args, int(workers)) for workers in args.workers.split(",")]
+    for run in runs:
+        run["speedup"] = run["throughput_rps"] / runs[0]["throughput_rps"] if runs[0]["throughput_rps"] else None
+    print(json.dumps({"config": vars(args), "cpus": available_cpus(), "runs": runs}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
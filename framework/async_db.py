@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import aiomysql
+from fastapi import HTTPException
+from pymysql.constants import CLIENT
+
+from framework.db import (
+    DB_HOST,
+    DB_NAME,
+    DB_PASSWORD,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_RECYCLE,
+    DB_PORT,
+    DB_POOL_TIMEOUT,
+    DB_USER,
+)
+from middleware.metrics import instrument_connection, observe_stage
+
+
+async def _end_transaction(conn):
+    # the pool runs with autocommit off, so even a plain SELECT leaves a
+    # transaction open, and aiomysql closes rather than reuses such a
+    # connection on release; one that cannot roll back is closed
+    try:
+        await conn.rollback()
+    except asyncio.CancelledError:
+        conn.close()
+        raise
+    except Exception:
+        conn.close()
+
+
+async def release(pool, conn):
+    """Return ``conn`` to ``pool`` with no transaction open."""
+    try:
+        await _end_transaction(conn)
+    finally:
+        pool.release(conn)
+
+
+class _Acquire:
+    # ``await pool.acquire()`` and ``async with pool.acquire() as conn``;
+    # the latter ends the connection's transaction before releasing it
+    def __init__(self, acquire):
+        self._acquire = acquire
+        self._conn = None
+
+    def __await__(self):
+        return self._instrumented().__await__()
+
+    async def _instrumented(self):
+        started = time.perf_counter()
+        conn = await self._acquire
+        observe_stage("db_acquire", time.perf_counter() - started)
+        return instrument_connection(conn)
+
+    async def __aenter__(self):
+        started = time.perf_counter()
+        self._conn = await self._acquire.__aenter__()
+        observe_stage("db_acquire", time.perf_counter() - started)
+        return instrument_connection(self._conn)
+
+    async def __aexit__(self, *exc):
+        try:
+            await _end_transaction(self._conn)
+        finally:
+            await self._acquire.__aexit__(*exc)
+
+
+class InstrumentedPool:
+    """aiomysql pool whose connections report statement and commit times.
+
+    aiomysql creates connections inside the pool, so they are instrumented
+    the first time they are handed out; everything else is the pool's own.
+    """
+
+    def __init__(self, pool: aiomysql.Pool):
+        self._pool = pool
+
+    def acquire(self) -> _Acquire:
+        return _Acquire(self._pool.acquire())
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
+# asyncio-native pool used when SUMMARIZATION_MODE=async; created inside the
+# running event loop on first use (or by the startup warm-up in main.py)
+pool: Optional[InstrumentedPool] = None
+init_error: Optional[str] = None
+_init_lock = asyncio.Lock()
+
+
+async def init_pool() -> InstrumentedPool:
+    global pool, init_error
+    async with _init_lock:
+        if pool is not None:
+            return pool
+        try:
+            pool = InstrumentedPool(await aiomysql.create_pool(
+                host=DB_HOST,
+                port=DB_PORT,
+                user=DB_USER,
+                password=DB_PASSWORD,
+                db=DB_NAME,
+                minsize=DB_POOL_MIN_SIZE,
+                maxsize=DB_POOL_MAX_SIZE,
+                pool_recycle=int(DB_POOL_RECYCLE),
+                cursorclass=aiomysql.DictCursor,
+                autocommit=False,
+                client_flag=CLIENT.FOUND_ROWS,
+            ))
+        except Exception as e:
+            init_error = f"{type(e).__name__}: {e}"
+            raise
+        init_error = None
+    return pool
+
+
+async def get_pool() -> InstrumentedPool:
+    return pool if pool is not None else await init_pool()
+
+
+async def close_pool():
+    global pool
+    if pool is not None:
+        pool.close()
+        await pool.wait_closed()
+        pool = None
+
+
+@asynccontextmanager
+async def checkout() -> AsyncIterator:
+    """A pooled connection, or a 503 when none can be had (see get_async_db)."""
+    try:
+        pool = await get_pool()
+    except Exception:
+        raise HTTPException(status_code=503, detail="Database unavailable", headers={"Retry-After": "1"})
+
+    try:
+        conn = await asyncio.wait_for(pool.acquire(), timeout=DB_POOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="no database connection available after %.1fs" % DB_POOL_TIMEOUT,
+            headers={"Retry-After": "1"},
+        )
+
+    try:
+        yield conn
+    finally:
+        await release(pool, conn)
+
+
+async def get_async_db():
+    async with checkout() as conn:
+        yield conn
+
+
+def status() -> dict:
+    return {"ready": pool is not None, "error": init_error}
+
+
+def stats() -> dict:
+    if pool is None:
+        return {}
+    return {
+        "min_size": pool.minsize,
+        "max_size": pool.maxsize,
+        "size": pool.size,
+        "idle": pool.freesize,
+        "in_use": pool.size - pool.freesize,
+    }
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional
+
+import pymysql
+from fastapi import HTTPException
+from pymysql.constants import CLIENT
+from pymysql.cursors import DictCursor
+
+from framework.lazy import LazyResource
+from middleware.metrics import instrument_connection, observe_stage
+
+
+# -----------------------------------------------------------------------------
+# Config (env vars so each replica can be sized independently)
+# -----------------------------------------------------------------------------
+DB_HOST = os.environ.get("DB_HOST", "127.0.0.1")  # or Cloud SQL private/public IP
+DB_PORT = int(os.environ.get("DB_PORT", 3306))
+DB_USER = os.environ.get("DB_USER", "root")
+DB_PASSWORD = os.environ.get("DB_PASSWORD", "")
+DB_NAME = os.environ.get("DB_NAME", "summaries")
+
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 5.0))
+DB_POOL_RECYCLE = float(os.environ.get("DB_POOL_RECYCLE", 1800))
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the timeout."""
+
+
+class PoolClosed(Exception):
+    """Raised when a connection is asked of a pool that has been closed."""
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+
+
+def connect():
+    return pymysql.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+        cursorclass=DictCursor,
+        # rowcount of an UPDATE = rows matched, not rows changed (404 checks)
+        client_flag=CLIENT.FOUND_ROWS,
+    )
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of pymysql connections.
+
+    Connections are pinged when borrowed and replaced once they are older
+    than ``recycle`` seconds, so stale Cloud SQL sockets never reach a handler.
+    """
+
+    def __init__(
+        self,
+        min_size: int = DB_POOL_MIN_SIZE,
+        max_size: int = DB_POOL_MAX_SIZE,
+        timeout: float = DB_POOL_TIMEOUT,
+        recycle: float = DB_POOL_RECYCLE,
+        factory=connect,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("invalid pool size: min=%s max=%s" % (min_size, max_size))
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self._factory = factory
+
+        self._idle: Deque[_PooledConnection] = deque()
+        self._in_use: Dict[int, _PooledConnection] = {}
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # stats
+        self._checkouts = 0
+        self._timeouts = 0
+        self._recycled = 0
+        self._failed_pings = 0
+        self._waiting = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+        for _ in range(min_size):
+            self._idle.append(self._connect())
+            self._size += 1
+
+    # ---- checkout / checkin ----
+    def acquire(self, timeout: Optional[float] = None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        with self._cond:
+            self._waiting += 1
+            try:
+                while not self._closed and not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            "no database connection available after %.1fs" % timeout
+                        )
+                    self._cond.wait(remaining)
+
+                if self._closed:
+                    raise PoolClosed("database connection pool is closed")
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    # reserve the slot before connecting outside the lock
+                    pooled = None
+                    self._size += 1
+            finally:
+                self._waiting -= 1
+
+        if pooled is None:
+            try:
+                pooled = self._connect()
+            except Exception:
+                self._discard_slot()
+                raise
+        else:
+            pooled = self._validate(pooled)
+
+        waited = time.monotonic() - start
+        observe_stage("db_acquire", waited)
+        with self._cond:
+            self._in_use[id(pooled.conn)] = pooled
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        return pooled.conn
+
+    def release(self, conn, discard: bool = False):
+        with self._cond:
+            pooled = self._in_use.pop(id(conn), None)
+            if pooled is None:
+                return
+        # the rollback is a round-trip, so it runs outside the lock: a slow
+        # or hung socket must not hold up every other checkout
+        if not discard:
+            try:
+                # never hand out a connection with an open transaction
+                conn.rollback()
+            except Exception:
+                discard = True
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append(pooled)
+                pooled = None
+            self._cond.notify()
+        if pooled is not None:
+            _close_quietly(conn)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator:
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except pymysql.err.OperationalError:
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def _validate(self, pooled: _PooledConnection) -> _PooledConnection:
+        if self.recycle and time.monotonic() - pooled.created_at > self.recycle:
+            _close_quietly(pooled.conn)
+            with self._cond:
+                self._recycled += 1
+            return self._replace()
+
+        try:
+            pooled.conn.ping(reconnect=False)
+            return pooled
+        except Exception:
+            _close_quietly(pooled.conn)
+            with self._cond:
+                self._failed_pings += 1
+            return self._replace()
+
+    def _connect(self) -> _PooledConnection:
+        # statements and commits are timed for /metrics
+        return _PooledConnection(instrument_connection(self._factory()))
+
+    def _replace(self) -> _PooledConnection:
+        try:
+            return self._connect()
+        except Exception:
+            self._discard_slot()
+            raise
+
+    def _discard_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def close(self):
+        # checked-out connections are closed as they are returned
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            # waiting checkouts fail now rather than at their timeout
+            self._cond.notify_all()
+        for pooled in idle:
+            _close_quietly(pooled.conn)
+
+    # ---- stats ----
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "failed_pings": self._failed_pings,
+                "avg_wait_ms": (self._wait_total / self._checkouts * 1000) if self._checkouts else 0.0,
+                "max_wait_ms": self._wait_max * 1000,
+            }
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+# created on first use (or by the startup warm-up), so importing the app
+# never needs the database to be up
+db_pool: LazyResource[ConnectionPool] = LazyResource("mysql", ConnectionPool, close=ConnectionPool.close)
+
+
+def get_pool() -> ConnectionPool:
+    return db_pool.get()
+
+
+@contextmanager
+def checkout() -> Iterator:
+    """A pooled connection, or a 503 when none can be had; for handlers
+    that only sometimes need the database (see get_db)."""
+    try:
+        pool = get_pool()
+        conn = pool.acquire()
+    except (PoolTimeout, PoolClosed) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except pymysql.err.OperationalError:
+        raise HTTPException(status_code=503, detail="Database unavailable", headers={"Retry-After": "1"})
+
+    discard = False
+    try:
+        yield conn
+    except pymysql.err.OperationalError:
+        discard = True
+        raise
+    finally:
+        pool.release(conn, discard=discard)
+
+
+def get_db():
+    with checkout() as conn:
+        yield conn
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+# every LazyResource registers itself here so /health/ready can report on it
+registry: Dict[str, "LazyResource"] = {}
+
+
+class LazyResource(Generic[T]):
+    """A client/pool that is created on first use instead of at import time.
+
+    Creation is thread-safe and happens once; a failed attempt is recorded
+    (for readiness reporting) and retried on the next ``get``.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T], close: Optional[Callable[[T], None]] = None):
+        self.name = name
+        self._factory = factory
+        self._close = close
+        self._value: Optional[T] = None
+        self._lock = threading.Lock()
+        self.init_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        registry[name] = self
+
+    @property
+    def ready(self) -> bool:
+        return self._value is not None
+
+    def get(self) -> T:
+        value = self._value
+        if value is not None:
+            return value
+
+        with self._lock:
+            if self._value is None:
+                start = time.perf_counter()
+                try:
+                    self._value = self._factory()
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    raise
+                self.init_seconds = time.perf_counter() - start
+                self.error = None
+            return self._value
+
+    def peek(self) -> Optional[T]:
+        """The instance if it was already created, without creating it."""
+        return self._value
+
+    def close(self):
+        with self._lock:
+            value, self._value = self._value, None
+        if value is not None and self._close is not None:
+            self._close(value)
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "init_ms": self.init_seconds * 1000 if self.init_seconds is not None else None,
+            "error": self.error,
+        }
@@ -0,0 +1,290 @@
+"""Production launcher: preloaded app, forked uvicorn workers, graceful drain.
+
+    python -m framework.server                  # main:app, SERVER_* env
+    SERVER_WORKERS=4 python -m framework.server
+
+The parent imports the app once, binds the listening socket and forks
+SERVER_WORKERS children that serve it with uvicorn (no reload). Each worker
+has its own DB pool, job queue, caches and metrics, so DB_POOL_MAX_SIZE and
+JOB_WORKERS are per worker; with several workers the in-process read cache
+is off unless READ_CACHE_BACKEND says otherwise. A worker that dies is
+replaced. Jobs are saved to the jobs table, so /jobs/{job_id} and its event
+streams work on any worker; a stream on a worker other than the one running
+the job sees each change at its next keep-alive (JOB_EVENTS_KEEPALIVE).
+
+On SIGTERM (or SIGINT) every worker stops accepting connections, finishes
+in-flight requests within SERVER_GRACEFUL_TIMEOUT, then runs the app's
+shutdown, which waits up to JOB_SHUTDOWN_TIMEOUT for running jobs; queued
+jobs stay pending in the jobs table for the next start, and batch or delete
+jobs still running are marked failed. Workers still alive after
+SERVER_KILL_TIMEOUT are killed. The orchestrator's grace
+period (e.g. terminationGracePeriodSeconds) should exceed it.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+import anyio.to_thread
+import uvicorn
+from uvicorn.importer import import_from_string
+
+from services.job_queue import JOB_SHUTDOWN_TIMEOUT
+
+
+# -----------------------------------------------------------------------------
+# Config
+# -----------------------------------------------------------------------------
+SERVER_APP = os.environ.get("SERVER_APP", "main:app")
+SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.environ.get("FASTAPIPORT", 8000))
+# 0 = one per available CPU, capped at SERVER_MAX_WORKERS
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", 0))
+SERVER_MAX_WORKERS = int(os.environ.get("SERVER_MAX_WORKERS", 8))
+# longer than the load balancer's idle timeout (60s on most), so the
+# balancer closes idle connections first and never sends on a closing one
+SERVER_KEEPALIVE = int(os.environ.get("SERVER_KEEPALIVE", 65))
+SERVER_BACKLOG = int(os.environ.get("SERVER_BACKLOG", 2048))
+# connections per worker beyond which requests get a 503 (0 = no limit)
+SERVER_LIMIT_CONCURRENCY = int(os.environ.get("SERVER_LIMIT_CONCURRENCY", 0))
+# threads per worker for sync handlers and run_in_threadpool (anyio default: 40)
+SERVER_THREADPOOL_SIZE = int(os.environ.get("SERVER_THREADPOOL_SIZE", 40))
+# in-flight requests; running jobs get JOB_SHUTDOWN_TIMEOUT on top
+SERVER_GRACEFUL_TIMEOUT = float(os.environ.get("SERVER_GRACEFUL_TIMEOUT", 30))
+SERVER_KILL_TIMEOUT = float(
+    os.environ.get("SERVER_KILL_TIMEOUT", SERVER_GRACEFUL_TIMEOUT + JOB_SHUTDOWN_TIMEOUT + 5)
+)
+SERVER_LOG_LEVEL = os.environ.get("SERVER_LOG_LEVEL", "info")
+SERVER_ACCESS_LOG = os.environ.get("SERVER_ACCESS_LOG", "1") == "1"
+
+# a worker that dies sooner than this after starting is replaced only after
+# the same delay, so a crash on startup does not turn into a fork loop
+RESPAWN_DELAY = 1.0
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def is_primary_worker() -> bool:
+    """True in the first worker (and without this launcher), for work one process should do."""
+    # an env var rather than a global: under ``python -m framework.server``
+    # this module is __main__, not the framework.server the app imports
+    return os.environ.get("SERVER_WORKER_INDEX", "0") == "0"
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: the cgroup quota, else the affinity mask."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, int(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def worker_count(configured: int = SERVER_WORKERS) -> int:
+    if configured > 0:
+        return configured
+    return max(1, min(available_cpus(), SERVER_MAX_WORKERS))
+
+
+def prefork_defaults(workers: int):
+    """Env defaults for serving with ``workers`` processes; set before the app is imported.
+
+    A worker's in-memory read cache keeps serving a page for up to
+    READ_CACHE_TTL after another worker changed it, so with several workers
+    it is off unless READ_CACHE_BACKEND is set (redis is shared by all).
+    """
+    if workers > 1:
+        os.environ.setdefault("READ_CACHE_BACKEND", "off")
+
+
+def warn_per_worker_state(workers: int):
+    """Log the configured backends whose state each worker keeps to itself."""
+    if workers < 2:
+        return
+    from services.read_cache import READ_CACHE_BACKEND, READ_CACHE_TTL
+    from services.search import SEARCH_BACKEND
+
+    if READ_CACHE_BACKEND == "memory":
+        logger.warning(
+            "READ_CACHE_BACKEND=memory with %d workers: a write is seen by the other workers only after "
+            "READ_CACHE_TTL (%.0fs); use redis or off", workers, READ_CACHE_TTL,
+        )
+    if SEARCH_BACKEND == "memory":
+        logger.warning(
+            "SEARCH_BACKEND=memory with %d workers: each worker builds its own index and misses the edits "
+            "and deletes made through the others; use mysql", workers,
+        )
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def server_config(app, **overrides) -> uvicorn.Config:
+    settings = dict(
+        timeout_keep_alive=SERVER_KEEPALIVE,
+        backlog=SERVER_BACKLOG,
+        limit_concurrency=SERVER_LIMIT_CONCURRENCY or None,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+        log_level=SERVER_LOG_LEVEL,
+        access_log=SERVER_ACCESS_LOG,
+        lifespan="on",
+    )
+    settings.update(overrides)
+    return uvicorn.Config(app, **settings)
+
+
+# -----------------------------------------------------------------------------
+# Worker
+# -----------------------------------------------------------------------------
+async def _serve(config: uvicorn.Config, sock: socket.socket, threadpool_size: int):
+    # the limiter belongs to this event loop, so it is sized here
+    anyio.to_thread.current_default_thread_limiter().total_tokens = threadpool_size
+    await uvicorn.Server(config).serve(sockets=[sock])
+
+
+def run_worker(config: uvicorn.Config, sock: socket.socket, threadpool_size: int = SERVER_THREADPOOL_SIZE):
+    """Serve until SIGTERM/SIGINT, then drain (uvicorn's graceful shutdown + app lifespan)."""
+    # uvicorn re-raises the signal after its graceful shutdown, with the
+    # handler it found installed; a no-op one lets the worker exit normally
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda signum, frame: None)
+    asyncio.run(_serve(config, sock, threadpool_size))
+
+
+# -----------------------------------------------------------------------------
+# Supervisor
+# -----------------------------------------------------------------------------
+class Supervisor:
+    """Fork ``workers`` children serving ``config.app`` on one shared socket."""
+
+    def __init__(self, config: uvicorn.Config, sock: socket.socket, workers: int, threadpool_size: int = SERVER_THREADPOOL_SIZE):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.threadpool_size = threadpool_size
+        self._children: Dict[int, tuple] = {}  # pid -> (index, started)
+        self._stopping = False
+
+    def _spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            os.environ["SERVER_WORKER_INDEX"] = str(index)
+            code = 0
+            try:
+                run_worker(self.config, self.sock, self.threadpool_size)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                logger.exception("worker %d failed", index)
+                code = 1
+            finally:
+                # never return into the supervisor's stack in the child
+                os._exit(code)
+        self._children[pid] = (index, time.monotonic())
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        for index in range(self.workers):
+            self._spawn(index)
+        logger.info("Supervisor [%d] started %d workers", os.getpid(), self.workers)
+
+        while not self._stopping:
+            self._reap(respawn=True)
+            time.sleep(0.2)
+        return self._drain()
+
+    def _reap(self, respawn: bool):
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            index, started = self._children.pop(pid)
+            if respawn and not self._stopping:
+                logger.warning(
+                    "worker %d [%d] exited with code %d; replacing it", index, pid, os.waitstatus_to_exitcode(status)
+                )
+                if time.monotonic() - started < RESPAWN_DELAY:
+                    time.sleep(RESPAWN_DELAY)
+                self._spawn(index)
+
+    def _drain(self) -> int:
+        logger.info("Supervisor draining %d workers (up to %.0fs)", len(self._children), SERVER_KILL_TIMEOUT)
+        # the workers close their copies of the socket as they stop accepting
+        self.sock.close()
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + SERVER_KILL_TIMEOUT
+        while self._children and time.monotonic() < deadline:
+            self._reap(respawn=False)
+            time.sleep(0.1)
+        for pid, (index, _) in self._children.items():
+            logger.error("worker %d [%d] did not drain in time; killing it", index, pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        killed = bool(self._children)
+        while self._children:
+            self._reap(respawn=False)
+            time.sleep(0.05)
+        return 1 if killed else 0
+
+
+def serve(
+    app=SERVER_APP,
+    host: str = SERVER_HOST,
+    port: int = SERVER_PORT,
+    workers: Optional[int] = None,
+    threadpool_size: int = SERVER_THREADPOOL_SIZE,
+    **overrides,
+) -> int:
+    """Preload ``app`` (an object or "module:attr") and serve it with forked workers.
+
+    An app passed as an object was imported by the caller, which should
+    have called prefork_defaults first.
+    """
+    count = worker_count(workers or SERVER_WORKERS) if hasattr(os, "fork") else 1
+    if isinstance(app, str):
+        prefork_defaults(count)
+        # imported here, before forking, so workers share the loaded code
+        app = import_from_string(app)
+    config = server_config(app, **overrides)  # also sets up uvicorn's logging
+    warn_per_worker_state(count)
+    sock = bind_socket(host, port, config.backlog)
+    if not hasattr(os, "fork"):
+        run_worker(config, sock, threadpool_size)
+        return 0
+    return Supervisor(config, sock, count, threadpool_size).run()
+
+
+if __name__ == "__main__":
+    sys.exit(serve())
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import os
 import socket
 from datetime import datetime
@@ -7,8 +8,14 @@ from datetime import datetime
 from typing import Dict, List
 from uuid import UUID
 
-from fastapi import FastAPI, HTTPException
-from fastapi import Query, Path
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
+
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi import Depends, Query, Path, Request, Response, WebSocket
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 
 from models.person import PersonCreate, PersonRead, PersonUpdate
@@ -17,25 +24,118 @@ from models.health import Health
 from models.product import Product
 from models.service import Service
 from models.summarization import SummarizationCreate, SummarizationRead, SummarizationDelete, SummarizationUpdate, AsyncRequest
+from models.summarization import SummarizationSegment
 import pymysql
-from pymysql.cursors import DictCursor
 import uuid
 import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
+
+from framework import async_db
+from framework import lazy
+from framework.db import PoolClosed, PoolTimeout, checkout, db_pool, get_db, get_pool
+from framework.server import is_primary_worker
+from middleware import metrics
+from middleware.compression import CompressionMiddleware
+from middleware.metrics import MetricsMiddleware
+from resources.summarizations_async import router as async_router
+from resources.summarizations_async import job_queue as async_job_queue
+from resources.summarizations_async import start_jobs as start_async_jobs, stop_jobs as stop_async_jobs
+from services import segments
+from services.bulk import (
+    BULK_MAX_JOBS,
+    JobSlots,
+    finish_batch_job,
+    new_batch_job,
+    process_batch,
+    read_items,
+    summary_counts,
+)
+from services.job_queue import (
+    JOB_INTERRUPTED,
+    JOB_SHUTDOWN_TIMEOUT,
+    UPDATE_JOB_SQL,
+    JobQueue,
+    JobRepository,
+    QueueFull,
+)
+from services.job_store import JobRecord
+from services.mutations import (
+    DELETE_SUMMARY_SQL,
+    SUMMARY_DELETE_MAX_JOBS,
+    SUMMARY_DELETE_MAX_PENDING_JOBS,
+    UPDATE_PATIENT_SUMMARY_SQL,
+    UPDATE_SUMMARY_SQL,
+    count_patient_summaries,
+    delete_job_progress,
+    delete_job_response,
+    delete_patient_summaries,
+    execute_item_write,
+    execute_write,
+    new_delete_job,
+    patient_exists,
+)
+from services.jobs import job_response, job_store
+from services import llm
+from services.llm import clinical_batcher
+from services.backends import Summary, backend_for_model, backend_stats, get_backend
+from services.streaming import iterate_sync, stream_summary, stream_timings
+from services.summary_cache import SUMMARY_CACHE_PERSISTENT, SummariesTableTier, summary_cache
+from services.notifications import job_hub, open_job_stream, serve_job_socket
+from services.pubsub import events, publisher
+from services.read_cache import (
+    invalidate_patient,
+    invalidate_patient_rows,
+    item_key,
+    item_scopes,
+    list_key,
+    list_scopes,
+    read_cache,
+    set_cache_headers,
+)
+from services.resilience import LLMUnavailable
+from services.search import (
+    SEARCH_BACKEND,
+    index_append,
+    index_remove,
+    index_remove_patient,
+    index_update,
+    query_terms,
+    search,
+    search_index,
+    search_next_link,
+    search_page,
+    search_stats,
+)
+from utils.export import EXPORT_FETCH_SIZE, MEDIA_TYPES, csv_header, export_query, format_rows
+from utils.etags import (
+    collection_etag,
+    etag_matches,
+    if_match_check,
+    job_etag,
+    not_modified,
+    patient_version,
+    set_etag,
+    summary_etag,
+)
+from utils.pagination import keyset_query, next_link, resolve_cursor
+from utils.projection import parse_fields, project, representation, select_columns, variant_params
+from utils.responses import json_response
 
 
-from google.cloud import pubsub_v1
-
-publisher = pubsub_v1.PublisherClient()
-topic_path = publisher.topic_path("cloudcomputing-473814", "summarization-events")
-
-from openai import OpenAI
-import os
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+port = int(os.environ.get("FASTAPIPORT", 8000))
 
+# "sync" = def handlers on the threadpool (pymysql + OpenAI)
+# "async" = async def handlers (aiomysql + AsyncOpenAI), see resources/summarizations_async.py
+SUMMARIZATION_MODE = os.environ.get("SUMMARIZATION_MODE", "sync").lower()
+if SUMMARIZATION_MODE not in ("sync", "async"):
+    raise ValueError(f"SUMMARIZATION_MODE must be 'sync' or 'async', got {SUMMARIZATION_MODE!r}")
+if SUMMARIZATION_MODE == "async" and job_store.persistent:
+    raise ValueError("JOB_STORE=mysql uses the blocking pymysql pool; use JOB_STORE=memory with SUMMARIZATION_MODE=async")
 
-port = int(os.environ.get("FASTAPIPORT", 8000))
+# create the DB pool and API clients in the background right after startup
+# (0 = create each one on first use); the app accepts requests either way
+WARMUP_ON_STARTUP = os.environ.get("WARMUP_ON_STARTUP", "1") == "1"
 
 # -----------------------------------------------------------------------------
 # Fake in-memory "databases"
@@ -49,18 +149,117 @@ port = int(os.environ.get("FASTAPIPORT", 8000))
 
 summarizations: Dict[UUID, SummarizationRead] = {}
 
+def warm_up():
+    """Create the clients a request would otherwise create on first use.
+
+    Failures are recorded on each LazyResource (see /health/ready) and the
+    resource is retried by the next request that needs it.
+    """
+    resources = [llm.client] if SUMMARIZATION_MODE == "sync" else [llm.async_client]
+    if SUMMARIZATION_MODE == "sync":
+        resources.append(db_pool)
+    if events.enabled:
+        resources.append(publisher)
+
+    for resource in resources:
+        try:
+            resource.get()
+        except Exception:
+            pass
+
+
+async def async_warm_up():
+    try:
+        await async_db.init_pool()
+    except Exception:
+        pass  # recorded in async_db.init_error
+    await run_in_threadpool(warm_up)
+
+
+_warm_up_task = None
+_search_index_task = None
+
+
+def _start_search_index():
+    """Build the in-process search index in the background; searches answer 503 until it is ready."""
+    global _search_index_task
+    if SUMMARIZATION_MODE == "async":
+        _search_index_task = asyncio.create_task(search_index.abuild(async_db.get_pool))
+    else:
+        threading.Thread(target=search_index.build, args=(get_pool,), name="search-index", daemon=True).start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _warm_up_task
+    if SUMMARIZATION_MODE == "async":
+        await start_async_jobs()
+        if WARMUP_ON_STARTUP:
+            _warm_up_task = asyncio.create_task(async_warm_up())
+    else:
+        start_jobs()
+    if SEARCH_BACKEND == "memory":
+        _start_search_index()
+    yield
+    if _search_index_task is not None:
+        _search_index_task.cancel()
+    if SUMMARIZATION_MODE == "async":
+        await stop_async_jobs()
+        await async_db.close_pool()
+        if llm.async_client.ready:
+            await llm.async_client.peek().close()
+    else:
+        # running jobs get JOB_SHUTDOWN_TIMEOUT in all, queued ones are recovered on the next start
+        deadline = time.monotonic() + JOB_SHUTDOWN_TIMEOUT
+        await run_in_threadpool(job_queue.stop, JOB_SHUTDOWN_TIMEOUT)
+        background = dict(_background_jobs)
+        _, still_running = await run_in_threadpool(
+            wait_futures, set(background), max(0.0, deadline - time.monotonic())
+        )
+        # batch and delete jobs are not recovered; a thread cannot be stopped,
+        # so one finishing after all overwrites this
+        for future in still_running:
+            await run_in_threadpool(fail_job, background[future], JOB_INTERRUPTED)
+        await run_in_threadpool(db_pool.close)
+        await run_in_threadpool(llm.client.close)
+    await run_in_threadpool(events.close)
+
+
 app = FastAPI(
     title="Summarization Microservice",
     description="Integrates transcription audio into a summarized text format",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
-conn = pymysql.connect(
-    host="127.0.0.1",  # or Cloud SQL private/public IP
-    user="root",
-    database="summaries",
-    cursorclass=pymysql.cursors.DictCursor
-)
+# gzip/zstd for JSON bodies above COMPRESSION_MIN_BYTES, negotiated per request
+app.add_middleware(CompressionMiddleware)
+# route latency histograms for /metrics; outermost, so compression is included
+app.add_middleware(MetricsMiddleware)
+
+# summarization routes for the sync path; swapped for async_router by config
+sync_router = APIRouter()
+
+
+# breaker open, quota exhausted or retries spent (and no fallback backend
+# answered): fail fast with a hint instead of a 500
+@app.exception_handler(LLMUnavailable)
+async def llm_unavailable(request: Request, exc: LLMUnavailable):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+# The shared, bounded connection pool (sized via DB_POOL_* env vars) lives in
+# framework/db.py and is created on first use; the async path uses the
+# aiomysql pool in framework/async_db.py instead
+if SUMMARY_CACHE_PERSISTENT:
+    summary_cache.persistent = SummariesTableTier(
+        get_pool if SUMMARIZATION_MODE == "sync" else async_db.get_pool
+    )
+
+
 # -----------------------------------------------------------------------------
 # Address endpoints
 # -----------------------------------------------------------------------------
@@ -72,24 +271,6 @@ def create_summarization(summarization: SummarizationCreate):
         text=new_summarization
     )
 # def delete_summarization(summarization: SummarizationDelete):
-def generate_medical_summary(input_text: str) -> str:
-    prompt = (
-        "Summarize this medical context into a few sentences so that a "
-        "layperson can understand:\n\n"
-        f"{input_text}"
-    )
-
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",  # cheaper + good for summaries
-        messages=[
-            {"role": "system", "content": "You are a medical summarization assistant."},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.3,
-        max_tokens=150,
-    )
-
-    return response.choices[0].message.content.strip()
 
 
 
@@ -115,76 +296,195 @@ def generate_medical_summary(input_text: str) -> str:
 #     )
 
 
-from typing import List, Optional
-from fastapi import Query
-
-@app.get("/summarizations")
+@sync_router.get("/summarizations")
 def get_summarizations(
+    request: Request,
+    response: Response,
     patient_id: Optional[str] = Query(None),
     limit: int = Query(10, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor from the previous page's next link"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of summarization_id, patient_id, input_text, summary"),
+    links: str = Query("full", pattern="^(full|compact|none)$"),
 ):
-    event_message = f"GET request for patient_id={patient_id}"
-    publisher.publish(topic_path, event_message.encode("utf-8"))
+    events.emit("summarizations.listed", patient_id=patient_id, limit=limit, offset=offset)
 
-    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-        sql = """
-        SELECT id, patient_id, input_text, summary
-        FROM summaries
-        """
-        params = []
+    try:
+        after_id = resolve_cursor(cursor, patient_id, offset)
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    variant = representation(selected, links)
+
+    # a hit needs no connection at all
+    lookup = read_cache.get(list_key(patient_id, cursor, limit, offset, variant), list_scopes(patient_id))
+    if lookup.hit:
+        page, next_href, etag = lookup.value
+    else:
+        with checkout() as conn:
+            # the patient's version is read first, so the tag can only be
+            # older than the rows, never newer; unfiltered pages get none
+            version = patient_version(conn, patient_id) if patient_id else None
+            etag = collection_etag(patient_id, version, cursor, limit, offset, variant) if version else None
+            if etag_matches(request, etag):
+                set_cache_headers(response, lookup)
+                return not_modified(etag, response)
+
+            with conn.cursor() as db_cursor:
+                sql, params = keyset_query(select_columns(selected), patient_id, after_id, limit, offset)
+                db_cursor.execute(sql, params)
+                rows = db_cursor.fetchall()
+
+        page = [project(row, selected, links, "/summarizations") for row in rows]
+        next_href = next_link("/summarizations", patient_id, rows, limit, variant_params(fields, links)) if rows else None
+        read_cache.put(lookup, (page, next_href, etag))
+    set_cache_headers(response, lookup)
+
+    if not page:
+        if cursor is not None:
+            return json_response([], response)
+        raise HTTPException(status_code=404, detail="No summarizations found")
 
-        if patient_id:
-            sql += " WHERE patient_id = %s"
-            params.append(patient_id)
+    if next_href:
+        response.headers["Link"] = f'<{next_href}>; rel="next"'
+    if etag_matches(request, etag):
+        return not_modified(etag, response)
+    set_etag(response, etag)
 
-        sql += " LIMIT %s OFFSET %s"
-        params.extend([limit, offset])
+    return json_response(page, response)
 
-        cursor.execute(sql, params)
-        rows = cursor.fetchall()
 
-    if not rows:
-        raise HTTPException(status_code=404, detail="No summarizations found")
+# ------------------------------
+# BULK EXPORT (NDJSON / CSV stream)
+# ------------------------------
+@sync_router.get("/summarizations/export")
+async def export_summarizations(
+    request: Request,
+    patient_id: Optional[List[str]] = Query(None, description="Repeat to export several patients"),
+    min_id: Optional[int] = Query(None, ge=0),
+    max_id: Optional[int] = Query(None, ge=0),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+):
+    sql, params = export_query(patient_id, min_id, max_id)
 
-    return [
-        {
-            "summarization_id": row["id"],
-            "patient_id": row["patient_id"],
-            "input_text": row["input_text"],
-            "summary": row["summary"],
-            "links": [
-                {"rel": "self", "href": f"/summarizations/{row['id']}"},
-                {"rel": "collection", "href": "/summarizations"},
-                {"rel": "update", "href": f"/summarizations/{row['id']}"},
-                {"rel": "delete", "href": f"/summarizations/{row['id']}"}
-            ]
-        }
-        for row in rows
-    ]
+    try:
+        pool = await run_in_threadpool(get_pool)
+        conn = await run_in_threadpool(pool.acquire)
+    except (PoolTimeout, PoolClosed) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except pymysql.err.OperationalError:
+        raise HTTPException(status_code=503, detail="Database unavailable", headers={"Retry-After": "1"})
+
+    # unbuffered: rows are pulled from MySQL as the client reads them
+    db_cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+    try:
+        await run_in_threadpool(db_cursor.execute, sql, params)
+    except Exception:
+        pool.release(conn, discard=True)
+        raise
+
+    async def stream():
+        finished = False
+        try:
+            if format == "csv":
+                yield csv_header()
+            while not await request.is_disconnected():
+                rows = await run_in_threadpool(db_cursor.fetchmany, EXPORT_FETCH_SIZE)
+                if not rows:
+                    finished = True
+                    break
+                yield format_rows(rows, format)
+        finally:
+            # an unread unbuffered result leaves the connection unusable
+            if finished:
+                db_cursor.close()
+            pool.release(conn, discard=not finished)
+
+    return StreamingResponse(stream(), media_type=MEDIA_TYPES[format])
 
 
-# POST endpoint
-# POST endpoint
-@app.post("/summarizations", response_model=dict, status_code=201)
-def create_summarization(patient_id: str, input_text: str):
-    # Backend-generated summary (first 10 characters)
-    summary = generate_medical_summary(input_text)
+# ------------------------------
+# FULL-TEXT SEARCH
+# ------------------------------
+@sync_router.get("/summarizations/search")
+def search_summarizations(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    patient_id: Optional[str] = Query(None),
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+):
+    # the query text is not emitted: it may carry PHI
+    events.emit("summarizations.searched", patient_id=patient_id, limit=limit, offset=offset)
+
+    terms = query_terms(q)
+    with checkout() as conn:
+        hits = search(conn, terms, patient_id, limit, offset)
 
+    if len(hits) > limit:
+        response.headers["Link"] = f'<{search_next_link(q, patient_id, limit, offset)}>; rel="next"'
+    return json_response(search_page(hits, terms, limit), response)
 
-    with conn.cursor() as cursor:
+
+# after /summarizations/export and /summarizations/search, which this path
+# would otherwise shadow
+@sync_router.get("/summarizations/{summarization_id}", response_model=dict)
+def get_summarization(
+    request: Request,
+    response: Response,
+    summarization_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of summarization_id, patient_id, input_text, summary"),
+    links: str = Query("full", pattern="^(full|compact|none)$"),
+):
+    try:
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    variant = representation(selected, links)
+    lookup = read_cache.get(item_key(summarization_id, variant), item_scopes(summarization_id))
+    if lookup.hit:
+        item, etag = lookup.value
+    else:
+        with checkout() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {select_columns(selected, 'patient_id', 'version')} FROM summaries WHERE id = %s",
+                (summarization_id,)
+            )
+            row = cursor.fetchone()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Summarization not found")
+        etag = summary_etag(row["id"], row["version"], variant)
+        if etag_matches(request, etag):
+            set_cache_headers(response, lookup)
+            return not_modified(etag, response)
+        item = project(row, selected, links, f"/summarizations?patient_id={row['patient_id']}")
+        read_cache.put(lookup, (item, etag))
+    set_cache_headers(response, lookup)
+    if etag_matches(request, etag):
+        return not_modified(etag, response)
+    set_etag(response, etag)
+    return json_response(item, response)
+
+
+def save_summarization(patient_id: str, input_text: str, summary: Summary) -> dict:
+    # borrow a connection only for the insert, not for the LLM call
+    with get_pool().connection() as conn, conn.cursor() as cursor:
         sql = """
-        INSERT INTO summaries (patient_id, input_text, summary)
-        VALUES (%s, %s, %s)
+        INSERT INTO summaries (patient_id, input_text, summary, input_hash)
+        VALUES (%s, %s, %s, %s)
         """
-        cursor.execute(sql, (patient_id, input_text, summary))
+        cursor.execute(sql, (patient_id, input_text, summary.text, summary.key))
         new_id = cursor.lastrowid
         conn.commit()
+    invalidate_patient(patient_id)
+
+    events.emit("summarization.created", summarization_id=new_id, patient_id=patient_id)
 
     return {
         "summarization_id": new_id,
         "input_text": input_text,
-        "summary": summary,
+        "summary": summary.text,
+        "backend": summary.backend,
         "patient_id": patient_id,
         "links": [
             {"rel": "self", "href": f"/summarizations/{patient_id}"},
@@ -194,44 +494,129 @@ def create_summarization(patient_id: str, input_text: str):
         ]
     }
 
+
+# POST endpoint
+@sync_router.post("/summarizations", response_model=dict, status_code=201)
+def create_summarization(
+    request: Request,
+    patient_id: str,
+    input_text: str,
+    stream: bool = Query(False, description="Stream the summary as Server-Sent Events while it is generated"),
+    backend: Optional[str] = Query(None, description="Summarization backend: llm or extractive (default: SUMMARY_BACKEND)"),
+):
+    summarizer = get_backend(backend)
+    if stream:
+        started = time.perf_counter()
+        summary_stream = summarizer.stream(input_text)
+        return StreamingResponse(
+            stream_summary(
+                request,
+                iterate_sync(summary_stream),
+                lambda text: run_in_threadpool(
+                    save_summarization, patient_id, input_text,
+                    Summary(text, summary_stream.backend, summary_stream.key),
+                ),
+                started,
+            ),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    return save_summarization(patient_id, input_text, summarizer.summarize(input_text))
+
+# ------------------------------
+# BULK SUBMISSION (JSON array or NDJSON body)
+# ------------------------------
+@sync_router.post("/summarizations/batch")
+async def create_summarizations_batch(request: Request, backend: Optional[str] = Query(None)):
+    summarizer = get_backend(backend)
+    items = await read_items(request)
+    results = await run_in_threadpool(lambda: process_batch(items, summarizer.summarize, get_pool()))
+
+    events.emit("summarizations.batch_created", **summary_counts(results))
+
+    return {
+        "counts": summary_counts(results),
+        "results": results,
+        "links": [{"rel": "collection", "href": "/summarizations"}]
+    }
+
+
+_batch_job_executor = ThreadPoolExecutor(max_workers=BULK_MAX_JOBS, thread_name_prefix="batch-job")
+# the executor's own queue is unbounded, so admission is capped here
+batch_slots = JobSlots()
+# batch and delete jobs not yet finished (future -> job_id); shutdown waits
+# for them like job_queue
+_background_jobs: Dict[Future, str] = {}
+
+
+def submit_background(executor: ThreadPoolExecutor, fn, job_id: str, *args):
+    future = executor.submit(fn, job_id, *args)
+    _background_jobs[future] = job_id
+    future.add_done_callback(lambda done: _background_jobs.pop(done, None))
+
+
+def run_batch_job(job_id: str, items: list, on_done, summarizer):
+    try:
+        job_store.update(job_id, status="processing")
+        publish_job(job_id)
+        results = process_batch(items, summarizer.summarize, get_pool(), on_done=on_done)
+        finish_batch_job(job_store, job_id, results)
+        publish_job(job_id)
+        events.emit("job.completed", job_id=job_id, kind="batch", **summary_counts(results))
+    except Exception as e:
+        fail_job(job_id, str(e))
+    finally:
+        batch_slots.release()
+
+
+@sync_router.post("/summarizations/batch/async", status_code=202)
+async def create_summarizations_batch_async(request: Request, backend: Optional[str] = Query(None)):
+    summarizer = get_backend(backend)
+    # before the body is read, so a full service does not parse it for nothing
+    batch_slots.acquire()
+    try:
+        items = await read_items(request)
+        job_id = str(uuid.uuid4())
+        on_done = await run_in_threadpool(new_batch_job, job_id, items, job_store)
+        await run_in_threadpool(publish_job, job_id)
+        submit_background(_batch_job_executor, run_batch_job, job_id, items, on_done, summarizer)
+    except BaseException:
+        batch_slots.release()
+        raise
+
+    return {
+        "job_id": job_id,
+        "status": "pending",
+        "total": len(items),
+        "links": [
+            {"rel": "status", "href": f"/jobs/{job_id}"},
+            {"rel": "collection", "href": "/summarizations"}
+        ]
+    }
+
+
 # PUT endpoint (patient-scoped single summary)
-@app.put(
+@sync_router.put(
     "/patients/{patient_id}/summarizations/{summarization_id}",
     response_model=dict
 )
 def update_summarization(
     patient_id: str,
     summarization_id: int,
-    summary: str
+    summary: str,
+    conn=Depends(get_db)
 ):
-    with conn.cursor() as cursor:
-        # Verify the summary belongs to the patient
-        cursor.execute(
-            """
-            SELECT id
-            FROM summaries
-            WHERE id = %s AND patient_id = %s
-            """,
-            (summarization_id, patient_id)
+    # one statement; the patient_id match doubles as the ownership check
+    if not execute_write(conn, UPDATE_PATIENT_SUMMARY_SQL, (summary, summarization_id, patient_id)):
+        raise HTTPException(
+            status_code=404,
+            detail="Summarization not found for this patient"
         )
-        exists = cursor.fetchone()
+    invalidate_patient(patient_id, summarization_id)
+    index_update(summarization_id, summary=summary)
 
-        if not exists:
-            raise HTTPException(
-                status_code=404,
-                detail="Summarization not found for this patient"
-            )
-
-        # Update summary
-        cursor.execute(
-            """
-            UPDATE summaries
-            SET summary = %s
-            WHERE id = %s AND patient_id = %s
-            """,
-            (summary, summarization_id, patient_id)
-        )
-        conn.commit()
+    events.emit("summarization.updated", summarization_id=summarization_id, patient_id=patient_id)
 
     return {
         "summarization_id": summarization_id,
@@ -259,17 +644,16 @@ def update_summarization(
 
 
 # DELETE endpoint
-@app.delete("/summarizations/{summarization_id}", response_model=dict)
-def delete_summarization(summarization_id: int):
-    with conn.cursor() as cursor:
-        cursor.execute("SELECT id FROM summaries WHERE id=%s", (summarization_id,))
-        exists = cursor.fetchone()
-
-        if not exists:
-            raise HTTPException(status_code=404, detail="Summarization not found")
+@sync_router.delete("/summarizations/{summarization_id}", response_model=dict)
+def delete_summarization(request: Request, summarization_id: int, conn=Depends(get_db)):
+    check = if_match_check(request, summarization_id)
+    patient_id = execute_item_write(conn, DELETE_SUMMARY_SQL, (summarization_id,), summarization_id, check)
+    if patient_id is None:
+        raise HTTPException(status_code=404, detail="Summarization not found")
+    invalidate_patient(patient_id, summarization_id)
+    index_remove(summarization_id)
 
-        cursor.execute("DELETE FROM summaries WHERE id=%s", (summarization_id,))
-        conn.commit()
+    events.emit("summarization.deleted", summarization_id=summarization_id)
 
     return {
         "message": f"Summarization {summarization_id} deleted",
@@ -279,29 +663,62 @@ def delete_summarization(summarization_id: int):
     }
 
 
-@app.delete("/summarizations/patient/{patient_id}", response_model=dict)
-def delete_summaries_by_patient(patient_id: str):
-    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-        # Count summaries first
-        cursor.execute(
-            "SELECT COUNT(*) AS count FROM summaries WHERE patient_id=%s",
-            (patient_id,)
-        )
-        result = cursor.fetchone()
-        count = result["count"]
+_delete_job_executor = ThreadPoolExecutor(max_workers=SUMMARY_DELETE_MAX_JOBS, thread_name_prefix="delete-job")
+delete_slots = JobSlots(SUMMARY_DELETE_MAX_PENDING_JOBS, kind="delete")
 
-        if count == 0:
-            raise HTTPException(
-                status_code=404,
-                detail="No summaries found for this patient"
-            )
 
-        # Delete all summaries for patient
-        cursor.execute(
-            "DELETE FROM summaries WHERE patient_id=%s",
-            (patient_id,)
+def run_delete_job(job_id: str, patient_id: str):
+    try:
+        with get_pool().connection() as conn:
+            job_store.update(job_id, status="processing", total=count_patient_summaries(conn, patient_id))
+            publish_job(job_id)
+            on_chunk = delete_job_progress(job_id, job_store, job_hub.notify)
+            count = delete_patient_summaries(conn, patient_id, on_chunk=on_chunk)
+        invalidate_patient_rows(patient_id)
+        index_remove_patient(patient_id)
+        job_store.update(job_id, status="completed")
+        publish_job(job_id)
+        events.emit("summarizations.deleted", patient_id=patient_id, deleted_count=count)
+        events.emit("job.completed", job_id=job_id, kind="delete", patient_id=patient_id, deleted_count=count)
+    except Exception as e:
+        fail_job(job_id, str(e))
+    finally:
+        delete_slots.release()
+
+
+@sync_router.delete("/summarizations/patient/{patient_id}", response_model=dict)
+def delete_summaries_by_patient(
+    response: Response,
+    patient_id: str,
+    run_async: bool = Query(False, alias="async", description="Delete in the background; progress via /jobs/{job_id}"),
+    conn=Depends(get_db),
+):
+    if run_async:
+        if not patient_exists(conn, patient_id):
+            raise HTTPException(status_code=404, detail="No summaries found for this patient")
+        delete_slots.acquire()
+        try:
+            job_id = str(uuid.uuid4())
+            new_delete_job(job_id, patient_id, job_store)
+            publish_job(job_id)
+            submit_background(_delete_job_executor, run_delete_job, job_id, patient_id)
+        except BaseException:
+            delete_slots.release()
+            raise
+        response.status_code = 202
+        return delete_job_response(job_id, patient_id)
+
+    # chunked: each chunk commits on its own, so locks are short-lived
+    count = delete_patient_summaries(conn, patient_id)
+    invalidate_patient_rows(patient_id)
+    index_remove_patient(patient_id)
+    if count == 0:
+        raise HTTPException(
+            status_code=404,
+            detail="No summaries found for this patient"
         )
-        conn.commit()
+
+    events.emit("summarizations.deleted", patient_id=patient_id, deleted_count=count)
 
     return {
         "patient_id": patient_id,
@@ -314,98 +731,202 @@ def delete_summaries_by_patient(patient_id: str):
 
 
     # UPDATE endpoint
-@app.put("/summarizations/{summarization_id}", response_model=SummarizationRead)
-def update_summarization(summarization_id: int, summarization: SummarizationUpdate):
-    with conn.cursor() as cursor:
-        # Check if row exists
-        cursor.execute("SELECT id FROM summaries WHERE id=%s", (summarization_id,))
-        existing = cursor.fetchone()
-        if not existing:
-            raise HTTPException(status_code=404, detail="Summarization not found")
+@sync_router.put("/summarizations/{summarization_id}", response_model=SummarizationRead)
+def update_summarization(
+    request: Request, summarization_id: int, summarization: SummarizationUpdate, conn=Depends(get_db)
+):
+    params = (summarization.input_text, summarization.summary, summarization_id)
+    check = if_match_check(request, summarization_id)
+    patient_id = execute_item_write(conn, UPDATE_SUMMARY_SQL, params, summarization_id, check)
+    if patient_id is None:
+        raise HTTPException(status_code=404, detail="Summarization not found")
+    invalidate_patient(patient_id, summarization_id)
+    index_update(summarization_id, input_text=summarization.input_text, summary=summarization.summary)
 
-        # Update the row
-        sql = "UPDATE summaries SET input_text=%s, summary=%s WHERE id=%s"
-        cursor.execute(sql, (summarization.input_text, summarization.summary, summarization_id))
-        conn.commit()
+    events.emit("summarization.updated", summarization_id=summarization_id)
 
     return SummarizationRead(
         summarization_id=summarization_id,
         summary=summarization.summary
     )
 
-jobs = {}
+
+# ------------------------------
+# APPEND TO A LIVE TRANSCRIPT (rolling summary)
+# ------------------------------
+@sync_router.post("/summarizations/{summarization_id}/segments", response_model=dict)
+def append_summarization_segment(
+    summarization_id: int,
+    segment: SummarizationSegment,
+    backend: Optional[str] = Query(None),
+):
+    summarizer = get_backend(backend)
+    row = segments.get_state(get_pool(), summarization_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Summarization not found")
+
+    # only the new text goes to the LLM, merged into the current summary
+    if row["summary"]:
+        summary = summarizer.update(row["summary"], segment.input_text)
+    else:
+        summary = summarizer.summarize(segment.input_text)
+
+    segments.append_segment(get_pool(), row, segment.input_text, summary.text)
+    invalidate_patient(row["patient_id"], summarization_id)
+    index_append(summarization_id, segment.input_text, summary.text)
+    events.emit("summarization.appended", summarization_id=summarization_id, segment=row["segment_count"] + 1)
+
+    return segments.segment_response(row, summary)
+
 # ---- BACKGROUND WORKER ----
-def run_summarization_job(job_id: str, input_text: str):
+# runs on one of the JobQueue worker threads; job state lives in job_store
+# and is mirrored to the jobs table so it survives a restart
+job_repository = JobRepository(get_pool)
+
+
+def find_job(job_id: str) -> Optional[JobRecord]:
+    record = job_store.get(job_id)
+    if record is None and not job_store.persistent:
+        # finished before a restart, or accepted by another replica
+        row = job_repository.get(job_id)
+        record = JobRecord.from_row(row) if row is not None else None
+    return record
+
+
+def _set_job_status(
+    job_id: str, status: str, summary: Optional[str] = None, error: Optional[str] = None, mirror: bool = True
+):
+    record = job_store.update(job_id, status=status, summary=summary, error=error)
+    job_hub.notify(job_id, record)
+    if mirror and not job_store.persistent:
+        job_repository.update(job_id, status, summary=summary, error=error)
+
+
+def publish_job(job_id: str):
+    """A batch or delete job changed state: push it to this worker's listeners
+    and save it to the jobs table, where the other workers find it."""
+    if job_store.persistent:
+        job_hub.notify(job_id)
+        return
+    record = job_store.get(job_id)
+    job_hub.notify(job_id, record)
+    if record is not None:
+        job_repository.save(record)
+
+
+def fail_job(job_id: str, error: str):
+    job_store.update(job_id, status="failed", error=error)
     try:
-        jobs[job_id]["status"] = "processing"
-
-        time.sleep(5)
-
-        # ---- GPT SUMMARIZATION ----
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a medical assistant. Generate a concise, "
-                        "clinically accurate medical summary suitable for a physician."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": input_text
-                }
-            ],
-            temperature=0.2
-        )
+        publish_job(job_id)
+    except Exception:
+        pass
 
-        summary = response.choices[0].message.content.strip()
+
+def run_summarization_job(job_id: str):
+    record = find_job(job_id)
+    if record is None:
+        return  # deleted or expired while queued
+    patient_id, input_text = record.patient_id, record.input_text
+    try:
+        _set_job_status(job_id, "processing")
+
+        # ---- SUMMARIZATION (backend recorded in jobs.model) ----
+        summary = backend_for_model(record.model).summarize_clinical(input_text)
 
         # ---- SAVE TO DATABASE ----
-        with conn.cursor() as cursor:
+        with get_pool().connection() as conn, conn.cursor() as cursor:
             sql = """
-                INSERT INTO summaries (patient_id, input_text, summary)
-                VALUES (%s, %s, %s)
+                INSERT INTO summaries (patient_id, input_text, summary, input_hash)
+                VALUES (%s, %s, %s, %s)
             """
             cursor.execute(
                 sql,
                 (
-                    jobs[job_id]["patient_id"],
+                    patient_id,
                     input_text,
-                    summary
+                    summary.text,
+                    summary.key
                 )
             )
+            # the job row completes in the same transaction, so a job recovered
+            # after a crash never inserts its summary a second time
+            cursor.execute(UPDATE_JOB_SQL, ("completed", summary.text, None, job_id))
             conn.commit()
+        invalidate_patient(patient_id)
 
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["summary"] = summary
+        _set_job_status(job_id, "completed", summary=summary.text, mirror=False)
+        events.emit("job.completed", job_id=job_id, patient_id=patient_id)
 
     except Exception as e:
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = str(e)
+        events.emit("job.failed", job_id=job_id, patient_id=patient_id, error=str(e))
+        try:
+            _set_job_status(job_id, "failed", error=str(e))
+        except Exception:
+            pass
+        raise
+
+
+job_queue = JobQueue(run_summarization_job)
+
+
+def recover_jobs():
+    # re-queue work that was pending or in flight when the last process died
+    if not is_primary_worker():
+        return  # the launcher's other workers would queue the same jobs again
+    try:
+        unfinished = job_repository.unfinished()
+    except Exception:
+        return  # database not reachable yet; jobs stay pending in the table
+    for row in unfinished:
+        job_store.add(JobRecord.from_row(row, status="pending"))
+    for row in unfinished:
+        job_queue.submit(row["job_id"], row["model"], block=True)
+
+
+def start_jobs():
+    job_queue.start()
+
+    # warm-up and recovery run off the startup path so the app is serving
+    # (and answering /health/live) immediately
+    def startup():
+        if WARMUP_ON_STARTUP:
+            warm_up()
+        recover_jobs()
+
+    threading.Thread(target=startup, name="startup", daemon=True).start()
 
 
 # ------------------------------
 # 1️⃣ ASYNC SUMMARIZATION ENDPOINT
 # ------------------------------
-@app.post("/summarizations/async", status_code=202)
-def create_async_summarization(patient_id: str, input_text: str):
+def _queue_full(retry_after: int):
+    return HTTPException(
+        status_code=429,
+        detail="Too many pending summarization jobs",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+@sync_router.post("/summarizations/async", status_code=202)
+def create_async_summarization(patient_id: str, input_text: str, backend: Optional[str] = Query(None)):
+    model = get_backend(backend).model
+    # cheap pre-check so an overloaded replica does not write rows it will reject
+    if job_queue.full():
+        raise _queue_full(job_queue.retry_after())
 
     job_id = str(uuid.uuid4())
 
-    jobs[job_id] = {
-        "status": "pending",
-        "patient_id": patient_id,
-        "input_text": input_text,
-        "summary": None
-    }
+    job_store.add(JobRecord(job_id, patient_id=patient_id, input_text=input_text, model=model))
+    if not job_store.persistent:
+        job_repository.create(job_id, patient_id, input_text, model)
 
-    thread = threading.Thread(
-        target=run_summarization_job,
-        args=(job_id, input_text)
-    )
-    thread.start()
+    try:
+        job_queue.submit(job_id, model)
+    except QueueFull as e:
+        job_store.delete(job_id)
+        if not job_store.persistent:
+            job_repository.delete(job_id)
+        raise _queue_full(e.retry_after)
 
     return {
         "job_id": job_id,
@@ -420,107 +941,188 @@ def create_async_summarization(patient_id: str, input_text: str):
 # ------------------------------
 # 2️⃣ JOB STATUS POLLING
 # ------------------------------
-@app.get("/jobs/{job_id}")
-def get_job_status(job_id: str):
-    if job_id not in jobs:
+@sync_router.get("/jobs/{job_id}")
+def get_job_status(request: Request, response: Response, job_id: str):
+    record = find_job(job_id)
+    if record is None:
         raise HTTPException(status_code=404, detail="Job not found")
+    etag = job_etag(record)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return job_response(record)
 
-    job = jobs[job_id]
 
-    response = {
-        "job_id": job_id,
-        "status": job["status"],
-        "links": [{"rel": "self", "href": f"/jobs/{job_id}"}]
-    }
+# ------------------------------
+# JOB COMPLETION PUSH (instead of polling /jobs/{job_id})
+# ------------------------------
+async def _lookup_job(job_id: str) -> Optional[dict]:
+    record = await run_in_threadpool(find_job, job_id)
+    return job_response(record) if record is not None else None
 
-    if job["status"] == "completed":
-        response["summary"] = job["summary"]
 
-    if job["status"] == "failed":
-        response["error"] = job.get("error")
+@sync_router.get("/jobs/{job_id}/events")
+async def stream_job_events(request: Request, job_id: str):
+    return await open_job_stream(request, job_id, _lookup_job)
 
-    return response
 
-# jobs = {}
+@sync_router.websocket("/jobs/events")
+async def job_events_socket(websocket: WebSocket, job_id: List[str] = Query([])):
+    await serve_job_socket(websocket, _lookup_job, job_id)
 
-# # ---- BACKGROUND WORKER ----
-# def run_summarization_job(job_id: str, input_text: str):
-#     try:
-#         jobs[job_id]["status"] = "processing"
 
-#         # Simulate slow summarization (replace with real model)
-#         time.sleep(20)
-#         summary = input_text[:5]  # pretend this is the summarizer
+# ------------------------------
+# DB POOL STATS (for sizing per replica)
+# ------------------------------
+@app.get("/db/pool")
+def get_pool_stats():
+    if SUMMARIZATION_MODE == "async":
+        return async_db.stats()
+    pool = db_pool.peek()
+    return pool.stats() if pool is not None else {}
 
-#         # Save into the database
-#         with conn.cursor() as cursor:
-#             sql = "INSERT INTO summaries (input_text, summary) VALUES (%s, %s)"
-#             cursor.execute(sql, (input_text, summary))
-#             conn.commit()
 
-#         jobs[job_id]["status"] = "completed"
-#         jobs[job_id]["summary"] = summary
+# ------------------------------
+# JOB QUEUE STATS
+# ------------------------------
+@app.get("/jobs/queue")
+def get_job_queue_stats():
+    if SUMMARIZATION_MODE == "async":
+        return async_job_queue.stats()
+    return job_queue.stats()
 
-#     except Exception as e:
-#         jobs[job_id]["status"] = "failed"
-#         jobs[job_id]["error"] = str(e)
 
-# # ------------------------------
-# # 1️⃣  ASYNC SUMMARIZATION ENDPOINT (returns 202)
-# # ------------------------------
-# @app.post("/summarizations/async", status_code=202)
-# def create_async_summarization(patient_id: str, input_text: str):
+@app.get("/jobs/batching")
+def get_batching_stats():
+    if clinical_batcher is None:
+        return {"enabled": False}
+    return dict(clinical_batcher.stats(), enabled=True)
 
-#     job_id = str(uuid.uuid4())
 
-#     jobs[job_id] = {
-#         "status": "pending",
-#         "patient_id": patient_id,
-#         "input_text": input_text,
-#         "summary": None,
-#         "summarization_id": None
-#     }
+# ------------------------------
+# EVENT PUBLISHING STATS
+# ------------------------------
+@app.get("/summarizations/streaming")
+def get_streaming_stats():
+    return stream_timings.stats()
 
-#     # Launch background worker
-#     thread = threading.Thread(
-#         target=run_summarization_job,
-#         args=(job_id,)
-#     )
-#     thread.start()
 
-#     return {
-#         "job_id": job_id,
-#         "status": "pending",
-#         "links": [
-#             {"rel": "status", "href": f"/jobs/{job_id}"},
-#             {"rel": "collection", "href": "/summarizations"}
-#         ]
-#     }
+@app.get("/summarizations/backends")
+def get_backend_stats():
+    return backend_stats()
+
+
+# ------------------------------
+# LLM CALL STATS (retries, hedges, breaker, quota)
+# ------------------------------
+@app.get("/llm/stats")
+def get_llm_stats():
+    return llm.caller.stats()
+
+
+@app.get("/jobs/store")
+def get_job_store_stats():
+    return job_store.stats()
+
+
+@app.get("/jobs/subscriptions")
+def get_job_subscription_stats():
+    return job_hub.stats()
+
+
+@app.get("/events/stats")
+def get_event_stats():
+    return events.stats()
+
+
+# ------------------------------
+# SUMMARY CACHE STATS
+# ------------------------------
+@app.get("/cache/summaries")
+def get_summary_cache_stats():
+    return summary_cache.stats()
+
+
+@app.get("/cache/reads")
+def get_read_cache_stats():
+    return read_cache.stats()
+
+
+@app.get("/search/index")
+def get_search_index_stats():
+    return search_stats()
 
 
-# # ------------------------------
-# # 2️⃣  JOB STATUS POLLING
-# # ------------------------------
-# @app.get("/jobs/{job_id}")
-# def get_job_status(job_id: str):
-#     if job_id not in jobs:
-#         raise HTTPException(status_code=404, detail="Job not found")
+# ------------------------------
+# PROMETHEUS METRICS
+# ------------------------------
+# gauges are read at scrape time from the same sources as the stats endpoints
+metrics.registry.gauge(
+    "summarizer_jobs_in_flight", "Async summarization jobs being processed",
+    lambda: get_job_queue_stats()["active"],
+)
+metrics.registry.gauge(
+    "summarizer_job_queue_depth", "Async summarization jobs waiting for a worker",
+    lambda: get_job_queue_stats()["depth"],
+)
+metrics.registry.gauge(
+    "summarizer_event_buffer_depth", "Events waiting to be handed to the Pub/Sub publisher",
+    lambda: events.stats()["buffered"],
+)
+metrics.registry.gauge("process_threads", "Live threads in this process", threading.active_count)
+metrics.registry.gauge(
+    "summarizer_db_connections", "Database pool connections by state",
+    lambda: {(state,): get_pool_stats()[state] for state in ("in_use", "idle")},
+    ("state",),
+)
+metrics.registry.gauge(
+    "summarizer_db_pool_waiting", "Threads waiting for a database connection",
+    lambda: get_pool_stats()["waiting"],
+)
+
+
+def _threadpool_usage() -> dict:
+    # sync handlers and run_in_threadpool share this limiter; only readable
+    # from the event loop, hence the async endpoint below
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return {("busy",): limiter.borrowed_tokens, ("limit",): limiter.total_tokens}
+
+
+metrics.registry.gauge(
+    "summarizer_threadpool_workers", "Request threadpool workers in use and the limit",
+    _threadpool_usage, ("state",),
+)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+# ------------------------------
+# LIVENESS / READINESS
+# ------------------------------
+@app.get("/health/live")
+def get_liveness():
+    return {"status": "ok"}
 
-#     job = jobs[job_id]
 
-#     response = {
-#         "job_id": job_id,
-#         "status": job["status"],
-#         "links": [{"rel": "self", "href": f"/jobs/{job_id}"}]
-#     }
+@app.get("/health/ready")
+def get_readiness(response: Response):
+    resources = {name: resource.status() for name, resource in lazy.registry.items()}
+    if SUMMARIZATION_MODE == "async":
+        resources["mysql_async"] = async_db.status()
+        required = ["mysql_async", "openai_async"]
+    else:
+        required = ["mysql", "openai"]
 
-#     if job["status"] == "completed":
-#         response["summary"] = job["summary"]
+    ready = all(resources[name]["ready"] for name in required)
+    if not ready:
+        response.status_code = 503
+    return {"ready": ready, "required": required, "resources": resources}
 
-#     if job["status"] == "failed":
-#         response["error"] = job.get("error")
 
-#     return response
+app.include_router(async_router if SUMMARIZATION_MODE == "async" else sync_router)
 
 # -----------------------------------------------------------------------------
 # Root
@@ -532,6 +1134,7 @@ def root():
 # -----------------------------------------------------------------------------
 # Entrypoint for `python main.py`
 # -----------------------------------------------------------------------------
+# development server (auto-reload); production: python -m framework.server
 if __name__ == "__main__":
     import uvicorn
 
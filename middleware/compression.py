@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import gzip
+import os
+from functools import lru_cache
+from time import perf_counter
+from typing import Optional, Tuple
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+
+from middleware.metrics import observe_stage
+from utils.etags import encoded_etag
+
+
+# -----------------------------------------------------------------------------
+# Config
+# -----------------------------------------------------------------------------
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "1") == "1"
+# smaller bodies go out as they are: the saving would not pay for the CPU
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", 5))
+COMPRESSION_ZSTD_LEVEL = int(os.environ.get("COMPRESSION_ZSTD_LEVEL", 3))
+# bodies above this are compressed on a worker thread, off the event loop
+COMPRESSION_OFFLOAD_BYTES = int(os.environ.get("COMPRESSION_OFFLOAD_BYTES", 256 * 1024))
+COMPRESSIBLE_TYPES = tuple(
+    os.environ.get("COMPRESSIBLE_TYPES", "application/json").split(",")
+)
+# streamed as they are produced; never held back or compressed, whatever
+# COMPRESSIBLE_TYPES says
+STREAMED_TYPES = ("text/event-stream", "application/x-ndjson")
+
+
+@lru_cache(maxsize=1)
+def _zstandard():
+    try:
+        import zstandard  # optional; without it only gzip is offered
+    except ImportError:
+        return None
+    return zstandard
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Supported codings, most preferred first."""
+    return ("zstd", "gzip") if _zstandard() is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick a coding from an Accept-Encoding header, or None for identity."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in available_encodings():
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return _zstandard().ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compress(body)
+    # mtime=0: the same body always compresses to the same bytes
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def _revalidated(headers: MutableHeaders, request_headers: Headers, encoding: Optional[str]):
+    """A 304 repeats the tag of the copy the client holds, which is the
+    compressed one if that is what If-None-Match named."""
+    headers.add_vary_header("Accept-Encoding")
+    if encoding is None or "etag" not in headers:
+        return
+    encoded = encoded_etag(headers["etag"], encoding)
+    if encoded in request_headers.get("if-none-match", ""):
+        headers["ETag"] = encoded
+
+
+def _compressible(start: dict) -> bool:
+    headers = Headers(raw=start.get("headers", []))
+    media_type = headers.get("content-type", "").split(";")[0].strip()
+    return (
+        media_type in COMPRESSIBLE_TYPES
+        and media_type not in STREAMED_TYPES
+        and "content-encoding" not in headers
+    )
+
+
+# -----------------------------------------------------------------------------
+# ASGI middleware
+# -----------------------------------------------------------------------------
+class CompressionMiddleware:
+    """Compress JSON responses with zstd or gzip, as the client accepts.
+
+    Only bodies sent in one piece are compressed (FastAPI's JSON
+    responses). Responses of other types, SSE and NDJSON included, pass
+    through untouched: their start goes out at once, not held until the
+    first body chunk. Compressed responses carry a per-coding strong ETag
+    and ``Vary: Accept-Encoding``.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate(request_headers.get("accept-encoding", ""))
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if message["status"] == 304 or _compressible(message):
+                    start = message  # held until the body shows whether to compress
+                else:
+                    await send(message)
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            held, start = start, None
+            headers = MutableHeaders(raw=held.setdefault("headers", []))
+            if held["status"] == 304:
+                _revalidated(headers, request_headers, encoding)
+                await send(held)
+                await send(message)
+                return
+            body = message.get("body", b"")
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is None or message.get("more_body", False) or len(body) < self.minimum_size:
+                await send(held)
+                await send(message)
+                return
+
+            started = perf_counter()
+            if len(body) > COMPRESSION_OFFLOAD_BYTES:
+                compressed = await anyio.to_thread.run_sync(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            observe_stage("compress", perf_counter() - started)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            if "etag" in headers:
+                headers["ETag"] = encoded_etag(headers["etag"], encoding)
+            await send(held)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
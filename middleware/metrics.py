@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple, Union
+
+
+# -----------------------------------------------------------------------------
+# Config
+# -----------------------------------------------------------------------------
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+# histogram bucket upper bounds, in seconds
+METRICS_BUCKETS = tuple(
+    float(bound)
+    for bound in os.environ.get(
+        "METRICS_BUCKETS", "0.001,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30"
+    ).split(",")
+)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# -----------------------------------------------------------------------------
+# Metric types
+# -----------------------------------------------------------------------------
+class Histogram:
+    """Latency histogram per label set, rendered in the Prometheus text format.
+
+    ``observe`` is a bisect and three additions under a lock, so it is cheap
+    enough for every request and every SQL statement.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=METRICS_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket..., count above the last bucket, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, labels: Tuple[str, ...] = ()):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += seconds
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = [(labels, list(series)) for labels, series in self._series.items()]
+        names = self.labelnames + ("le",)
+        for labels, series in sorted(snapshot):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]!r}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Gauge:
+    """Value read when /metrics is scraped, so nothing is tracked in between.
+
+    ``read`` returns a number, or ``{label values: number}`` when the gauge
+    has labels. With ``kind="counter"`` it exposes a running total that an
+    existing stats object already keeps.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        read: Callable[[], Union[float, Dict[Tuple[str, ...], float]]],
+        labelnames: Sequence[str] = (),
+        kind: str = "gauge",
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+        self._read = read
+
+    def collect(self) -> Iterator[str]:
+        try:
+            value = self._read()
+        except Exception:
+            return  # the source is not up yet (pool not created, ...)
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        values = value if isinstance(value, dict) else {(): value}
+        for labels, number in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(number)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Union[Histogram, Gauge]] = {}
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=METRICS_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, read: Callable, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, read, labelnames))
+
+    def counter(self, name: str, documentation: str, read: Callable, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, read, labelnames, kind="counter"))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+request_latency = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, until the last body chunk is sent",
+    ("method", "route", "status"),
+)
+stage_latency = registry.histogram(
+    "summarizer_stage_duration_seconds",
+    "Time spent in one stage of a request or job (llm, sql_execute, sql_commit, db_acquire, publish, ...)",
+    ("stage",),
+)
+
+_requests_in_flight = 0
+registry.gauge("http_requests_in_flight", "HTTP requests being served", lambda: _requests_in_flight)
+
+
+# -----------------------------------------------------------------------------
+# Stage timers
+# -----------------------------------------------------------------------------
+def observe_stage(name: str, seconds: float):
+    if METRICS_ENABLED:
+        stage_latency.observe(seconds, (name,))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block (sync or async code) as one ``name`` stage."""
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, perf_counter() - started)
+
+
+def _timed(method: Callable, name: str) -> Callable:
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        started = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            stage_latency.observe(perf_counter() - started, (name,))
+
+    return timed
+
+
+def _atimed(method: Callable, name: str) -> Callable:
+    @functools.wraps(method)
+    async def timed(*args, **kwargs):
+        started = perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            stage_latency.observe(perf_counter() - started, (name,))
+
+    return timed
+
+
+def instrument_connection(conn):
+    """Time ``query`` and ``commit`` of one pymysql or aiomysql connection.
+
+    Cursors of every class run their statements through ``conn.query``, so
+    wrapping the two methods on the instance covers every execute and commit
+    without touching the call sites.
+    """
+    if not METRICS_ENABLED or getattr(conn, "_metrics_instrumented", False):
+        return conn
+    for attr, name in (("query", "sql_execute"), ("commit", "sql_commit")):
+        method = getattr(conn, attr, None)
+        if method is not None:
+            wrap = _atimed if inspect.iscoroutinefunction(method) else _timed
+            setattr(conn, attr, wrap(method, name))
+    conn._metrics_instrumented = True
+    return conn
+
+
+# -----------------------------------------------------------------------------
+# ASGI middleware
+# -----------------------------------------------------------------------------
+class MetricsMiddleware:
+    """Record every HTTP request in ``http_request_duration_seconds``.
+
+    Plain ASGI rather than BaseHTTPMiddleware, so streaming responses are
+    not buffered and no extra task is spawned per request. The route label
+    is the matched path template (``/jobs/{job_id}``), never the raw path,
+    which keeps the number of series bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        global _requests_in_flight
+        started = perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        _requests_in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _requests_in_flight -= 1
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_latency.observe(perf_counter() - started, (scope["method"], route, str(status)))
@@ -0,0 +1,5 @@
+-- Content hash of (normalized input_text, model, prompt, temperature, max_tokens)
+-- used by the persistent tier of the summary cache (services/summary_cache.py).
+ALTER TABLE summaries
+    ADD COLUMN input_hash CHAR(64) NULL,
+    ADD INDEX idx_summaries_input_hash (input_hash);
@@ -0,0 +1,13 @@
+-- Durable state for /summarizations/async jobs (services/job_queue.py).
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id      CHAR(36)     NOT NULL PRIMARY KEY,
+    patient_id  VARCHAR(64)  NOT NULL,
+    input_text  MEDIUMTEXT   NOT NULL,
+    model       VARCHAR(64)  NOT NULL,
+    status      VARCHAR(16)  NOT NULL DEFAULT 'pending',
+    summary     TEXT         NULL,
+    error       TEXT         NULL,
+    created_at  TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at  TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_jobs_status_created (status, created_at)
+);
@@ -0,0 +1,4 @@
+-- Keyset pagination for GET /summarizations seeks on (patient_id, id);
+-- unfiltered pages use the primary key.
+ALTER TABLE summaries
+    ADD INDEX idx_summaries_patient_id_id (patient_id, id);
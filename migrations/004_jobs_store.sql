@@ -0,0 +1,9 @@
+-- JOB_STORE=mysql keeps batch jobs in the jobs table too
+-- (services/job_store.py); expired rows are purged by updated_at.
+ALTER TABLE jobs
+    ADD COLUMN kind      VARCHAR(16) NOT NULL DEFAULT 'single' AFTER job_id,
+    ADD COLUMN total     INT         NULL,
+    ADD COLUMN processed INT         NULL,
+    ADD COLUMN failed    INT         NULL,
+    ADD COLUMN results   MEDIUMTEXT  NULL,
+    ADD INDEX idx_jobs_status_updated (status, updated_at);
@@ -0,0 +1,12 @@
+-- Appended transcript segments (POST /summarizations/{id}/segments).
+-- summaries.segment_count doubles as the version for concurrent appends.
+ALTER TABLE summaries
+    ADD COLUMN segment_count INT NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS summary_segments (
+    summarization_id  INT        NOT NULL,
+    seq               INT        NOT NULL,
+    input_text        MEDIUMTEXT NOT NULL,
+    created_at        TIMESTAMP  NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (summarization_id, seq)
+);
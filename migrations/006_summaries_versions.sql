@@ -0,0 +1,35 @@
+-- Strong ETags for GET /summarizations and /summarizations/{id} (utils/etags.py).
+-- summaries.version moves on every update of a row; patient_versions.version
+-- on every insert, update or delete of a patient's rows, so a conditional GET
+-- of a patient's collection is answered from one primary-key lookup.
+-- Triggers keep both current for every write path, bulk inserts and chunked
+-- deletes included. patient_id is never updated, so NEW.patient_id is the
+-- only patient an update touches.
+ALTER TABLE summaries
+    ADD COLUMN version INT UNSIGNED NOT NULL DEFAULT 1;
+
+CREATE TABLE IF NOT EXISTS patient_versions (
+    patient_id  VARCHAR(64)      NOT NULL PRIMARY KEY,
+    version     BIGINT UNSIGNED  NOT NULL
+);
+
+CREATE TRIGGER summaries_row_version BEFORE UPDATE ON summaries FOR EACH ROW
+    SET NEW.version = OLD.version + 1;
+
+CREATE TRIGGER summaries_patient_version_insert AFTER INSERT ON summaries FOR EACH ROW
+    INSERT INTO patient_versions (patient_id, version) VALUES (NEW.patient_id, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+
+CREATE TRIGGER summaries_patient_version_update AFTER UPDATE ON summaries FOR EACH ROW
+    INSERT INTO patient_versions (patient_id, version) VALUES (NEW.patient_id, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+
+CREATE TRIGGER summaries_patient_version_delete AFTER DELETE ON summaries FOR EACH ROW
+    INSERT INTO patient_versions (patient_id, version) VALUES (OLD.patient_id, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+
+-- existing patients; after the triggers, so a write racing the backfill
+-- still moves its patient's version
+INSERT INTO patient_versions (patient_id, version)
+SELECT patient_id, 1 FROM summaries GROUP BY patient_id
+ON DUPLICATE KEY UPDATE version = patient_versions.version + 1;
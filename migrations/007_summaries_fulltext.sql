@@ -0,0 +1,4 @@
+-- GET /summarizations/search (services/search.py, SEARCH_BACKEND=mysql):
+-- natural-language MATCH ... AGAINST over both text columns.
+ALTER TABLE summaries
+    ADD FULLTEXT INDEX ft_summaries_text (input_text, summary);
@@ -1,7 +1,5 @@
 from pydantic import BaseModel, Field
 from typing import Optional
-import pymysql
-from pymysql.cursors import DictCursor
 
 
 # this is what I return to the user
@@ -16,12 +14,6 @@ class Summarization(BaseModel):
     status_message: str = Field(description="Human-readable status message")
     summary: Optional[str] = Field(default=None, description="The summarized version of the text")
 
-item = Summarization(status=200,  status_message="OK",
-                    summary="This is a summary of a long paragraph.",
-                    patient_id=123,
-                    summarization_id=456)
-
-print(item.model_dump())
 # this is used for requests
 # creating a new summarization
 class SummarizationCreate(BaseModel):
@@ -42,4 +34,13 @@ class SummarizationRead(BaseModel):
 class SummarizationUpdate(BaseModel):
     id: int = Field(..., description="Unique identifier for the summarization entry to update")
     summary: str = Field(..., description="The updated summarized text")
-    input_text: str = Field(..., description="input text")
\ No newline at end of file
+    input_text: str = Field(..., description="input text")
+
+# one entry of a POST /summarizations/batch body
+class SummarizationBatchItem(BaseModel):
+    patient_id: str = Field(..., description="ID of the patient associated with the text")
+    input_text: str = Field(..., min_length=1, description="input text")
+
+# appending to a live transcript (POST /summarizations/{id}/segments)
+class SummarizationSegment(BaseModel):
+    input_text: str = Field(..., min_length=1, description="New transcript text to append")
@@ -0,0 +1,744 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from typing import List, Optional
+
+import aiomysql
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket
+from fastapi.responses import StreamingResponse
+
+from framework import async_db
+from framework.async_db import get_async_db
+from framework.server import is_primary_worker
+from models.summarization import SummarizationRead, SummarizationSegment, SummarizationUpdate
+from services import segments
+from services.bulk import (
+    BULK_MAX_JOBS,
+    JobSlots,
+    aprocess_batch,
+    finish_batch_job,
+    new_batch_job,
+    read_items,
+    summary_counts,
+)
+from services.job_queue import (
+    JOB_INTERRUPTED,
+    JOB_SHUTDOWN_TIMEOUT,
+    UPDATE_JOB_SQL,
+    AsyncJobQueue,
+    AsyncJobRepository,
+    QueueFull,
+)
+from services.job_store import JobRecord
+from services.mutations import (
+    DELETE_SUMMARY_SQL,
+    SUMMARY_DELETE_MAX_JOBS,
+    SUMMARY_DELETE_MAX_PENDING_JOBS,
+    UPDATE_PATIENT_SUMMARY_SQL,
+    UPDATE_SUMMARY_SQL,
+    acount_patient_summaries,
+    adelete_patient_summaries,
+    aexecute_item_write,
+    aexecute_write,
+    apatient_exists,
+    delete_job_progress,
+    delete_job_response,
+    new_delete_job,
+)
+from services.jobs import job_response, job_store
+from services.backends import Summary, backend_for_model, get_backend
+from services.notifications import job_hub, open_job_stream, serve_job_socket
+from services.pubsub import events
+from services.read_cache import (
+    ainvalidate_patient,
+    ainvalidate_patient_rows,
+    item_key,
+    item_scopes,
+    list_key,
+    list_scopes,
+    read_cache,
+    set_cache_headers,
+)
+from services.search import (
+    asearch,
+    index_append,
+    index_remove,
+    index_remove_patient,
+    index_update,
+    query_terms,
+    search_next_link,
+    search_page,
+)
+from services.streaming import stream_summary
+from utils.export import EXPORT_FETCH_SIZE, MEDIA_TYPES, csv_header, export_query, format_rows
+from utils.etags import (
+    apatient_version,
+    collection_etag,
+    etag_matches,
+    if_match_check,
+    job_etag,
+    not_modified,
+    set_etag,
+    summary_etag,
+)
+from utils.pagination import keyset_query, next_link, resolve_cursor
+from utils.projection import parse_fields, project, representation, select_columns, variant_params
+from utils.responses import json_response
+
+
+# async def mirror of the summarization routes in main.py, selected with
+# SUMMARIZATION_MODE=async; handlers never block the event loop
+router = APIRouter()
+
+
+@router.get("/summarizations")
+async def get_summarizations(
+    request: Request,
+    response: Response,
+    patient_id: Optional[str] = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor from the previous page's next link"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of summarization_id, patient_id, input_text, summary"),
+    links: str = Query("full", pattern="^(full|compact|none)$"),
+):
+    events.emit("summarizations.listed", patient_id=patient_id, limit=limit, offset=offset)
+
+    try:
+        after_id = resolve_cursor(cursor, patient_id, offset)
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    variant = representation(selected, links)
+
+    lookup = await read_cache.aget(list_key(patient_id, cursor, limit, offset, variant), list_scopes(patient_id))
+    if lookup.hit:
+        page, next_href, etag = lookup.value
+    else:
+        async with async_db.checkout() as conn:
+            # version before rows: the tag is never newer than the page
+            version = await apatient_version(conn, patient_id) if patient_id else None
+            etag = collection_etag(patient_id, version, cursor, limit, offset, variant) if version else None
+            if etag_matches(request, etag):
+                set_cache_headers(response, lookup)
+                return not_modified(etag, response)
+
+            async with conn.cursor() as db_cursor:
+                sql, params = keyset_query(select_columns(selected), patient_id, after_id, limit, offset)
+                await db_cursor.execute(sql, params)
+                rows = await db_cursor.fetchall()
+
+        page = [project(row, selected, links, "/summarizations") for row in rows]
+        next_href = next_link("/summarizations", patient_id, rows, limit, variant_params(fields, links)) if rows else None
+        await read_cache.aput(lookup, (page, next_href, etag))
+    set_cache_headers(response, lookup)
+
+    if not page:
+        if cursor is not None:
+            return json_response([], response)
+        raise HTTPException(status_code=404, detail="No summarizations found")
+
+    if next_href:
+        response.headers["Link"] = f'<{next_href}>; rel="next"'
+    if etag_matches(request, etag):
+        return not_modified(etag, response)
+    set_etag(response, etag)
+
+    return json_response(page, response)
+
+
+@router.get("/summarizations/export")
+async def export_summarizations(
+    request: Request,
+    patient_id: Optional[List[str]] = Query(None, description="Repeat to export several patients"),
+    min_id: Optional[int] = Query(None, ge=0),
+    max_id: Optional[int] = Query(None, ge=0),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+):
+    sql, params = export_query(patient_id, min_id, max_id)
+
+    pool = await async_db.get_pool()
+    try:
+        conn = await asyncio.wait_for(pool.acquire(), timeout=async_db.DB_POOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="no database connection available", headers={"Retry-After": "1"})
+
+    db_cursor = await conn.cursor(aiomysql.SSDictCursor)
+    try:
+        await db_cursor.execute(sql, params)
+    except Exception:
+        conn.close()
+        pool.release(conn)
+        raise
+
+    async def stream():
+        finished = False
+        try:
+            if format == "csv":
+                yield csv_header()
+            while not await request.is_disconnected():
+                rows = await db_cursor.fetchmany(EXPORT_FETCH_SIZE)
+                if not rows:
+                    finished = True
+                    break
+                yield format_rows(rows, format)
+        finally:
+            if finished:
+                await db_cursor.close()
+                await async_db.release(pool, conn)
+            else:
+                # an unread unbuffered result leaves the connection unusable
+                conn.close()
+                pool.release(conn)
+
+    return StreamingResponse(stream(), media_type=MEDIA_TYPES[format])
+
+
+@router.get("/summarizations/search")
+async def search_summarizations(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    patient_id: Optional[str] = Query(None),
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+):
+    events.emit("summarizations.searched", patient_id=patient_id, limit=limit, offset=offset)
+
+    terms = query_terms(q)
+    async with async_db.checkout() as conn:
+        hits = await asearch(conn, terms, patient_id, limit, offset)
+
+    if len(hits) > limit:
+        response.headers["Link"] = f'<{search_next_link(q, patient_id, limit, offset)}>; rel="next"'
+    return json_response(search_page(hits, terms, limit), response)
+
+
+# after /summarizations/export and /summarizations/search, which this path
+# would otherwise shadow
+@router.get("/summarizations/{summarization_id}", response_model=dict)
+async def get_summarization(
+    request: Request,
+    response: Response,
+    summarization_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of summarization_id, patient_id, input_text, summary"),
+    links: str = Query("full", pattern="^(full|compact|none)$"),
+):
+    try:
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    variant = representation(selected, links)
+    lookup = await read_cache.aget(item_key(summarization_id, variant), item_scopes(summarization_id))
+    if lookup.hit:
+        item, etag = lookup.value
+    else:
+        async with async_db.checkout() as conn, conn.cursor() as cursor:
+            await cursor.execute(
+                f"SELECT {select_columns(selected, 'patient_id', 'version')} FROM summaries WHERE id = %s",
+                (summarization_id,)
+            )
+            row = await cursor.fetchone()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Summarization not found")
+        etag = summary_etag(row["id"], row["version"], variant)
+        if etag_matches(request, etag):
+            set_cache_headers(response, lookup)
+            return not_modified(etag, response)
+        item = project(row, selected, links, f"/summarizations?patient_id={row['patient_id']}")
+        await read_cache.aput(lookup, (item, etag))
+    set_cache_headers(response, lookup)
+    if etag_matches(request, etag):
+        return not_modified(etag, response)
+    set_etag(response, etag)
+    return json_response(item, response)
+
+
+async def save_summarization(patient_id: str, input_text: str, summary: Summary) -> dict:
+    # borrow a connection only for the insert, not for the LLM call
+    async with (await async_db.get_pool()).acquire() as conn:
+        async with conn.cursor() as cursor:
+            sql = """
+            INSERT INTO summaries (patient_id, input_text, summary, input_hash)
+            VALUES (%s, %s, %s, %s)
+            """
+            await cursor.execute(sql, (patient_id, input_text, summary.text, summary.key))
+            new_id = cursor.lastrowid
+        await conn.commit()
+    await ainvalidate_patient(patient_id)
+
+    events.emit("summarization.created", summarization_id=new_id, patient_id=patient_id)
+
+    return {
+        "summarization_id": new_id,
+        "input_text": input_text,
+        "summary": summary.text,
+        "backend": summary.backend,
+        "patient_id": patient_id,
+        "links": [
+            {"rel": "self", "href": f"/summarizations/{patient_id}"},
+            {"rel": "collection", "href": "/summarizations"},
+            {"rel": "update", "href": f"/summarizations/{patient_id}"},
+            {"rel": "delete", "href": f"/summarizations/{patient_id}"}
+        ]
+    }
+
+
+@router.post("/summarizations", response_model=dict, status_code=201)
+async def create_summarization(
+    request: Request,
+    patient_id: str,
+    input_text: str,
+    stream: bool = Query(False, description="Stream the summary as Server-Sent Events while it is generated"),
+    backend: Optional[str] = Query(None, description="Summarization backend: llm or extractive (default: SUMMARY_BACKEND)"),
+):
+    summarizer = get_backend(backend)
+    if stream:
+        started = time.perf_counter()
+        summary_stream = summarizer.astream(input_text)
+        return StreamingResponse(
+            stream_summary(
+                request,
+                summary_stream,
+                lambda text: save_summarization(
+                    patient_id, input_text, Summary(text, summary_stream.backend, summary_stream.key)
+                ),
+                started,
+            ),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    return await save_summarization(patient_id, input_text, await summarizer.asummarize(input_text))
+
+
+@router.post("/summarizations/batch")
+async def create_summarizations_batch(request: Request, backend: Optional[str] = Query(None)):
+    summarizer = get_backend(backend)
+    items = await read_items(request)
+    results = await aprocess_batch(items, summarizer.asummarize, await async_db.get_pool())
+
+    events.emit("summarizations.batch_created", **summary_counts(results))
+
+    return {
+        "counts": summary_counts(results),
+        "results": results,
+        "links": [{"rel": "collection", "href": "/summarizations"}]
+    }
+
+
+_batch_tasks = set()
+# accepted and unfinished jobs are capped (429 past it); BULK_MAX_JOBS of them run
+batch_slots = JobSlots()
+_batch_running = asyncio.Semaphore(BULK_MAX_JOBS)
+
+
+async def run_batch_job(job_id: str, items: list, on_done, summarizer):
+    try:
+        async with _batch_running:
+            job_store.update(job_id, status="processing")
+            await publish_job(job_id)
+            results = await aprocess_batch(items, summarizer.asummarize, await async_db.get_pool(), on_done=on_done)
+        finish_batch_job(job_store, job_id, results)
+        await publish_job(job_id)
+        events.emit("job.completed", job_id=job_id, kind="batch", **summary_counts(results))
+    except asyncio.CancelledError:
+        await fail_job(job_id, JOB_INTERRUPTED)
+        raise
+    except Exception as e:
+        await fail_job(job_id, str(e))
+    finally:
+        batch_slots.release()
+
+
+@router.post("/summarizations/batch/async", status_code=202)
+async def create_summarizations_batch_async(request: Request, backend: Optional[str] = Query(None)):
+    summarizer = get_backend(backend)
+    # before the body is read, so a full service does not parse it for nothing
+    batch_slots.acquire()
+    try:
+        items = await read_items(request)
+        job_id = str(uuid.uuid4())
+        on_done = new_batch_job(job_id, items, job_store)
+        await publish_job(job_id)
+        task = asyncio.create_task(run_batch_job(job_id, items, on_done, summarizer))
+    except BaseException:
+        batch_slots.release()
+        raise
+    _batch_tasks.add(task)
+    task.add_done_callback(_batch_tasks.discard)
+
+    return {
+        "job_id": job_id,
+        "status": "pending",
+        "total": len(items),
+        "links": [
+            {"rel": "status", "href": f"/jobs/{job_id}"},
+            {"rel": "collection", "href": "/summarizations"}
+        ]
+    }
+
+
+@router.put(
+    "/patients/{patient_id}/summarizations/{summarization_id}",
+    response_model=dict
+)
+async def update_summarization(
+    patient_id: str,
+    summarization_id: int,
+    summary: str,
+    conn=Depends(get_async_db)
+):
+    if not await aexecute_write(conn, UPDATE_PATIENT_SUMMARY_SQL, (summary, summarization_id, patient_id)):
+        raise HTTPException(
+            status_code=404,
+            detail="Summarization not found for this patient"
+        )
+    await ainvalidate_patient(patient_id, summarization_id)
+    index_update(summarization_id, summary=summary)
+
+    events.emit("summarization.updated", summarization_id=summarization_id, patient_id=patient_id)
+
+    return {
+        "summarization_id": summarization_id,
+        "patient_id": patient_id,
+        "summary": summary,
+        "links": [
+            {
+                "rel": "self",
+                "href": f"/patients/{patient_id}/summarizations/{summarization_id}"
+            },
+            {
+                "rel": "collection",
+                "href": f"/summarizations?patient_id={patient_id}"
+            },
+            {
+                "rel": "update",
+                "href": f"/patients/{patient_id}/summarizations/{summarization_id}"
+            },
+            {
+                "rel": "delete",
+                "href": f"/patients/{patient_id}/summarizations/{summarization_id}"
+            }
+        ]
+    }
+
+
+@router.delete("/summarizations/{summarization_id}", response_model=dict)
+async def delete_summarization(request: Request, summarization_id: int, conn=Depends(get_async_db)):
+    check = if_match_check(request, summarization_id)
+    patient_id = await aexecute_item_write(conn, DELETE_SUMMARY_SQL, (summarization_id,), summarization_id, check)
+    if patient_id is None:
+        raise HTTPException(status_code=404, detail="Summarization not found")
+    await ainvalidate_patient(patient_id, summarization_id)
+    index_remove(summarization_id)
+
+    events.emit("summarization.deleted", summarization_id=summarization_id)
+
+    return {
+        "message": f"Summarization {summarization_id} deleted",
+        "links": [
+            {"rel": "collection", "href": "/summarizations"}
+        ]
+    }
+
+
+_delete_tasks = set()
+# accepted and unfinished deletes are capped (429 past it); SUMMARY_DELETE_MAX_JOBS of them run
+delete_slots = JobSlots(SUMMARY_DELETE_MAX_PENDING_JOBS, kind="delete")
+_delete_running = asyncio.Semaphore(SUMMARY_DELETE_MAX_JOBS)
+
+
+async def run_delete_job(job_id: str, patient_id: str):
+    try:
+        async with _delete_running, (await async_db.get_pool()).acquire() as conn:
+            job_store.update(job_id, status="processing", total=await acount_patient_summaries(conn, patient_id))
+            await publish_job(job_id)
+            on_chunk = delete_job_progress(job_id, job_store, job_hub.notify)
+            count = await adelete_patient_summaries(conn, patient_id, on_chunk=on_chunk)
+        await ainvalidate_patient_rows(patient_id)
+        index_remove_patient(patient_id)
+        job_store.update(job_id, status="completed")
+        await publish_job(job_id)
+        events.emit("summarizations.deleted", patient_id=patient_id, deleted_count=count)
+        events.emit("job.completed", job_id=job_id, kind="delete", patient_id=patient_id, deleted_count=count)
+    except asyncio.CancelledError:
+        await fail_job(job_id, JOB_INTERRUPTED)
+        raise
+    except Exception as e:
+        await fail_job(job_id, str(e))
+    finally:
+        delete_slots.release()
+
+
+@router.delete("/summarizations/patient/{patient_id}", response_model=dict)
+async def delete_summaries_by_patient(
+    response: Response,
+    patient_id: str,
+    run_async: bool = Query(False, alias="async", description="Delete in the background; progress via /jobs/{job_id}"),
+    conn=Depends(get_async_db),
+):
+    if run_async:
+        if not await apatient_exists(conn, patient_id):
+            raise HTTPException(status_code=404, detail="No summaries found for this patient")
+        delete_slots.acquire()
+        try:
+            job_id = str(uuid.uuid4())
+            new_delete_job(job_id, patient_id, job_store)
+            await publish_job(job_id)
+            task = asyncio.create_task(run_delete_job(job_id, patient_id))
+        except BaseException:
+            delete_slots.release()
+            raise
+        _delete_tasks.add(task)
+        task.add_done_callback(_delete_tasks.discard)
+        response.status_code = 202
+        return delete_job_response(job_id, patient_id)
+
+    count = await adelete_patient_summaries(conn, patient_id)
+    await ainvalidate_patient_rows(patient_id)
+    index_remove_patient(patient_id)
+    if count == 0:
+        raise HTTPException(
+            status_code=404,
+            detail="No summaries found for this patient"
+        )
+
+    events.emit("summarizations.deleted", patient_id=patient_id, deleted_count=count)
+
+    return {
+        "patient_id": patient_id,
+        "deleted_count": count,
+        "links": [
+            {"rel": "collection", "href": "/summarizations"}
+        ]
+    }
+
+
+@router.put("/summarizations/{summarization_id}", response_model=SummarizationRead)
+async def update_summarization_by_id(
+    request: Request,
+    summarization_id: int,
+    summarization: SummarizationUpdate,
+    conn=Depends(get_async_db)
+):
+    params = (summarization.input_text, summarization.summary, summarization_id)
+    check = if_match_check(request, summarization_id)
+    patient_id = await aexecute_item_write(conn, UPDATE_SUMMARY_SQL, params, summarization_id, check)
+    if patient_id is None:
+        raise HTTPException(status_code=404, detail="Summarization not found")
+    await ainvalidate_patient(patient_id, summarization_id)
+    index_update(summarization_id, input_text=summarization.input_text, summary=summarization.summary)
+
+    events.emit("summarization.updated", summarization_id=summarization_id)
+
+    return SummarizationRead(
+        summarization_id=summarization_id,
+        summary=summarization.summary
+    )
+
+
+@router.post("/summarizations/{summarization_id}/segments", response_model=dict)
+async def append_summarization_segment(
+    summarization_id: int,
+    segment: SummarizationSegment,
+    backend: Optional[str] = Query(None),
+):
+    summarizer = get_backend(backend)
+    row = await segments.aget_state(await async_db.get_pool(), summarization_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Summarization not found")
+
+    if row["summary"]:
+        summary = await summarizer.aupdate(row["summary"], segment.input_text)
+    else:
+        summary = await summarizer.asummarize(segment.input_text)
+
+    await segments.aappend_segment(await async_db.get_pool(), row, segment.input_text, summary.text)
+    await ainvalidate_patient(row["patient_id"], summarization_id)
+    index_append(summarization_id, segment.input_text, summary.text)
+    events.emit("summarization.appended", summarization_id=summarization_id, segment=row["segment_count"] + 1)
+
+    return segments.segment_response(row, summary)
+
+
+# ---- BACKGROUND WORKER ----
+job_repository = AsyncJobRepository(async_db.get_pool)
+
+
+async def find_job(job_id: str) -> Optional[JobRecord]:
+    # job_store is always the in-memory one here (see main.py)
+    record = job_store.get(job_id)
+    if record is None:
+        row = await job_repository.get(job_id)
+        record = JobRecord.from_row(row) if row is not None else None
+    return record
+
+
+async def _set_job_status(
+    job_id: str, status: str, summary: Optional[str] = None, error: Optional[str] = None, mirror: bool = True
+):
+    record = job_store.update(job_id, status=status, summary=summary, error=error)
+    job_hub.notify(job_id, record)
+    if mirror:
+        await job_repository.update(job_id, status, summary=summary, error=error)
+
+
+async def publish_job(job_id: str):
+    """A batch or delete job changed state: push it to this worker's listeners
+    and save it to the jobs table, where the other workers find it."""
+    record = job_store.get(job_id)
+    job_hub.notify(job_id, record)
+    if record is not None:
+        await job_repository.save(record)
+
+
+async def fail_job(job_id: str, error: str):
+    job_store.update(job_id, status="failed", error=error)
+    try:
+        await publish_job(job_id)
+    except Exception:
+        pass
+
+
+async def run_summarization_job(job_id: str):
+    record = await find_job(job_id)
+    if record is None:
+        return  # deleted or expired while queued
+    patient_id, input_text = record.patient_id, record.input_text
+    try:
+        await _set_job_status(job_id, "processing")
+
+        summary = await backend_for_model(record.model).asummarize_clinical(input_text)
+
+        async with (await async_db.get_pool()).acquire() as conn:
+            async with conn.cursor() as cursor:
+                sql = """
+                    INSERT INTO summaries (patient_id, input_text, summary, input_hash)
+                    VALUES (%s, %s, %s, %s)
+                """
+                await cursor.execute(
+                    sql,
+                    (patient_id, input_text, summary.text, summary.key)
+                )
+                # the job row completes in the same transaction, so a job recovered
+                # after a crash never inserts its summary a second time
+                await cursor.execute(UPDATE_JOB_SQL, ("completed", summary.text, None, job_id))
+            await conn.commit()
+        await ainvalidate_patient(patient_id)
+
+        await _set_job_status(job_id, "completed", summary=summary.text, mirror=False)
+        events.emit("job.completed", job_id=job_id, patient_id=patient_id)
+
+    except Exception as e:
+        events.emit("job.failed", job_id=job_id, patient_id=patient_id, error=str(e))
+        try:
+            await _set_job_status(job_id, "failed", error=str(e))
+        except Exception:
+            pass
+        raise
+
+
+job_queue = AsyncJobQueue(run_summarization_job)
+
+
+_recovery_task = None
+
+
+async def recover_jobs():
+    # re-queue work that was pending or in flight when the last process died
+    if not is_primary_worker():
+        return  # the launcher's other workers would queue the same jobs again
+    try:
+        unfinished = await job_repository.unfinished()
+    except Exception:
+        return  # database not reachable yet; jobs stay pending in the table
+    for row in unfinished:
+        job_store.add(JobRecord.from_row(row, status="pending"))
+    for row in unfinished:
+        await job_queue.submit_wait(row["job_id"], row["model"])
+
+
+async def start_jobs():
+    global _recovery_task
+    job_queue.start()
+    # off the startup path, so the app serves before the database is reached
+    _recovery_task = asyncio.create_task(recover_jobs())
+
+
+async def stop_jobs():
+    # running jobs get JOB_SHUTDOWN_TIMEOUT in all; queued single jobs are
+    # recovered on the next start, batch and delete jobs are not, so those
+    # still running then are cancelled and marked failed
+    deadline = time.monotonic() + JOB_SHUTDOWN_TIMEOUT
+    await job_queue.stop(JOB_SHUTDOWN_TIMEOUT)
+    background = _batch_tasks | _delete_tasks
+    if background:
+        _, still_running = await asyncio.wait(background, timeout=max(0.0, deadline - time.monotonic()))
+        for task in still_running:
+            task.cancel()
+        await asyncio.gather(*still_running, return_exceptions=True)
+
+
+def _queue_full(retry_after: int):
+    return HTTPException(
+        status_code=429,
+        detail="Too many pending summarization jobs",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+@router.post("/summarizations/async", status_code=202)
+async def create_async_summarization(patient_id: str, input_text: str, backend: Optional[str] = Query(None)):
+    model = get_backend(backend).model
+    if job_queue.full():
+        raise _queue_full(job_queue.retry_after())
+
+    job_id = str(uuid.uuid4())
+
+    job_store.add(JobRecord(job_id, patient_id=patient_id, input_text=input_text, model=model))
+    await job_repository.create(job_id, patient_id, input_text, model)
+
+    try:
+        job_queue.submit(job_id, model)
+    except QueueFull as e:
+        job_store.delete(job_id)
+        await job_repository.delete(job_id)
+        raise _queue_full(e.retry_after)
+
+    return {
+        "job_id": job_id,
+        "status": "pending",
+        "links": [
+            {"rel": "status", "href": f"/jobs/{job_id}"},
+            {"rel": "collection", "href": "/summarizations"}
+        ]
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(request: Request, response: Response, job_id: str):
+    record = await find_job(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    etag = job_etag(record)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return job_response(record)
+
+
+async def _lookup_job(job_id: str) -> Optional[dict]:
+    record = await find_job(job_id)
+    return job_response(record) if record is not None else None
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(request: Request, job_id: str):
+    return await open_job_stream(request, job_id, _lookup_job)
+
+
+@router.websocket("/jobs/events")
+async def job_events_socket(websocket: WebSocket, job_id: List[str] = Query([])):
+    await serve_job_socket(websocket, _lookup_job, job_id)
@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import abc
+import os
+import threading
+from typing import AsyncIterator, Dict, Iterator, NamedTuple, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from services import llm
+from services.extractive import EXTRACTIVE_SENTENCES, extract_summary
+from services.resilience import LLMUnavailable, is_retryable
+from services.summary_cache import cache_key
+
+
+# backend used when a request does not pick one (?backend=...)
+SUMMARY_BACKEND = os.environ.get("SUMMARY_BACKEND", "llm").lower()
+# answer with this backend when the LLM is rate limited, times out or is
+# unreachable or its circuit breaker is open ("" = 503 instead)
+SUMMARY_FALLBACK = os.environ.get("SUMMARY_FALLBACK", "").lower()
+
+
+class Summary(NamedTuple):
+    text: str
+    backend: str
+    key: Optional[str]  # stored in summaries.input_hash
+
+
+class SummaryStream:
+    """Summary text as it is produced.
+
+    ``backend`` and ``key`` can change while iterating (a fallback taking
+    over), so read them once the stream is exhausted.
+    """
+
+    def __init__(self, backend: str, key: Optional[str], parts: Optional[Iterator[str]] = None):
+        self.backend = backend
+        self.key = key
+        self.parts = parts
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        return next(self.parts)
+
+    def close(self):
+        self.parts.close()
+
+
+class AsyncSummaryStream(SummaryStream):
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        return await self.parts.__anext__()
+
+    async def aclose(self):
+        await self.parts.aclose()
+
+
+class SummarizerBackend(abc.ABC):
+    """How transcripts become summaries.
+
+    ``summarize`` is the layperson summary (POST /summarizations, batches),
+    ``summarize_clinical`` the physician summary (async jobs) and ``update``
+    folds an appended segment into an existing summary. ``model`` is what
+    jobs record in jobs.model, so a recovered job runs on the same backend.
+    """
+
+    name = ""
+    model = ""
+
+    @abc.abstractmethod
+    def summarize(self, text: str) -> Summary:
+        ...
+
+    @abc.abstractmethod
+    def summarize_clinical(self, text: str) -> Summary:
+        ...
+
+    @abc.abstractmethod
+    def update(self, summary: str, segment: str) -> Summary:
+        ...
+
+    @abc.abstractmethod
+    def stream(self, text: str) -> SummaryStream:
+        ...
+
+    @abc.abstractmethod
+    async def asummarize(self, text: str) -> Summary:
+        ...
+
+    @abc.abstractmethod
+    async def asummarize_clinical(self, text: str) -> Summary:
+        ...
+
+    @abc.abstractmethod
+    async def aupdate(self, summary: str, segment: str) -> Summary:
+        ...
+
+    @abc.abstractmethod
+    def astream(self, text: str) -> AsyncSummaryStream:
+        ...
+
+    def stats(self) -> dict:
+        return {"name": self.name, "model": self.model}
+
+
+class LLMBackend(SummarizerBackend):
+    """OpenAI chat completions (services/llm.py), with its caches and batching."""
+
+    name = "llm"
+
+    @property
+    def model(self) -> str:
+        return llm.OPENAI_MODEL
+
+    def summarize(self, text: str) -> Summary:
+        return Summary(llm.generate_medical_summary(text), self.name, llm.medical_cache_key(text))
+
+    def summarize_clinical(self, text: str) -> Summary:
+        return Summary(llm.generate_clinical_summary_batched(text), self.name, llm.clinical_cache_key(text))
+
+    def update(self, summary: str, segment: str) -> Summary:
+        return Summary(llm.update_medical_summary(summary, segment), self.name, None)
+
+    def stream(self, text: str) -> SummaryStream:
+        return SummaryStream(self.name, llm.medical_cache_key(text), llm.stream_medical_summary(text))
+
+    async def asummarize(self, text: str) -> Summary:
+        return Summary(await llm.agenerate_medical_summary(text), self.name, llm.medical_cache_key(text))
+
+    async def asummarize_clinical(self, text: str) -> Summary:
+        return Summary(await llm.agenerate_clinical_summary_batched(text), self.name, llm.clinical_cache_key(text))
+
+    async def aupdate(self, summary: str, segment: str) -> Summary:
+        return Summary(await llm.aupdate_medical_summary(summary, segment), self.name, None)
+
+    def astream(self, text: str) -> AsyncSummaryStream:
+        return AsyncSummaryStream(self.name, llm.medical_cache_key(text), llm.astream_medical_summary(text))
+
+
+class ExtractiveBackend(SummarizerBackend):
+    """Local TextRank over TF-IDF sentence vectors (services/extractive.py).
+
+    CPU only and deterministic: no network, no cost, same input same
+    output, so it also suits load tests. The same sentences serve both
+    audiences.
+    """
+
+    name = "extractive"
+    model = "extractive"
+
+    def __init__(self, sentences: int = EXTRACTIVE_SENTENCES):
+        self.sentences = sentences
+
+    def key(self, text: str) -> str:
+        return cache_key(text, self.model, "textrank", 0.0, self.sentences)
+
+    def summarize(self, text: str) -> Summary:
+        return Summary(" ".join(extract_summary(text, self.sentences)), self.name, self.key(text))
+
+    summarize_clinical = summarize
+
+    def update(self, summary: str, segment: str) -> Summary:
+        # the current summary's sentences compete with the new segment's
+        return Summary(" ".join(extract_summary(summary + "\n" + segment, self.sentences)), self.name, None)
+
+    def _parts(self, text: str) -> Iterator[str]:
+        for i, sentence in enumerate(extract_summary(text, self.sentences)):
+            yield sentence if i == 0 else " " + sentence
+
+    def stream(self, text: str) -> SummaryStream:
+        return SummaryStream(self.name, self.key(text), self._parts(text))
+
+    # ranking is CPU work; keep it off the event loop
+    async def asummarize(self, text: str) -> Summary:
+        return await run_in_threadpool(self.summarize, text)
+
+    asummarize_clinical = asummarize
+
+    async def aupdate(self, summary: str, segment: str) -> Summary:
+        return await run_in_threadpool(self.update, summary, segment)
+
+    async def _aparts(self, text: str) -> AsyncIterator[str]:
+        for part in await run_in_threadpool(lambda: list(self._parts(text))):
+            yield part
+
+    def astream(self, text: str) -> AsyncSummaryStream:
+        return AsyncSummaryStream(self.name, self.key(text), self._aparts(text))
+
+    def stats(self) -> dict:
+        return dict(super().stats(), sentences=self.sentences)
+
+
+def is_transient(exc: Exception) -> bool:
+    """Rate limited, timed out, unreachable, a 5xx or the breaker open:
+    worth answering another way."""
+    return isinstance(exc, LLMUnavailable) or is_retryable(exc)
+
+
+class FallbackBackend(SummarizerBackend):
+    """``primary``, or ``fallback`` when ``primary`` fails with a transient error.
+
+    A stream only falls back before its first token; after that the error
+    is the client's to see.
+    """
+
+    def __init__(self, primary: SummarizerBackend, fallback: SummarizerBackend):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = primary.name
+        self._lock = threading.Lock()
+        self.fallbacks: Dict[str, int] = {}
+
+    @property
+    def model(self) -> str:
+        return self.primary.model
+
+    def _fell_back(self, exc: Exception):
+        with self._lock:
+            reason = type(exc).__name__
+            self.fallbacks[reason] = self.fallbacks.get(reason, 0) + 1
+
+    def _call(self, method: str, *args):
+        try:
+            return getattr(self.primary, method)(*args)
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            self._fell_back(e)
+        return getattr(self.fallback, method)(*args)
+
+    async def _acall(self, method: str, *args):
+        try:
+            return await getattr(self.primary, method)(*args)
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            self._fell_back(e)
+        return await getattr(self.fallback, method)(*args)
+
+    def summarize(self, text: str) -> Summary:
+        return self._call("summarize", text)
+
+    def summarize_clinical(self, text: str) -> Summary:
+        return self._call("summarize_clinical", text)
+
+    def update(self, summary: str, segment: str) -> Summary:
+        return self._call("update", summary, segment)
+
+    async def asummarize(self, text: str) -> Summary:
+        return await self._acall("asummarize", text)
+
+    async def asummarize_clinical(self, text: str) -> Summary:
+        return await self._acall("asummarize_clinical", text)
+
+    async def aupdate(self, summary: str, segment: str) -> Summary:
+        return await self._acall("aupdate", summary, segment)
+
+    def stream(self, text: str) -> SummaryStream:
+        primary = self.primary.stream(text)
+        result = SummaryStream(primary.backend, primary.key)
+
+        def parts() -> Iterator[str]:
+            started = False
+            try:
+                for part in primary:
+                    started = True
+                    yield part
+                return
+            except Exception as e:
+                if started or not is_transient(e):
+                    raise
+                self._fell_back(e)
+            finally:
+                primary.close()
+            fallback = self.fallback.stream(text)
+            result.backend, result.key = fallback.backend, fallback.key
+            yield from fallback
+
+        result.parts = parts()
+        return result
+
+    def astream(self, text: str) -> AsyncSummaryStream:
+        primary = self.primary.astream(text)
+        result = AsyncSummaryStream(primary.backend, primary.key)
+
+        async def parts() -> AsyncIterator[str]:
+            started = False
+            try:
+                async for part in primary:
+                    started = True
+                    yield part
+                return
+            except Exception as e:
+                if started or not is_transient(e):
+                    raise
+                self._fell_back(e)
+            finally:
+                await primary.aclose()
+            fallback = self.fallback.astream(text)
+            result.backend, result.key = fallback.backend, fallback.key
+            async for part in fallback:
+                yield part
+
+        result.parts = parts()
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            fallbacks = dict(self.fallbacks)
+        return dict(self.primary.stats(), fallback=self.fallback.name, fallbacks=fallbacks)
+
+
+# -----------------------------------------------------------------------------
+# Registry
+# -----------------------------------------------------------------------------
+def _make_backends() -> Dict[str, SummarizerBackend]:
+    backends: Dict[str, SummarizerBackend] = {"llm": LLMBackend(), "extractive": ExtractiveBackend()}
+    for name in (SUMMARY_BACKEND, SUMMARY_FALLBACK):
+        if name and name not in backends:
+            raise ValueError(f"unknown summarization backend {name!r}; expected one of {sorted(backends)}")
+    if SUMMARY_FALLBACK and SUMMARY_FALLBACK != "llm":
+        backends["llm"] = FallbackBackend(backends["llm"], backends[SUMMARY_FALLBACK])
+    return backends
+
+
+backends = _make_backends()
+
+
+def get_backend(name: Optional[str] = None) -> SummarizerBackend:
+    """The backend a request asked for (400 if unknown), else the default."""
+    backend = backends.get((name or SUMMARY_BACKEND).lower())
+    if backend is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown summarization backend {name!r}; expected one of {sorted(backends)}",
+        )
+    return backend
+
+
+def backend_for_model(model: Optional[str]) -> SummarizerBackend:
+    # jobs store the backend's model; anything else was an LLM model name
+    for backend in backends.values():
+        if backend.name != "llm" and backend.model == model:
+            return backend
+    return backends["llm"]
+
+
+def backend_stats() -> dict:
+    return {
+        "default": SUMMARY_BACKEND,
+        "fallback": SUMMARY_FALLBACK or None,
+        "backends": [backend.stats() for backend in backends.values()],
+    }
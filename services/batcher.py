@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+
+# a window of 0 disables batching (each job calls the LLM directly)
+BATCH_WINDOW_MS = float(os.environ.get("BATCH_WINDOW_MS", 0))
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 16))
+BATCH_MAX_IN_FLIGHT = int(os.environ.get("BATCH_MAX_IN_FLIGHT", 4))
+
+
+class MicroBatcher:
+    """Gathers items submitted from many threads (or event loops, through
+    ``asyncio.wrap_future``) into batches.
+
+    A batch is closed when it reaches ``max_size`` items or ``window_ms``
+    after its first item arrived, then handed to ``submit_batch(items)``,
+    which must return one result (or Exception) per item, in order. Each
+    caller gets its own Future back. Up to ``max_in_flight`` batches are
+    dispatched concurrently.
+    """
+
+    def __init__(
+        self,
+        submit_batch: Callable[[List], Sequence],
+        window_ms: float = BATCH_WINDOW_MS,
+        max_size: int = BATCH_MAX_SIZE,
+        max_in_flight: int = BATCH_MAX_IN_FLIGHT,
+        name: str = "batcher",
+    ):
+        self._submit_batch = submit_batch
+        self.window = window_ms / 1000.0
+        self.max_size = max_size
+        self.max_in_flight = max_in_flight
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._in_flight = threading.Semaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._started = False
+
+        # stats
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._first_dispatch: Optional[float] = None
+        self._last_done: Optional[float] = None
+
+    def start(self):
+        with self._lock:
+            if not self._started:
+                self._thread.start()
+                self._started = True
+
+    def submit(self, item) -> Future:
+        self.start()
+        future: Future = Future()
+        self._queue.put((item, future, time.monotonic()))
+        return future
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # don't start a new window until a dispatch slot is free, so
+            # items keep accumulating into full batches under load
+            self._in_flight.acquire()
+            batch = self._collect()
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: list):
+        try:
+            self._process(batch)
+        finally:
+            self._in_flight.release()
+
+    def _process(self, batch: list):
+        dispatched = time.monotonic()
+        # items whose caller gave up (an awaiting task was cancelled) are not
+        # sent; the rest can no longer be cancelled, only resolved
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        items = [item for item, _, _ in batch]
+
+        try:
+            results = list(self._submit_batch(items))
+            if len(results) != len(items):
+                raise RuntimeError(
+                    "batch returned %d results for %d items" % (len(results), len(items))
+                )
+        except Exception as e:
+            results = [e] * len(items)
+
+        errors = 0
+        for (_, future, _), result in zip(batch, results):
+            if isinstance(result, Exception):
+                errors += 1
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        done = time.monotonic()
+        with self._lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._errors += errors
+            for _, _, submitted in batch:
+                # time spent waiting for the window to close
+                waited = dispatched - submitted
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            if self._first_dispatch is None:
+                self._first_dispatch = dispatched
+            self._last_done = done
+
+    def stats(self) -> dict:
+        with self._lock:
+            elapsed = (
+                (self._last_done - self._first_dispatch)
+                if self._first_dispatch is not None and self._last_done is not None
+                else 0.0
+            )
+            return {
+                "window_ms": self.window * 1000,
+                "max_size": self.max_size,
+                "max_in_flight": self.max_in_flight,
+                "pending": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "errors": self._errors,
+                "avg_batch_size": (self._items / self._batches) if self._batches else 0.0,
+                "avg_added_latency_ms": (self._wait_total / self._items * 1000) if self._items else 0.0,
+                "max_added_latency_ms": self._wait_max * 1000,
+                "throughput_per_second": (self._items / elapsed) if elapsed > 0 else 0.0,
+            }
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+
+from models.summarization import SummarizationBatchItem
+from services.backends import Summary
+from services.job_store import JobRecord, JobStore
+from services.llm import medical_cache_key
+from services.read_cache import ainvalidate_patients, invalidate_patients
+
+
+BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", 10000))
+BULK_CONCURRENCY = int(os.environ.get("BULK_CONCURRENCY", 8))
+BULK_INSERT_CHUNK = int(os.environ.get("BULK_INSERT_CHUNK", 500))
+# batch jobs (POST /summarizations/batch/async) running at the same time
+BULK_MAX_JOBS = int(os.environ.get("BULK_MAX_JOBS", 2))
+# batch jobs accepted and not finished (running + waiting); past this, 429
+BULK_MAX_PENDING_JOBS = int(os.environ.get("BULK_MAX_PENDING_JOBS", 10))
+BULK_RETRY_AFTER = int(os.environ.get("BULK_RETRY_AFTER", 30))
+
+INSERT_SQL = """
+    INSERT INTO summaries (patient_id, input_text, summary, input_hash)
+    VALUES (%s, %s, %s, %s)
+"""
+
+# a bare JSON string can be a transcript (PHI), so it is not quoted back
+NOT_AN_OBJECT = "item must be a JSON object with patient_id and input_text"
+
+
+class ItemError(NamedTuple):
+    """A submitted item that failed to parse or validate."""
+
+    error: str
+
+
+Item = Union[SummarizationBatchItem, ItemError]
+
+
+# ---- PARSING ----
+def parse_items(body: bytes, content_type: str) -> List[Item]:
+    """Accepts a JSON array (or {"items": [...]}) or NDJSON, one item per line."""
+    text = body.decode("utf-8")
+
+    if "ndjson" in content_type or "jsonl" in content_type:
+        raw = []
+        for n, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                raw.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raw.append(ItemError(f"line {n}: {e.msg}"))
+    else:
+        try:
+            raw = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON body: {e.msg}")
+        if isinstance(raw, dict):
+            raw = raw.get("items")
+        if not isinstance(raw, list):
+            raise ValueError("body must be a JSON array of items or {\"items\": [...]}")
+
+    if not raw:
+        raise ValueError("no items submitted")
+    if len(raw) > BULK_MAX_ITEMS:
+        raise ValueError(f"too many items: {len(raw)} > {BULK_MAX_ITEMS}")
+
+    items: List[Item] = []
+    for entry in raw:
+        if isinstance(entry, ItemError):
+            items.append(entry)
+        elif not isinstance(entry, dict):
+            items.append(ItemError(NOT_AN_OBJECT))
+        else:
+            try:
+                items.append(SummarizationBatchItem.model_validate(entry))
+            except ValidationError as e:
+                items.append(ItemError("; ".join(err["msg"] for err in e.errors())))
+    return items
+
+
+async def read_items(request: Request) -> List[Item]:
+    body = await request.body()
+    try:
+        return parse_items(body, request.headers.get("content-type", ""))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def unique_texts(items: List[Item]) -> Dict[str, str]:
+    # identical transcripts are only summarized once per batch
+    texts = {}
+    for item in items:
+        if isinstance(item, SummarizationBatchItem):
+            texts.setdefault(medical_cache_key(item.input_text), item.input_text)
+    return texts
+
+
+def build_results(items: List[Item], summaries: Dict[str, Union[Summary, Exception]]) -> Tuple[List[dict], List[tuple]]:
+    results, rows = [], []
+    for index, item in enumerate(items):
+        if isinstance(item, ItemError):
+            results.append({"index": index, "status": "invalid", "error": item.error})
+            continue
+
+        summary = summaries[medical_cache_key(item.input_text)]
+        if isinstance(summary, Exception):
+            results.append({"index": index, "patient_id": item.patient_id, "status": "failed", "error": str(summary)})
+            continue
+
+        results.append({
+            "index": index, "patient_id": item.patient_id, "status": "created",
+            "summary": summary.text, "backend": summary.backend,
+        })
+        rows.append((index, (item.patient_id, item.input_text, summary.text, summary.key)))
+    return results, rows
+
+
+def _mark_failed(results: List[dict], chunk: List[tuple], error: Exception):
+    for index, _ in chunk:
+        results[index].update(status="failed", error=str(error))
+        results[index].pop("summary", None)
+
+
+def _chunks(rows: List[tuple]):
+    for start in range(0, len(rows), BULK_INSERT_CHUNK):
+        yield rows[start:start + BULK_INSERT_CHUNK]
+
+
+def summary_counts(results: List[dict]) -> dict:
+    counts = {"total": len(results), "created": 0, "failed": 0, "invalid": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return counts
+
+
+# ---- SYNC ----
+def summarize_texts(
+    texts: Dict[str, str],
+    summarize: Callable[[str], Summary],
+    concurrency: int = BULK_CONCURRENCY,
+    on_done: Optional[Callable[[str, bool], None]] = None,
+) -> Dict[str, Union[Summary, Exception]]:
+    summaries: Dict[str, Union[Summary, Exception]] = {}
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bulk") as executor:
+        futures = {executor.submit(summarize, text): key for key, text in texts.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                summaries[key] = future.result()
+            except Exception as e:
+                summaries[key] = e
+            if on_done:
+                on_done(key, not isinstance(summaries[key], Exception))
+    return summaries
+
+
+def insert_rows(pool, rows: List[tuple], results: List[dict]):
+    for chunk in _chunks(rows):
+        try:
+            with pool.connection() as conn, conn.cursor() as cursor:
+                cursor.executemany(INSERT_SQL, [values for _, values in chunk])
+                conn.commit()
+        except Exception as e:
+            _mark_failed(results, chunk, e)
+        else:
+            invalidate_patients(values[0] for _, values in chunk)
+
+
+def process_batch(items: List[Item], summarize: Callable[[str], Summary], pool, on_done=None) -> List[dict]:
+    summaries = summarize_texts(unique_texts(items), summarize, on_done=on_done)
+    results, rows = build_results(items, summaries)
+    insert_rows(pool, rows, results)
+    return results
+
+
+# ---- ASYNC ----
+async def asummarize_texts(
+    texts: Dict[str, str],
+    summarize: Callable,
+    concurrency: int = BULK_CONCURRENCY,
+    on_done: Optional[Callable[[str, bool], None]] = None,
+) -> Dict[str, Union[Summary, Exception]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    summaries: Dict[str, Union[Summary, Exception]] = {}
+
+    async def one(key: str, text: str):
+        async with semaphore:
+            try:
+                summaries[key] = await summarize(text)
+            except Exception as e:
+                summaries[key] = e
+        if on_done:
+            on_done(key, not isinstance(summaries[key], Exception))
+
+    await asyncio.gather(*(one(key, text) for key, text in texts.items()))
+    return summaries
+
+
+async def ainsert_rows(pool, rows: List[tuple], results: List[dict]):
+    for chunk in _chunks(rows):
+        try:
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.executemany(INSERT_SQL, [values for _, values in chunk])
+                await conn.commit()
+        except Exception as e:
+            _mark_failed(results, chunk, e)
+        else:
+            await ainvalidate_patients(values[0] for _, values in chunk)
+
+
+async def aprocess_batch(items: List[Item], summarize: Callable, pool, on_done=None) -> List[dict]:
+    summaries = await asummarize_texts(unique_texts(items), summarize, on_done=on_done)
+    results, rows = build_results(items, summaries)
+    await ainsert_rows(pool, rows, results)
+    return results
+
+
+# ---- ADMISSION (batch jobs) ----
+class JobSlots:
+    """Bounded count of background jobs (batch or delete) accepted and not yet finished.
+
+    The executor (sync) and create_task (async) would queue any number of
+    jobs, each holding its parsed items (or a job record) in memory until it runs.
+    """
+
+    def __init__(self, limit: int = BULK_MAX_PENDING_JOBS, kind: str = "batch"):
+        self.limit = limit
+        self.kind = kind
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a slot, or raise a 429 when all are taken."""
+        with self._lock:
+            if self._count >= self.limit:
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"Too many {self.kind} jobs in progress",
+                    headers={"Retry-After": str(BULK_RETRY_AFTER)},
+                )
+            self._count += 1
+
+    def release(self):
+        with self._lock:
+            self._count -= 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count
+
+
+# ---- PROGRESS (batch jobs) ----
+def new_batch_job(job_id: str, items: List[Item], store: JobStore) -> Callable[[str, bool], None]:
+    weights: Dict[str, int] = {}
+    invalid = 0
+    for item in items:
+        if isinstance(item, SummarizationBatchItem):
+            key = medical_cache_key(item.input_text)
+            weights[key] = weights.get(key, 0) + 1
+        else:
+            invalid += 1
+
+    store.add(JobRecord(job_id, kind="batch", total=len(items), processed=invalid, failed=invalid))
+
+    def on_done(key: str, ok: bool):
+        store.add_progress(job_id, weights[key], 0 if ok else weights[key])
+
+    return on_done
+
+
+def finish_batch_job(store: JobStore, job_id: str, results: List[dict]):
+    counts = summary_counts(results)
+    store.update(
+        job_id,
+        status="completed",
+        processed=counts["total"],
+        failed=counts["failed"] + counts["invalid"],
+        results=results,
+    )
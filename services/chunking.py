@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from functools import lru_cache
+from typing import List
+
+
+# transcripts longer than this are summarized map-reduce style (services/llm.py)
+SUMMARY_CHUNK_TOKENS = int(os.environ.get("SUMMARY_CHUNK_TOKENS", 3000))
+# context carried over from the end of the previous chunk
+SUMMARY_CHUNK_OVERLAP = int(os.environ.get("SUMMARY_CHUNK_OVERLAP", 200))
+TOKENIZER_ENCODING = os.environ.get("TOKENIZER_ENCODING", "o200k_base")
+
+# 1 in N segment ends is a preferred chunk boundary once a chunk is half full
+_BOUNDARY_EVERY = 8
+_SEGMENT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken  # optional; a length estimate is used without it
+    except ImportError:
+        return None
+    return tiktoken.get_encoding(TOKENIZER_ENCODING)
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _split_long(segment: str, max_tokens: int) -> List[str]:
+    encoding = _encoding()
+    if encoding is None:
+        step = max_tokens * 4
+        return [segment[i:i + step] for i in range(0, len(segment), step)]
+    tokens = encoding.encode(segment, disallowed_special=())
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+
+def _is_anchor(segment: str) -> bool:
+    digest = hashlib.blake2b(segment.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "big") % _BOUNDARY_EVERY == 0
+
+
+def chunk_text(text: str, chunk_tokens: int = SUMMARY_CHUNK_TOKENS, overlap_tokens: int = SUMMARY_CHUNK_OVERLAP) -> List[str]:
+    """Split a transcript into chunks of at most ``chunk_tokens`` tokens.
+
+    Chunks are built from whole sentences/lines and, once half full, end at
+    a sentence chosen by its content hash. Boundaries therefore depend on
+    the text around them, not on absolute offsets, so an edit only changes
+    the chunks near it and the per-chunk cache stays warm for the rest.
+    Each chunk after the first starts with up to ``overlap_tokens`` of the
+    previous chunk's trailing sentences.
+    """
+    body_tokens = max(1, chunk_tokens - overlap_tokens)
+    segments = []
+    for segment in _SEGMENT_RE.split(text):
+        segment = segment.strip()
+        if not segment:
+            continue
+        size = count_tokens(segment)
+        if size > body_tokens:
+            segments.extend((part, count_tokens(part)) for part in _split_long(segment, body_tokens))
+        else:
+            segments.append((segment, size))
+
+    bodies: List[List[tuple]] = []
+    current: List[tuple] = []
+    used = 0
+    for segment, size in segments:
+        if current and used + size > body_tokens:
+            bodies.append(current)
+            current, used = [], 0
+        current.append((segment, size))
+        used += size
+        if used >= body_tokens // 2 and _is_anchor(segment):
+            bodies.append(current)
+            current, used = [], 0
+    if current:
+        bodies.append(current)
+
+    chunks = []
+    for i, body in enumerate(bodies):
+        overlap: List[str] = []
+        if i and overlap_tokens:
+            budget = overlap_tokens
+            for segment, size in reversed(bodies[i - 1]):
+                if size > budget:
+                    break
+                overlap.insert(0, segment)
+                budget -= size
+        chunks.append(" ".join(overlap + [segment for segment, _ in body]))
+    return chunks
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+from middleware.metrics import observe_stage
+
+
+EVENTS_ENABLED = os.environ.get("EVENTS_ENABLED", "1") == "1"
+EVENT_BUFFER_SIZE = int(os.environ.get("EVENT_BUFFER_SIZE", 10000))
+EVENT_FLUSH_TIMEOUT = float(os.environ.get("EVENT_FLUSH_TIMEOUT", 10))
+
+
+def make_event(event_type: str, **data) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "type": event_type,
+        "time": datetime.now(timezone.utc).isoformat(),
+        "data": data,
+    }
+
+
+class EventEmitter:
+    """Non-blocking event publishing.
+
+    ``emit`` only appends to a bounded in-process buffer (dropping and
+    counting events when it is full); a background thread hands buffered
+    events to the Pub/Sub publisher, whose own BatchSettings decide how
+    they are grouped on the wire. Publish failures are counted instead of
+    being silently discarded. The publisher is created by ``get_publisher``
+    on the flusher thread, the first time there is something to send.
+    """
+
+    def __init__(
+        self,
+        get_publisher: Callable,
+        topic_path: str,
+        buffer_size: int = EVENT_BUFFER_SIZE,
+        enabled: bool = EVENTS_ENABLED,
+    ):
+        self._get_publisher = get_publisher
+        self.publisher = None
+        self.topic_path = topic_path
+        self.enabled = enabled
+        self._buffer: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=buffer_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pending: set = set()
+        self._closed = False
+
+        self.emitted = 0
+        self.dropped = 0
+        self.published = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._flush_loop, name="event-flusher", daemon=True)
+                self._thread.start()
+
+    def emit(self, event_type: str, **data):
+        if not self.enabled or self._closed:
+            return
+        if self._thread is None:
+            self.start()
+
+        try:
+            self._buffer.put_nowait(make_event(event_type, **data))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        with self._lock:
+            self.emitted += 1
+
+    def _flush_loop(self):
+        while True:
+            event = self._buffer.get()
+            if event is None:
+                return
+            self._publish(event)
+
+    def _publish(self, event: dict):
+        data = json.dumps(event, separators=(",", ":")).encode("utf-8")
+        try:
+            if self.publisher is None:
+                self.publisher = self._get_publisher()
+            started = time.perf_counter()
+            future = self.publisher.publish(self.topic_path, data, event_type=event["type"])
+        except Exception as e:
+            self._record_failure(e)
+            return
+
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(lambda done: self._on_published(done, started))
+
+    def _on_published(self, future: Future, started: float):
+        # publish stage: handed to the client until Pub/Sub acknowledged it
+        observe_stage("publish", time.perf_counter() - started)
+        with self._lock:
+            self._pending.discard(future)
+        error = future.exception()
+        if error is not None:
+            self._record_failure(error)
+        else:
+            with self._lock:
+                self.published += 1
+
+    def _record_failure(self, error: Exception):
+        with self._lock:
+            self.failed += 1
+            self.last_error = str(error)
+
+    def close(self, timeout: float = EVENT_FLUSH_TIMEOUT):
+        """Drain the buffer and wait for outstanding publishes (app shutdown)."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+
+        if thread is not None:
+            self._buffer.put(None)
+            thread.join(timeout)
+
+        # flush whatever the publisher is still batching
+        stop = getattr(self.publisher, "stop", None)
+        if stop is not None:
+            try:
+                stop()
+            except Exception as e:
+                self._record_failure(e)
+
+        with self._lock:
+            pending: List[Future] = list(self._pending)
+        for future in pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                future.result(remaining)
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "buffered": self._buffer.qsize(),
+                "buffer_size": self._buffer.maxsize,
+                "emitted": self.emitted,
+                "dropped": self.dropped,
+                "published": self.published,
+                "failed": self.failed,
+                "in_flight": len(self._pending),
+                "last_error": self.last_error,
+            }
+
+
+class FakePublisher:
+    """In-memory stand-in for pubsub_v1.PublisherClient (tests, benchmarks)."""
+
+    def __init__(self, latency: float = 0.0, fail: bool = False):
+        self.latency = latency
+        self.fail = fail
+        self.messages: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def topic_path(self, project: str, topic: str) -> str:
+        return f"projects/{project}/topics/{topic}"
+
+    def publish(self, topic: str, data: bytes, **attrs) -> Future:
+        if self.latency:
+            time.sleep(self.latency)
+        future: Future = Future()
+        if self.fail:
+            future.set_exception(RuntimeError("publish failed"))
+        else:
+            with self._lock:
+                self.messages.append((topic, data, attrs))
+            future.set_result(str(len(self.messages)))
+        return future
+
+    def stop(self):
+        pass
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import os
+import re
+from typing import List
+
+import numpy as np
+
+
+# sentences kept in an extractive summary
+EXTRACTIVE_SENTENCES = int(os.environ.get("EXTRACTIVE_SENTENCES", 3))
+# TextRank damping factor (probability of following a similarity edge)
+EXTRACTIVE_DAMPING = float(os.environ.get("EXTRACTIVE_DAMPING", 0.85))
+# sentences ranked together; longer transcripts are ranked group by group
+# and the winners ranked again, so the similarity matrix stays small
+EXTRACTIVE_MAX_SENTENCES = int(os.environ.get("EXTRACTIVE_MAX_SENTENCES", 400))
+# a candidate this similar to an already chosen sentence is skipped
+EXTRACTIVE_REDUNDANCY = float(os.environ.get("EXTRACTIVE_REDUNDANCY", 0.8))
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_TERM_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("""
+    a about after again all also am an and any are as at be because been
+    before being but by can could did do does doing for from had has have
+    having he her here him his how i if in into is it its just me more most
+    my no not now of on once only or other our out over own same she should
+    so some such than that the their them then there these they this those
+    through to too under until up very was we were what when where which
+    while who why will with would you your okay ok yes yeah um uh
+""".split())
+
+_ITERATIONS = 100
+_TOLERANCE = 1e-6
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s for s in (part.strip() for part in _SENTENCE_RE.split(text)) if s]
+
+
+def _terms(sentence: str) -> List[str]:
+    return [t for t in _TERM_RE.findall(sentence.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def tfidf_matrix(sentences: List[str]) -> np.ndarray:
+    """L2-normalized TF-IDF rows, one per sentence (each sentence is a document)."""
+    vocabulary = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        for term in _terms(sentence):
+            rows.append(i)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+
+    counts = np.zeros((len(sentences), max(1, len(vocabulary))), dtype=np.float32)
+    np.add.at(counts, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+
+    df = np.count_nonzero(counts, axis=0)
+    idf = np.log((1.0 + len(sentences)) / (1.0 + df)) + 1.0
+    weights = np.log1p(counts) * idf.astype(np.float32)
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    return weights / np.where(norms == 0, 1.0, norms)
+
+
+def textrank(similarity: np.ndarray, damping: float = EXTRACTIVE_DAMPING) -> np.ndarray:
+    """Stationary scores of the random walk over the sentence similarity graph."""
+    n = similarity.shape[0]
+    weights = similarity.astype(np.float64, copy=True)
+    np.fill_diagonal(weights, 0.0)
+    out = weights.sum(axis=1, keepdims=True)
+    # a sentence sharing no terms with any other links to every sentence
+    transition = np.where(out > 0, weights / np.where(out == 0, 1.0, out), 1.0 / n)
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(_ITERATIONS):
+        updated = (1.0 - damping) / n + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < _TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def _select(similarity: np.ndarray, scores: np.ndarray, k: int) -> List[int]:
+    # best first (ties keep transcript order), skipping near-duplicates
+    chosen: List[int] = []
+    for i in np.argsort(-scores, kind="stable"):
+        if all(similarity[i, j] < EXTRACTIVE_REDUNDANCY for j in chosen):
+            chosen.append(int(i))
+            if len(chosen) == k:
+                break
+    return sorted(chosen)
+
+
+def rank_sentences(sentences: List[str], k: int) -> List[int]:
+    """Indices of the ``k`` most central sentences, in transcript order."""
+    if len(sentences) <= k:
+        return list(range(len(sentences)))
+    matrix = tfidf_matrix(sentences)
+    similarity = matrix @ matrix.T
+    return _select(similarity, textrank(similarity), k)
+
+
+def extract_summary(text: str, sentences: int = EXTRACTIVE_SENTENCES) -> List[str]:
+    """The ``sentences`` highest ranked sentences of ``text``, in order.
+
+    Deterministic: the same text always gives the same summary.
+    """
+    candidates = split_sentences(text)
+    while len(candidates) > EXTRACTIVE_MAX_SENTENCES:
+        groups = -(-len(candidates) // EXTRACTIVE_MAX_SENTENCES)
+        keep = max(sentences, EXTRACTIVE_MAX_SENTENCES // groups)
+        survivors = []
+        for start in range(0, len(candidates), EXTRACTIVE_MAX_SENTENCES):
+            group = candidates[start:start + EXTRACTIVE_MAX_SENTENCES]
+            survivors.extend(group[i] for i in rank_sentences(group, keep))
+        if len(survivors) >= len(candidates):
+            break
+        candidates = survivors
+    return [candidates[i] for i in rank_sentences(candidates, sentences)]
@@ -0,0 +1,402 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from services.job_store import JobRecord
+
+
+# -----------------------------------------------------------------------------
+# Config
+# -----------------------------------------------------------------------------
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 8))
+JOB_QUEUE_MAX_SIZE = int(os.environ.get("JOB_QUEUE_MAX_SIZE", 1000))
+JOB_RETRY_AFTER = int(os.environ.get("JOB_RETRY_AFTER", 5))
+JOB_SHUTDOWN_TIMEOUT = float(os.environ.get("JOB_SHUTDOWN_TIMEOUT", 30))
+
+# error of a batch or delete job still running when shutdown gave up on it
+JOB_INTERRUPTED = "interrupted by shutdown"
+
+
+def _parse_model_concurrency(value: str) -> Dict[str, int]:
+    # "gpt-4o-mini=8,gpt-4o=2"
+    limits = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        model, _, limit = part.partition("=")
+        limits[model.strip()] = int(limit)
+    return limits
+
+
+JOB_MODEL_CONCURRENCY = _parse_model_concurrency(os.environ.get("JOB_MODEL_CONCURRENCY", ""))
+
+
+class QueueFull(Exception):
+    """Raised when the job queue is at capacity; carries a Retry-After hint."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("job queue is full")
+        self.retry_after = retry_after
+
+
+class _QueueStats:
+    def __init__(self, workers: int, max_size: int, model_concurrency: Dict[str, int]):
+        self.workers = workers
+        self.max_size = max_size
+        self.model_concurrency = dict(model_concurrency)
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.active = 0
+        self.avg_job_seconds = 0.0
+
+    def record(self, seconds: float, ok: bool):
+        if ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+        # exponential moving average, used for the Retry-After estimate
+        alpha = 0.1
+        self.avg_job_seconds = seconds if not self.avg_job_seconds else (
+            (1 - alpha) * self.avg_job_seconds + alpha * seconds
+        )
+
+    def retry_after(self, depth: int) -> int:
+        if not self.avg_job_seconds:
+            return JOB_RETRY_AFTER
+        drain = depth * self.avg_job_seconds / max(self.workers, 1)
+        return max(JOB_RETRY_AFTER, int(math.ceil(drain)))
+
+    def as_dict(self, depth: int) -> dict:
+        return {
+            "workers": self.workers,
+            "max_size": self.max_size,
+            "depth": depth,
+            "active": self.active,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_job_seconds": self.avg_job_seconds,
+            "model_concurrency": self.model_concurrency,
+        }
+
+
+def _take_runnable(pending: Deque[tuple], running: Dict[str, int], limit: Callable[[str], int]) -> Optional[tuple]:
+    # the oldest job whose model is below its concurrency limit: jobs for a
+    # saturated model wait here in the queue, not in a worker, so jobs for
+    # other models behind them still run
+    for i, (job_id, model) in enumerate(pending):
+        if running.get(model, 0) < limit(model):
+            del pending[i]
+            running[model] = running.get(model, 0) + 1
+            return job_id, model
+    return None
+
+
+# -----------------------------------------------------------------------------
+# Thread-based queue (sync path)
+# -----------------------------------------------------------------------------
+class JobQueue:
+    """Fixed pool of worker threads fed from a bounded queue.
+
+    ``handler(job_id)`` runs in a worker; at most ``model_concurrency[model]``
+    jobs for the same model run at once (default: all workers).
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str], None],
+        workers: int = JOB_WORKERS,
+        max_size: int = JOB_QUEUE_MAX_SIZE,
+        model_concurrency: Optional[Dict[str, int]] = None,
+    ):
+        self._handler = handler
+        self._pending: Deque[tuple] = deque()
+        self._running: Dict[str, int] = {}
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._model_limits = model_concurrency if model_concurrency is not None else JOB_MODEL_CONCURRENCY
+        self._lock = threading.Lock()
+        # signalled whenever a job is queued or taken, or one finishes
+        self._changed = threading.Condition(self._lock)
+        self._stats = _QueueStats(workers, max_size, self._model_limits)
+
+    def start(self):
+        self._stopping.clear()
+        for i in range(self._stats.workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        # in-flight jobs finish; queued ones stay 'pending' in the jobs table
+        # and are recovered on the next start
+        self._stopping.set()
+        with self._changed:
+            self._changed.notify_all()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    def full(self) -> bool:
+        with self._lock:
+            return len(self._pending) >= self._stats.max_size
+
+    def retry_after(self) -> int:
+        with self._lock:
+            return self._stats.retry_after(len(self._pending))
+
+    def submit(self, job_id: str, model: str, block: bool = False):
+        with self._changed:
+            while len(self._pending) >= self._stats.max_size:
+                if not block:
+                    self._stats.rejected += 1
+                    raise QueueFull(self._stats.retry_after(len(self._pending)))
+                self._changed.wait()
+            self._pending.append((job_id, model))
+            self._stats.submitted += 1
+            self._changed.notify_all()
+
+    def _limit(self, model: str) -> int:
+        return self._model_limits.get(model, self._stats.workers)
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            with self._changed:
+                job = _take_runnable(self._pending, self._running, self._limit)
+                if job is None:
+                    self._changed.wait(0.5)
+                    continue
+                self._stats.active += 1
+                self._changed.notify_all()  # room for a blocked submit
+            job_id, model = job
+            start = time.monotonic()
+            ok = True
+            try:
+                self._handler(job_id)
+            except Exception:
+                ok = False
+            finally:
+                with self._changed:
+                    self._running[model] -= 1
+                    self._stats.active -= 1
+                    self._stats.record(time.monotonic() - start, ok)
+                    self._changed.notify_all()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return self._stats.as_dict(len(self._pending))
+
+
+# -----------------------------------------------------------------------------
+# asyncio queue (SUMMARIZATION_MODE=async)
+# -----------------------------------------------------------------------------
+class AsyncJobQueue:
+    """Same contract as JobQueue, with worker tasks instead of threads."""
+
+    def __init__(
+        self,
+        handler: Callable,
+        workers: int = JOB_WORKERS,
+        max_size: int = JOB_QUEUE_MAX_SIZE,
+        model_concurrency: Optional[Dict[str, int]] = None,
+    ):
+        self._handler = handler
+        self._pending: Deque[tuple] = deque()
+        self._running: Dict[str, int] = {}
+        self._changed: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        self._model_limits = model_concurrency if model_concurrency is not None else JOB_MODEL_CONCURRENCY
+        self._stats = _QueueStats(workers, max_size, self._model_limits)
+
+    def start(self):
+        self._stopping = False
+        # created here, inside the running loop
+        self._changed = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self._stats.workers)]
+
+    async def stop(self, timeout: Optional[float] = None):
+        self._stopping = True
+        if self._changed is not None:
+            self._changed.set()
+        if self._tasks:
+            _, still_running = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in still_running:
+                task.cancel()
+        self._tasks = []
+
+    def full(self) -> bool:
+        return len(self._pending) >= self._stats.max_size
+
+    def retry_after(self) -> int:
+        return self._stats.retry_after(len(self._pending))
+
+    def submit(self, job_id: str, model: str):
+        if self.full():
+            self._stats.rejected += 1
+            raise QueueFull(self.retry_after())
+        self._enqueue(job_id, model)
+
+    async def submit_wait(self, job_id: str, model: str):
+        while self.full():
+            await self._wait_changed()
+        self._enqueue(job_id, model)
+
+    def _enqueue(self, job_id: str, model: str):
+        self._pending.append((job_id, model))
+        self._stats.submitted += 1
+        self._changed.set()
+
+    async def _wait_changed(self, timeout: Optional[float] = None):
+        # nothing awaits between the caller's check and this clear, so no
+        # wake-up can be lost
+        self._changed.clear()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _limit(self, model: str) -> int:
+        return self._model_limits.get(model, self._stats.workers)
+
+    async def _worker(self):
+        while not self._stopping:
+            job = _take_runnable(self._pending, self._running, self._limit)
+            if job is None:
+                await self._wait_changed(timeout=0.5)
+                continue
+            self._changed.set()  # room for a waiting submit_wait
+            job_id, model = job
+            self._stats.active += 1
+            start = time.monotonic()
+            ok = True
+            try:
+                await self._handler(job_id)
+            except Exception:
+                ok = False
+            finally:
+                self._running[model] -= 1
+                self._stats.active -= 1
+                self._stats.record(time.monotonic() - start, ok)
+                self._changed.set()
+
+    def stats(self) -> dict:
+        return self._stats.as_dict(len(self._pending))
+
+
+# -----------------------------------------------------------------------------
+# Durable job state (jobs table, migrations/002)
+# -----------------------------------------------------------------------------
+INSERT_JOB_SQL = """
+    INSERT INTO jobs (job_id, patient_id, input_text, model, status)
+    VALUES (%s, %s, %s, %s, 'pending')
+"""
+UPDATE_JOB_SQL = """
+    UPDATE jobs SET status = %s, summary = %s, error = %s
+    WHERE job_id = %s
+"""
+SELECT_JOB_SQL = """
+    SELECT job_id, kind, patient_id, input_text, model, status, summary, error,
+           total, processed, failed, results
+    FROM jobs WHERE job_id = %s
+"""
+# batch and delete jobs are saved whole at each status change (progress in
+# between stays in the worker running them), so every worker can find them
+SAVE_JOB_SQL = """
+    INSERT INTO jobs (job_id, kind, patient_id, input_text, model, status, error, total, processed, failed, results)
+    VALUES (%s, %s, %s, '', '', %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE status = VALUES(status), error = VALUES(error), total = VALUES(total),
+        processed = VALUES(processed), failed = VALUES(failed), results = VALUES(results)
+"""
+DELETE_JOB_SQL = "DELETE FROM jobs WHERE job_id = %s"
+# jobs interrupted by a restart are picked up again from the start
+SELECT_UNFINISHED_SQL = """
+    SELECT job_id, patient_id, input_text, model, status, summary, error
+    FROM jobs WHERE status IN ('pending', 'processing') AND kind = 'single'
+    ORDER BY created_at
+"""
+
+
+def _save_params(record: JobRecord) -> tuple:
+    return (
+        record.job_id, record.kind, record.patient_id or "", record.status, record.error,
+        record.total, record.processed, record.failed,
+        json.dumps(record.results) if record.results is not None else None,
+    )
+
+
+class JobRepository:
+    def __init__(self, get_pool: Callable):
+        self._get_pool = get_pool
+
+    def _execute(self, sql: str, params: tuple, fetch: Optional[str] = None):
+        with self._get_pool().connection() as conn, conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            if fetch == "one":
+                return cursor.fetchone()
+            if fetch == "all":
+                return cursor.fetchall()
+            conn.commit()
+
+    def create(self, job_id: str, patient_id: str, input_text: str, model: str):
+        self._execute(INSERT_JOB_SQL, (job_id, patient_id, input_text, model))
+
+    def update(self, job_id: str, status: str, summary: Optional[str] = None, error: Optional[str] = None):
+        self._execute(UPDATE_JOB_SQL, (status, summary, error, job_id))
+
+    def save(self, record: JobRecord):
+        self._execute(SAVE_JOB_SQL, _save_params(record))
+
+    def delete(self, job_id: str):
+        self._execute(DELETE_JOB_SQL, (job_id,))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self._execute(SELECT_JOB_SQL, (job_id,), fetch="one")
+
+    def unfinished(self) -> List[dict]:
+        return self._execute(SELECT_UNFINISHED_SQL, (), fetch="all")
+
+
+class AsyncJobRepository:
+    def __init__(self, get_pool: Callable):
+        self._get_pool = get_pool
+
+    async def _execute(self, sql: str, params: tuple, fetch: Optional[str] = None):
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(sql, params)
+                if fetch == "one":
+                    return await cursor.fetchone()
+                if fetch == "all":
+                    return await cursor.fetchall()
+            await conn.commit()
+
+    async def create(self, job_id: str, patient_id: str, input_text: str, model: str):
+        await self._execute(INSERT_JOB_SQL, (job_id, patient_id, input_text, model))
+
+    async def update(self, job_id: str, status: str, summary: Optional[str] = None, error: Optional[str] = None):
+        await self._execute(UPDATE_JOB_SQL, (status, summary, error, job_id))
+
+    async def save(self, record: JobRecord):
+        await self._execute(SAVE_JOB_SQL, _save_params(record))
+
+    async def delete(self, job_id: str):
+        await self._execute(DELETE_JOB_SQL, (job_id,))
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self._execute(SELECT_JOB_SQL, (job_id,), fetch="one")
+
+    async def unfinished(self) -> List[dict]:
+        return await self._execute(SELECT_UNFINISHED_SQL, (), fetch="all")
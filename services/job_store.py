@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+import abc
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+
+# -----------------------------------------------------------------------------
+# Config
+# -----------------------------------------------------------------------------
+JOB_STORE = os.environ.get("JOB_STORE", "memory").lower()  # memory | mysql
+JOB_STORE_MAX_ENTRIES = int(os.environ.get("JOB_STORE_MAX_ENTRIES", 10000))
+# finished jobs are forgotten this many seconds after they finish
+JOB_STORE_TTL = float(os.environ.get("JOB_STORE_TTL", 3600))
+# how often the MySQL store deletes expired rows (checked on writes)
+JOB_STORE_PURGE_INTERVAL = float(os.environ.get("JOB_STORE_PURGE_INTERVAL", 60))
+
+ACTIVE_STATUSES = ("pending", "processing")
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class JobRecord:
+    """Compact per-job state.
+
+    ``input_text`` is only held while the job waits for a worker; it is
+    dropped as soon as processing starts (the durable copy is in the jobs
+    table).
+    """
+
+    __slots__ = (
+        "job_id", "kind", "status", "patient_id", "model", "input_text",
+        "summary", "error", "total", "processed", "failed", "results",
+        "finished_at",
+    )
+
+    def __init__(
+        self,
+        job_id: str,
+        status: str = "pending",
+        kind: str = "single",
+        patient_id: Optional[str] = None,
+        model: Optional[str] = None,
+        input_text: Optional[str] = None,
+        summary: Optional[str] = None,
+        error: Optional[str] = None,
+        total: Optional[int] = None,
+        processed: Optional[int] = None,
+        failed: Optional[int] = None,
+        results: Optional[List[dict]] = None,
+    ):
+        self.job_id = job_id
+        self.kind = kind
+        self.status = status
+        self.patient_id = patient_id
+        self.model = model
+        self.input_text = input_text
+        self.summary = summary
+        self.error = error
+        self.total = total
+        self.processed = processed
+        self.failed = failed
+        self.results = results
+        self.finished_at: Optional[float] = None
+
+    @classmethod
+    def from_row(cls, row: dict, **overrides) -> "JobRecord":
+        fields = {
+            "status": row["status"],
+            "kind": row.get("kind") or "single",
+            "patient_id": row["patient_id"],
+            "model": row["model"],
+            "input_text": row["input_text"],
+            "summary": row["summary"],
+            "error": row["error"],
+            "total": row.get("total"),
+            "processed": row.get("processed"),
+            "failed": row.get("failed"),
+            "results": json.loads(row["results"]) if row.get("results") else None,
+        }
+        fields.update(overrides)
+        return cls(row["job_id"], **fields)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def size(self) -> int:
+        """Approximate bytes held by this record (shallow for batch results)."""
+        size = sys.getsizeof(self)
+        for name in ("job_id", "patient_id", "model", "input_text", "summary", "error"):
+            value = getattr(self, name)
+            if value is not None:
+                size += sys.getsizeof(value)
+        if self.results is not None:
+            size += sys.getsizeof(self.results) + sum(sys.getsizeof(r) for r in self.results)
+        return size
+
+
+class JobStore(abc.ABC):
+    """Where job state lives between submission and the client reading it.
+
+    ``persistent`` stores write the jobs table themselves, so callers skip
+    their own JobRepository mirror writes. ``update`` and ``add_progress``
+    return the updated record when the store holds it in memory (None
+    otherwise), so callers can pass it on without reading it back.
+    """
+
+    persistent = False
+
+    @abc.abstractmethod
+    def add(self, record: JobRecord):
+        ...
+
+    @abc.abstractmethod
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        ...
+
+    @abc.abstractmethod
+    def update(self, job_id: str, **fields) -> Optional[JobRecord]:
+        ...
+
+    @abc.abstractmethod
+    def add_progress(self, job_id: str, processed: int, failed: int) -> Optional[JobRecord]:
+        ...
+
+    @abc.abstractmethod
+    def delete(self, job_id: str):
+        ...
+
+    @abc.abstractmethod
+    def stats(self) -> dict:
+        ...
+
+
+class MemoryJobStore(JobStore):
+    """Bounded in-process registry.
+
+    Finished jobs expire ``ttl`` seconds after finishing; past
+    ``max_entries`` the least recently used finished job is evicted.
+    Pending/processing jobs are never evicted (their number is bounded by
+    the job queue), so a worker always finds its job.
+    """
+
+    def __init__(self, max_entries: int = JOB_STORE_MAX_ENTRIES, ttl: float = JOB_STORE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._records: "OrderedDict[str, JobRecord]" = OrderedDict()  # LRU order
+        self._finished: "OrderedDict[str, float]" = OrderedDict()  # finish order
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def add(self, record: JobRecord):
+        with self._lock:
+            self._drop(record.job_id)
+            self._records[record.job_id] = record
+            self._finished_changed(record)
+            self._resize(record)
+            self._expire()
+            self._evict()
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            self._expire()
+            record = self._records.get(job_id)
+            if record is not None:
+                self._records.move_to_end(job_id)
+            return record
+
+    def update(self, job_id: str, **fields) -> Optional[JobRecord]:
+        with self._lock:
+            record = self._records.get(job_id)
+            if record is None:
+                return None
+            for name, value in fields.items():
+                setattr(record, name, value)
+            if record.status != "pending":
+                record.input_text = None  # a worker has it now
+            self._finished_changed(record)
+            self._resize(record)
+            self._expire()
+            return record
+
+    def add_progress(self, job_id: str, processed: int, failed: int) -> Optional[JobRecord]:
+        with self._lock:
+            record = self._records.get(job_id)
+            if record is not None:
+                record.processed += processed
+                record.failed += failed
+            return record
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._drop(job_id)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    # ---- internals (lock held) ----
+    def _finished_changed(self, record: JobRecord):
+        if record.finished and record.job_id not in self._finished:
+            record.finished_at = time.monotonic()
+            self._finished[record.job_id] = record.finished_at
+
+    def _resize(self, record: JobRecord):
+        size = record.size()
+        self._bytes += size - self._sizes.get(record.job_id, 0)
+        self._sizes[record.job_id] = size
+
+    def _drop(self, job_id: str):
+        if self._records.pop(job_id, None) is not None:
+            self._finished.pop(job_id, None)
+            self._bytes -= self._sizes.pop(job_id, 0)
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if finished_at > cutoff:
+                break
+            self._drop(job_id)
+            self.expired += 1
+
+    def _evict(self):
+        while len(self._records) > self.max_entries:
+            # oldest first; usually the very first entry is a finished job
+            victim = next((job_id for job_id, record in self._records.items() if record.finished), None)
+            if victim is None:
+                return
+            self._drop(victim)
+            self.evicted += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = len(self._records)
+            return {
+                "backend": "memory",
+                "entries": entries,
+                "finished": len(self._finished),
+                "active": entries - len(self._finished),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "bytes": self._bytes,
+                "avg_bytes_per_job": self._bytes / entries if entries else 0.0,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+
+# -----------------------------------------------------------------------------
+# MySQL backend (jobs table, migrations/002 + 004)
+# -----------------------------------------------------------------------------
+UPSERT_JOB_SQL = """
+    INSERT INTO jobs (job_id, kind, patient_id, input_text, model, status, total, processed, failed)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE status = VALUES(status), summary = NULL, error = NULL
+"""
+SELECT_JOB_SQL = """
+    SELECT job_id, kind, patient_id, input_text, model, status, summary, error,
+           total, processed, failed, results
+    FROM jobs WHERE job_id = %s
+"""
+PROGRESS_JOB_SQL = """
+    UPDATE jobs SET processed = processed + %s, failed = failed + %s
+    WHERE job_id = %s
+"""
+DELETE_JOB_SQL = "DELETE FROM jobs WHERE job_id = %s"
+PURGE_JOBS_SQL = """
+    DELETE FROM jobs
+    WHERE status IN ('completed', 'failed') AND updated_at < NOW() - INTERVAL %s SECOND
+    LIMIT 1000
+"""
+STATS_JOBS_SQL = """
+    SELECT status, COUNT(*) AS jobs,
+           SUM(LENGTH(input_text) + IFNULL(LENGTH(summary), 0) + IFNULL(LENGTH(results), 0)) AS bytes
+    FROM jobs GROUP BY status
+"""
+UPDATABLE_COLUMNS = ("status", "summary", "error", "total", "processed", "failed", "results")
+
+
+class MySQLJobStore(JobStore):
+    """Job state kept only in the jobs table: nothing is held in process.
+
+    Reads go to MySQL, so every replica sees every job. Finished rows are
+    deleted ``ttl`` seconds after their last update. Uses the blocking
+    pymysql pool, so it is for the sync (threadpool) path only.
+    """
+
+    persistent = True
+
+    def __init__(self, get_pool: Callable, ttl: float = JOB_STORE_TTL):
+        self._get_pool = get_pool
+        self.ttl = ttl
+        self._last_purge = 0.0
+        self.expired = 0
+
+    def _execute(self, sql: str, params: tuple, fetch: Optional[str] = None):
+        with self._get_pool().connection() as conn, conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            if fetch == "one":
+                return cursor.fetchone()
+            if fetch == "all":
+                return cursor.fetchall()
+            conn.commit()
+            return cursor.rowcount
+
+    def add(self, record: JobRecord):
+        self._execute(UPSERT_JOB_SQL, (
+            record.job_id, record.kind, record.patient_id or "", record.input_text or "",
+            record.model or "", record.status, record.total, record.processed, record.failed,
+        ))
+        self._purge()
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        row = self._execute(SELECT_JOB_SQL, (job_id,), fetch="one")
+        return JobRecord.from_row(row) if row else None
+
+    def update(self, job_id: str, **fields) -> Optional[JobRecord]:
+        columns = [name for name in fields if name in UPDATABLE_COLUMNS]
+        values = [json.dumps(fields[name]) if name == "results" else fields[name] for name in columns]
+        if columns:
+            sql = "UPDATE jobs SET %s WHERE job_id = %%s" % ", ".join(f"{name} = %s" for name in columns)
+            self._execute(sql, (*values, job_id))
+        return None
+
+    def add_progress(self, job_id: str, processed: int, failed: int) -> Optional[JobRecord]:
+        self._execute(PROGRESS_JOB_SQL, (processed, failed, job_id))
+        return None
+
+    def delete(self, job_id: str):
+        self._execute(DELETE_JOB_SQL, (job_id,))
+
+    def _purge(self):
+        now = time.monotonic()
+        if now - self._last_purge < JOB_STORE_PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        self.expired += self._execute(PURGE_JOBS_SQL, (int(self.ttl),))
+
+    def stats(self) -> dict:
+        rows = self._execute(STATS_JOBS_SQL, (), fetch="all")
+        by_status = {row["status"]: int(row["jobs"]) for row in rows}
+        entries = sum(by_status.values())
+        stored = sum(int(row["bytes"] or 0) for row in rows)
+        return {
+            "backend": "mysql",
+            "entries": entries,
+            "by_status": by_status,
+            "ttl_seconds": self.ttl,
+            "bytes": 0,  # nothing held in process
+            "stored_bytes": stored,
+            "avg_stored_bytes_per_job": stored / entries if entries else 0.0,
+            "expired": self.expired,
+        }
+
+
+def make_job_store(get_pool: Callable) -> JobStore:
+    if JOB_STORE == "memory":
+        return MemoryJobStore()
+    if JOB_STORE == "mysql":
+        return MySQLJobStore(get_pool)
+    raise ValueError(f"JOB_STORE must be 'memory' or 'mysql', got {JOB_STORE!r}")
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from framework.db import get_pool
+from services.job_store import JobRecord, make_job_store
+
+
+# job_id -> job state, shared by the sync (thread) and async (task) paths;
+# bounded and expiring, see services/job_store.py (JOB_STORE=memory|mysql)
+job_store = make_job_store(get_pool)
+
+
+def job_response(record: JobRecord) -> dict:
+    job_id = record.job_id
+    response = {
+        "job_id": job_id,
+        "status": record.status,
+        "links": [
+            {"rel": "self", "href": f"/jobs/{job_id}"},
+            {"rel": "events", "href": f"/jobs/{job_id}/events"},
+        ]
+    }
+
+    if record.kind in ("batch", "delete"):
+        response["progress"] = {
+            "total": record.total,
+            "processed": record.processed,
+            "failed": record.failed,
+        }
+        if record.kind == "delete":
+            response["patient_id"] = record.patient_id
+        elif record.status == "completed":
+            response["results"] = record.results
+    elif record.status == "completed":
+        response["summary"] = record.summary
+
+    if record.status == "failed":
+        response["error"] = record.error
+
+    return response
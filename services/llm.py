@@ -0,0 +1,496 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterator, List
+
+from framework.lazy import LazyResource
+from middleware.metrics import stage
+from services.batcher import BATCH_MAX_IN_FLIGHT, BATCH_MAX_SIZE, BATCH_WINDOW_MS, MicroBatcher
+from services.chunking import SUMMARY_CHUNK_TOKENS, chunk_text, count_tokens
+from services.resilience import LLM_TIMEOUT, ResilientCaller
+from services.summary_cache import cache_key, summary_cache
+
+
+OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")  # cheaper + good for summaries
+
+# long transcripts: chunk summaries requested at once per transcript
+SUMMARY_FANOUT = int(os.environ.get("SUMMARY_FANOUT", 4))
+SUMMARY_CHUNK_MAX_TOKENS = int(os.environ.get("SUMMARY_CHUNK_MAX_TOKENS", 200))
+
+
+
+# retries are ours (services/resilience.py), not the SDK's; OPENAI_BASE_URL
+# points the clients at another OpenAI-compatible server
+def _make_client():
+    from openai import OpenAI  # heavy import, deferred until first use
+
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=LLM_TIMEOUT, max_retries=0)
+
+
+def _make_async_client():
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=LLM_TIMEOUT, max_retries=0)
+
+
+client = LazyResource("openai", _make_client, close=lambda c: c.close())
+# closed from the app lifespan (AsyncOpenAI.close is a coroutine)
+async_client = LazyResource("openai_async", _make_async_client)
+
+# TPM reservation for requests without max_tokens (settled from usage)
+_UNBOUNDED_COMPLETION_TOKENS = 512
+
+# timeouts, retries, hedging, RPM/TPM quota and the circuit breaker, shared
+# by every call to the upstream
+caller = ResilientCaller()
+
+
+def estimate_tokens(request: dict) -> int:
+    # what a request can count against the TPM quota: prompt plus completion
+    prompt = sum(count_tokens(message["content"]) for message in request["messages"])
+    return prompt + (request.get("max_tokens") or _UNBOUNDED_COMPLETION_TOKENS)
+
+
+# ---- PROMPTS ----
+# layperson summary used by POST /summarizations
+MEDICAL_SYSTEM_PROMPT = "You are a medical summarization assistant."
+MEDICAL_PROMPT_TEMPLATE = (
+    "Summarize this medical context into a few sentences so that a "
+    "layperson can understand:\n\n"
+    "{input_text}"
+)
+MEDICAL_TEMPERATURE = 0.3
+MEDICAL_MAX_TOKENS = 150
+
+# physician summary used by the async job path
+CLINICAL_SYSTEM_PROMPT = (
+    "You are a medical assistant. Generate a concise, "
+    "clinically accurate medical summary suitable for a physician."
+)
+CLINICAL_TEMPERATURE = 0.2
+
+# map-reduce over long transcripts: one summary per chunk, then merged
+CHUNK_SYSTEM_PROMPT = "You are a medical summarization assistant."
+CHUNK_PROMPT_TEMPLATE = (
+    "This is one part of a longer medical transcript. Summarize the "
+    "medically relevant facts it contains in a few sentences:\n\n"
+    "{text}"
+)
+MERGE_PROMPT_TEMPLATE = (
+    "These are summaries of consecutive parts of one medical transcript. "
+    "Combine them into a single summary of the medically relevant facts:\n\n"
+    "{text}"
+)
+REDUCE_PROMPT_TEMPLATE = (
+    "These are summaries of consecutive parts of one medical transcript. "
+    "Combine them into a few sentences so that a layperson can understand:\n\n"
+    "{text}"
+)
+CLINICAL_REDUCE_PROMPT_TEMPLATE = (
+    "These are summaries of consecutive parts of one medical transcript. "
+    "Combine them into a concise, clinically accurate summary suitable for a physician:\n\n"
+    "{text}"
+)
+CHUNK_TEMPERATURE = 0.2
+
+# appended segments: the prior summary is updated with only the new text
+ROLLING_PROMPT_TEMPLATE = (
+    "Here is the current summary of a medical transcript:\n\n{summary}\n\n"
+    "This part was just added to the transcript:\n\n{text}\n\n"
+    "Rewrite the summary to include the new information, in a few sentences "
+    "so that a layperson can understand."
+)
+
+
+def medical_request(input_text: str) -> dict:
+    return dict(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": MEDICAL_SYSTEM_PROMPT},
+            {"role": "user", "content": MEDICAL_PROMPT_TEMPLATE.format(input_text=input_text)},
+        ],
+        temperature=MEDICAL_TEMPERATURE,
+        max_tokens=MEDICAL_MAX_TOKENS,
+    )
+
+
+def _prompt_request(template: str, text: str, temperature: float, max_tokens: int) -> dict:
+    return dict(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": CHUNK_SYSTEM_PROMPT},
+            {"role": "user", "content": template.format(text=text)},
+        ],
+        temperature=temperature,
+        max_tokens=max_tokens,
+    )
+
+
+def clinical_request(input_text: str) -> dict:
+    return dict(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": CLINICAL_SYSTEM_PROMPT},
+            {"role": "user", "content": input_text},
+        ],
+        temperature=CLINICAL_TEMPERATURE,
+    )
+
+
+# ---- CACHE KEYS (also stored in summaries.input_hash) ----
+def medical_cache_key(input_text: str) -> str:
+    return cache_key(
+        input_text,
+        OPENAI_MODEL,
+        MEDICAL_SYSTEM_PROMPT + MEDICAL_PROMPT_TEMPLATE,
+        MEDICAL_TEMPERATURE,
+        MEDICAL_MAX_TOKENS,
+    )
+
+
+def clinical_cache_key(input_text: str) -> str:
+    return cache_key(input_text, OPENAI_MODEL, CLINICAL_SYSTEM_PROMPT, CLINICAL_TEMPERATURE, None)
+
+
+def _prompt_cache_key(template: str, text: str) -> str:
+    return cache_key(text, OPENAI_MODEL, CHUNK_SYSTEM_PROMPT + template, CHUNK_TEMPERATURE, SUMMARY_CHUNK_MAX_TOKENS)
+
+
+# ---- LONG TRANSCRIPTS (map-reduce) ----
+def is_long(input_text: str) -> bool:
+    return count_tokens(input_text) > SUMMARY_CHUNK_TOKENS
+
+
+def _merge_groups(summaries: List[str]) -> List[List[str]]:
+    # consecutive summaries packed into groups that fit one prompt
+    groups, current, used = [], [], 0
+    for summary in summaries:
+        size = count_tokens(summary)
+        if current and used + size > SUMMARY_CHUNK_TOKENS:
+            groups.append(current)
+            current, used = [], 0
+        current.append(summary)
+        used += size
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _reduce_request(summaries: List[str]) -> dict:
+    return _prompt_request(
+        REDUCE_PROMPT_TEMPLATE, "\n\n".join(summaries), MEDICAL_TEMPERATURE, MEDICAL_MAX_TOKENS
+    )
+
+
+def _clinical_reduce_request(summaries: List[str]) -> dict:
+    return clinical_request(CLINICAL_REDUCE_PROMPT_TEMPLATE.format(text="\n\n".join(summaries)))
+
+
+# ---- APPENDED SEGMENTS (rolling summary) ----
+def rolling_request(summary: str, text: str) -> dict:
+    return dict(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": MEDICAL_SYSTEM_PROMPT},
+            {"role": "user", "content": ROLLING_PROMPT_TEMPLATE.format(summary=summary, text=text)},
+        ],
+        temperature=MEDICAL_TEMPERATURE,
+        max_tokens=MEDICAL_MAX_TOKENS,
+    )
+
+
+def rolling_cache_key(summary: str, text: str) -> str:
+    return cache_key(
+        summary + "\n\n" + text, OPENAI_MODEL, ROLLING_PROMPT_TEMPLATE, MEDICAL_TEMPERATURE, MEDICAL_MAX_TOKENS
+    )
+
+
+# ---- SYNC ----
+def _call(request: dict) -> str:
+    # one completion, retries and hedges included
+    with stage("llm"):
+        response = caller.call(lambda: client.get().chat.completions.create(**request), estimate_tokens(request))
+    return response.choices[0].message.content.strip()
+
+
+def _open_stream(request: dict):
+    # retried until the stream is open; a stream failing midway is not
+    with stage("llm_stream_open"):
+        return caller.call(
+            lambda: client.get().chat.completions.create(**request, stream=True),
+            estimate_tokens(request),
+            hedge=False,
+        )
+
+
+def _complete(request: dict, key: str, persistent: bool = True) -> str:
+    cached = summary_cache.get(key, persistent)
+    if cached is not None:
+        return cached
+
+    summary = _call(request)
+    summary_cache.put(key, summary)
+    return summary
+
+
+def _summarize_parts(template: str, texts: List[str]) -> List[str]:
+    # chunk/merge results are cached on their own, so an edited transcript
+    # only pays for the parts that changed
+    def one(text: str) -> str:
+        request = _prompt_request(template, text, CHUNK_TEMPERATURE, SUMMARY_CHUNK_MAX_TOKENS)
+        return _complete(request, _prompt_cache_key(template, text), persistent=False)
+
+    if len(texts) == 1:
+        return [one(texts[0])]
+    with ThreadPoolExecutor(max_workers=min(SUMMARY_FANOUT, len(texts)), thread_name_prefix="llm-chunk") as executor:
+        return list(executor.map(one, texts))
+
+
+def _final_request(input_text: str, request: Callable[[str], dict], reduce: Callable[[List[str]], dict]) -> dict:
+    """The request that produces the summary: the transcript itself, or for a
+    long one, the merged chunk summaries (map and intermediate merges run here)."""
+    if not is_long(input_text):
+        return request(input_text)
+
+    summaries = _summarize_parts(CHUNK_PROMPT_TEMPLATE, chunk_text(input_text))
+    groups = _merge_groups(summaries)
+    while len(groups) > 1 and len(groups) < len(summaries):
+        summaries = _summarize_parts(MERGE_PROMPT_TEMPLATE, ["\n\n".join(group) for group in groups])
+        groups = _merge_groups(summaries)
+    return reduce(summaries)
+
+
+def medical_final_request(input_text: str) -> dict:
+    return _final_request(input_text, medical_request, _reduce_request)
+
+
+def clinical_final_request(input_text: str) -> dict:
+    return _final_request(input_text, clinical_request, _clinical_reduce_request)
+
+
+def update_medical_summary(summary: str, segment: str) -> str:
+    """Fold a newly appended transcript segment into an existing summary.
+
+    Only the segment is sent (condensed chunk by chunk if it is itself
+    long), so the cost follows the size of the delta, not the transcript.
+    """
+    text = "\n\n".join(_summarize_parts(CHUNK_PROMPT_TEMPLATE, chunk_text(segment))) if is_long(segment) else segment
+    return _complete(rolling_request(summary, text), rolling_cache_key(summary, text), persistent=False)
+
+
+def generate_medical_summary(input_text: str) -> str:
+    # cache lookups and chunk fan-out included; the "llm" stage is the calls alone
+    with stage("summarize"):
+        key = medical_cache_key(input_text)
+        cached = summary_cache.get(key)
+        if cached is not None:
+            return cached
+
+        summary = _call(medical_final_request(input_text))
+        summary_cache.put(key, summary)
+        return summary
+
+
+def generate_clinical_summary(input_text: str) -> str:
+    with stage("summarize"):
+        key = clinical_cache_key(input_text)
+        cached = summary_cache.get(key)
+        if cached is not None:
+            return cached
+
+        summary = _call(clinical_final_request(input_text))
+        summary_cache.put(key, summary)
+        return summary
+
+
+def _delta(chunk) -> str:
+    return (chunk.choices[0].delta.content or "") if chunk.choices else ""
+
+
+def stream_medical_summary(input_text: str) -> Iterator[str]:
+    """Yield the summary as it is generated (one cached chunk on a cache hit).
+
+    Closing the generator early closes the upstream HTTP response, which
+    aborts the completion.
+    """
+    key = medical_cache_key(input_text)
+    cached = summary_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    stream = _open_stream(medical_final_request(input_text))
+    parts = []
+    try:
+        for chunk in stream:
+            text = _delta(chunk)
+            if text:
+                parts.append(text)
+                yield text
+    finally:
+        stream.close()
+    summary_cache.put(key, "".join(parts).strip())
+
+
+# ---- BATCHED (job workers, BATCH_WINDOW_MS > 0) ----
+_batch_executor = ThreadPoolExecutor(
+    max_workers=BATCH_MAX_SIZE * BATCH_MAX_IN_FLIGHT, thread_name_prefix="llm-batch"
+)
+
+
+def generate_clinical_summaries(texts: List[str]) -> list:
+    # one batch = concurrent requests over the shared (pooled) HTTP client;
+    # identical texts inside a batch are only sent once
+    unique = list(dict.fromkeys(texts))
+    futures = {text: _batch_executor.submit(_call, clinical_request(text)) for text in unique}
+
+    results = {}
+    for text, future in futures.items():
+        try:
+            results[text] = future.result()
+            summary_cache.put(clinical_cache_key(text), results[text])
+        except Exception as e:
+            results[text] = e
+
+    return [results[text] for text in texts]
+
+
+clinical_batcher = (
+    MicroBatcher(generate_clinical_summaries, name="clinical-batcher")
+    if BATCH_WINDOW_MS > 0 else None
+)
+
+
+def generate_clinical_summary_batched(input_text: str) -> str:
+    # long transcripts are chunked, which a batch of single requests cannot do
+    if clinical_batcher is None or is_long(input_text):
+        return generate_clinical_summary(input_text)
+
+    cached = summary_cache.get(clinical_cache_key(input_text))
+    if cached is not None:
+        return cached
+    return clinical_batcher.submit(input_text).result()
+
+
+# ---- ASYNC ----
+async def _acall(request: dict) -> str:
+    with stage("llm"):
+        response = await caller.acall(
+            lambda: async_client.get().chat.completions.create(**request), estimate_tokens(request)
+        )
+    return response.choices[0].message.content.strip()
+
+
+async def _acomplete(request: dict, key: str, persistent: bool = True) -> str:
+    cached = await summary_cache.aget(key, persistent)
+    if cached is not None:
+        return cached
+
+    summary = await _acall(request)
+    summary_cache.put(key, summary)
+    return summary
+
+
+async def _asummarize_parts(template: str, texts: List[str]) -> List[str]:
+    semaphore = asyncio.Semaphore(SUMMARY_FANOUT)
+
+    async def one(text: str) -> str:
+        request = _prompt_request(template, text, CHUNK_TEMPERATURE, SUMMARY_CHUNK_MAX_TOKENS)
+        async with semaphore:
+            return await _acomplete(request, _prompt_cache_key(template, text), persistent=False)
+
+    return list(await asyncio.gather(*(one(text) for text in texts)))
+
+
+async def _afinal_request(
+    input_text: str, request: Callable[[str], dict], reduce: Callable[[List[str]], dict]
+) -> dict:
+    if not is_long(input_text):
+        return request(input_text)
+
+    summaries = await _asummarize_parts(CHUNK_PROMPT_TEMPLATE, chunk_text(input_text))
+    groups = _merge_groups(summaries)
+    while len(groups) > 1 and len(groups) < len(summaries):
+        summaries = await _asummarize_parts(MERGE_PROMPT_TEMPLATE, ["\n\n".join(group) for group in groups])
+        groups = _merge_groups(summaries)
+    return reduce(summaries)
+
+
+async def amedical_final_request(input_text: str) -> dict:
+    return await _afinal_request(input_text, medical_request, _reduce_request)
+
+
+async def aclinical_final_request(input_text: str) -> dict:
+    return await _afinal_request(input_text, clinical_request, _clinical_reduce_request)
+
+
+async def aupdate_medical_summary(summary: str, segment: str) -> str:
+    if is_long(segment):
+        text = "\n\n".join(await _asummarize_parts(CHUNK_PROMPT_TEMPLATE, chunk_text(segment)))
+    else:
+        text = segment
+    return await _acomplete(rolling_request(summary, text), rolling_cache_key(summary, text), persistent=False)
+
+
+async def agenerate_medical_summary(input_text: str) -> str:
+    with stage("summarize"):
+        key = medical_cache_key(input_text)
+        cached = await summary_cache.aget(key)
+        if cached is not None:
+            return cached
+
+        summary = await _acall(await amedical_final_request(input_text))
+        summary_cache.put(key, summary)
+        return summary
+
+
+async def agenerate_clinical_summary(input_text: str) -> str:
+    with stage("summarize"):
+        key = clinical_cache_key(input_text)
+        cached = await summary_cache.aget(key)
+        if cached is not None:
+            return cached
+
+        summary = await _acall(await aclinical_final_request(input_text))
+        summary_cache.put(key, summary)
+        return summary
+
+
+async def agenerate_clinical_summary_batched(input_text: str) -> str:
+    # joins the same batches as the sync path; the batch threads make the
+    # calls and the event loop only waits for this item's result
+    if clinical_batcher is None or is_long(input_text):
+        return await agenerate_clinical_summary(input_text)
+
+    cached = await summary_cache.aget(clinical_cache_key(input_text))
+    if cached is not None:
+        return cached
+    return await asyncio.wrap_future(clinical_batcher.submit(input_text))
+
+
+async def astream_medical_summary(input_text: str) -> AsyncIterator[str]:
+    key = medical_cache_key(input_text)
+    cached = await summary_cache.aget(key)
+    if cached is not None:
+        yield cached
+        return
+
+    request = await amedical_final_request(input_text)
+    with stage("llm_stream_open"):
+        stream = await caller.acall(
+            lambda: async_client.get().chat.completions.create(**request, stream=True),
+            estimate_tokens(request),
+            hedge=False,
+        )
+    parts = []
+    try:
+        async for chunk in stream:
+            text = _delta(chunk)
+            if text:
+                parts.append(text)
+                yield text
+    finally:
+        await stream.close()
+    summary_cache.put(key, "".join(parts).strip())
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import os
+from typing import Callable, Optional
+
+from services.job_store import JobRecord, JobStore
+
+
+# per-patient deletes remove this many rows per statement and commit in
+# between, so row locks on summaries are held for one chunk at a time
+SUMMARY_DELETE_CHUNK = int(os.environ.get("SUMMARY_DELETE_CHUNK", 1000))
+# background deletes (DELETE /summarizations/patient/{id}?async=true) running at once
+SUMMARY_DELETE_MAX_JOBS = int(os.environ.get("SUMMARY_DELETE_MAX_JOBS", 1))
+# background deletes accepted and not finished (running + waiting); past this, 429
+SUMMARY_DELETE_MAX_PENDING_JOBS = int(os.environ.get("SUMMARY_DELETE_MAX_PENDING_JOBS", 10))
+
+# each statement decides 404 vs success from its affected-row count; the
+# connections use CLIENT.FOUND_ROWS, so an UPDATE to identical values
+# still counts the row it matched. An edited row is no longer the model's
+# summary of its input, so input_hash is cleared and the summary cache's
+# table tier (services/summary_cache.py) stops serving it, as on append
+UPDATE_PATIENT_SUMMARY_SQL = (
+    "UPDATE summaries SET summary = %s, input_hash = NULL WHERE id = %s AND patient_id = %s"
+)
+UPDATE_SUMMARY_SQL = "UPDATE summaries SET input_text = %s, summary = %s, input_hash = NULL WHERE id = %s"
+DELETE_SUMMARY_SQL = "DELETE FROM summaries WHERE id = %s"
+# writes by id lock the row and read its patient in the same transaction,
+# so only that patient's cached lists are invalidated; the version is for
+# If-Match (utils/etags.py)
+SELECT_SUMMARY_PATIENT_SQL = "SELECT patient_id, version FROM summaries WHERE id = %s FOR UPDATE"
+DELETE_PATIENT_CHUNK_SQL = "DELETE FROM summaries WHERE patient_id = %s ORDER BY id LIMIT %s"
+PATIENT_EXISTS_SQL = "SELECT 1 AS found FROM summaries WHERE patient_id = %s LIMIT 1"
+COUNT_PATIENT_SQL = "SELECT COUNT(*) AS count FROM summaries WHERE patient_id = %s"
+
+
+# ---- SYNC ----
+def execute_write(conn, sql: str, params: tuple) -> int:
+    """Run one UPDATE/DELETE and commit; returns the affected rows."""
+    with conn.cursor() as cursor:
+        affected = cursor.execute(sql, params)
+    conn.commit()
+    return affected
+
+
+def execute_item_write(
+    conn, sql: str, params: tuple, summarization_id: int, check: Optional[Callable[[dict], None]] = None
+) -> Optional[str]:
+    """Run one UPDATE/DELETE of row ``summarization_id`` and commit; returns
+    the row's patient_id, or None (nothing written) if there is no such row.
+
+    ``check`` sees the locked row (patient_id, version) first and may raise
+    to refuse the write.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(SELECT_SUMMARY_PATIENT_SQL, (summarization_id,))
+        row = cursor.fetchone()
+        if row is not None:
+            if check is not None:
+                try:
+                    check(row)
+                except Exception:
+                    conn.rollback()
+                    raise
+            cursor.execute(sql, params)
+    conn.commit()
+    return row["patient_id"] if row is not None else None
+
+
+def delete_patient_summaries(
+    conn,
+    patient_id: str,
+    chunk: int = SUMMARY_DELETE_CHUNK,
+    on_chunk: Optional[Callable[[int], None]] = None,
+) -> int:
+    deleted = 0
+    while True:
+        affected = execute_write(conn, DELETE_PATIENT_CHUNK_SQL, (patient_id, chunk))
+        deleted += affected
+        if on_chunk and affected:
+            on_chunk(affected)
+        if affected < chunk:
+            return deleted
+
+
+def patient_exists(conn, patient_id: str) -> bool:
+    with conn.cursor() as cursor:
+        cursor.execute(PATIENT_EXISTS_SQL, (patient_id,))
+        return cursor.fetchone() is not None
+
+
+def count_patient_summaries(conn, patient_id: str) -> int:
+    with conn.cursor() as cursor:
+        cursor.execute(COUNT_PATIENT_SQL, (patient_id,))
+        return int(cursor.fetchone()["count"])
+
+
+# ---- ASYNC ----
+async def aexecute_write(conn, sql: str, params: tuple) -> int:
+    async with conn.cursor() as cursor:
+        affected = await cursor.execute(sql, params)
+    await conn.commit()
+    return affected
+
+
+async def aexecute_item_write(
+    conn, sql: str, params: tuple, summarization_id: int, check: Optional[Callable[[dict], None]] = None
+) -> Optional[str]:
+    async with conn.cursor() as cursor:
+        await cursor.execute(SELECT_SUMMARY_PATIENT_SQL, (summarization_id,))
+        row = await cursor.fetchone()
+        if row is not None:
+            if check is not None:
+                try:
+                    check(row)
+                except Exception:
+                    await conn.rollback()
+                    raise
+            await cursor.execute(sql, params)
+    await conn.commit()
+    return row["patient_id"] if row is not None else None
+
+
+async def adelete_patient_summaries(
+    conn,
+    patient_id: str,
+    chunk: int = SUMMARY_DELETE_CHUNK,
+    on_chunk: Optional[Callable[[int], None]] = None,
+) -> int:
+    deleted = 0
+    while True:
+        affected = await aexecute_write(conn, DELETE_PATIENT_CHUNK_SQL, (patient_id, chunk))
+        deleted += affected
+        if on_chunk and affected:
+            on_chunk(affected)
+        if affected < chunk:
+            return deleted
+
+
+async def apatient_exists(conn, patient_id: str) -> bool:
+    async with conn.cursor() as cursor:
+        await cursor.execute(PATIENT_EXISTS_SQL, (patient_id,))
+        return await cursor.fetchone() is not None
+
+
+async def acount_patient_summaries(conn, patient_id: str) -> int:
+    async with conn.cursor() as cursor:
+        await cursor.execute(COUNT_PATIENT_SQL, (patient_id,))
+        return int((await cursor.fetchone())["count"])
+
+
+# ---- PROGRESS (delete jobs) ----
+def new_delete_job(job_id: str, patient_id: str, store: JobStore):
+    store.add(JobRecord(job_id, kind="delete", patient_id=patient_id, processed=0, failed=0))
+
+
+def delete_job_progress(
+    job_id: str, store: JobStore, notify: Callable[[str, Optional[JobRecord]], None]
+) -> Callable[[int], None]:
+    def on_chunk(deleted: int):
+        notify(job_id, store.add_progress(job_id, deleted, 0))
+
+    return on_chunk
+
+
+def delete_job_response(job_id: str, patient_id: str) -> dict:
+    return {
+        "job_id": job_id,
+        "patient_id": patient_id,
+        "status": "pending",
+        "links": [
+            {"rel": "status", "href": f"/jobs/{job_id}"},
+            {"rel": "collection", "href": "/summarizations"}
+        ]
+    }
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+
+from fastapi import HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from services.job_store import JobRecord
+from services.jobs import job_response, job_store
+
+
+# seconds between SSE keep-alive comments (stops proxies closing idle streams)
+JOB_EVENTS_KEEPALIVE = float(os.environ.get("JOB_EVENTS_KEEPALIVE", 15))
+# job ids a single WebSocket may follow
+JOB_EVENTS_MAX_SUBSCRIPTIONS = int(os.environ.get("JOB_EVENTS_MAX_SUBSCRIPTIONS", 1000))
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+# looks up the current state of a job as a job_response (None = unknown)
+JobLookup = Callable[[str], Awaitable[Optional[dict]]]
+
+
+class Subscription:
+    """One listener (an SSE stream or a WebSocket) following a set of jobs.
+
+    Updates are delivered on the listener's own event loop, so the hub can
+    be notified from worker threads and from async tasks alike.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue()
+        self.job_ids: Set[str] = set()
+
+    def deliver(self, update: dict):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, update)
+
+
+class JobHub:
+    """In-process fan-out of job state transitions to open SSE/WebSocket clients."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self.connections = 0
+        self.notified = 0
+        self.delivered = 0
+
+    def subscribe(self, job_ids: Iterable[str] = ()) -> Subscription:
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self.connections += 1
+        self.add(subscription, job_ids)
+        return subscription
+
+    def add(self, subscription: Subscription, job_ids: Iterable[str]):
+        with self._lock:
+            for job_id in job_ids:
+                subscription.job_ids.add(job_id)
+                self._subscribers.setdefault(job_id, set()).add(subscription)
+
+    def remove(self, subscription: Subscription, job_ids: Iterable[str]):
+        with self._lock:
+            for job_id in job_ids:
+                subscription.job_ids.discard(job_id)
+                listeners = self._subscribers.get(job_id)
+                if listeners is not None:
+                    listeners.discard(subscription)
+                    if not listeners:
+                        del self._subscribers[job_id]
+
+    def unsubscribe(self, subscription: Subscription):
+        self.remove(subscription, list(subscription.job_ids))
+        with self._lock:
+            self.connections -= 1
+
+    def notify(self, job_id: str, record: Optional[JobRecord] = None):
+        """Push the job's current state to everyone following it.
+
+        Callers pass the record they just updated; without one it is read
+        from the job store (a query with MySQLJobStore), and only when
+        someone is listening.
+        """
+        with self._lock:
+            listeners = list(self._subscribers.get(job_id, ()))
+            self.notified += 1
+        if not listeners:
+            return
+
+        if record is None:
+            record = job_store.get(job_id)
+        if record is None:
+            return
+        update = job_response(record)
+        for subscription in listeners:
+            try:
+                subscription.deliver(update)
+            except RuntimeError:
+                # the listener's loop is closed; it unsubscribes on its way out
+                continue
+            with self._lock:
+                self.delivered += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "connections": self.connections,
+                "jobs_followed": len(self._subscribers),
+                "notified": self.notified,
+                "delivered": self.delivered,
+            }
+
+
+job_hub = JobHub()
+
+
+def _sse(update: dict) -> str:
+    return f"event: {update['status']}\ndata: {json.dumps(update)}\n\n"
+
+
+async def job_event_stream(
+    request: Request, job_id: str, subscription: Subscription, first: dict, lookup: JobLookup
+):
+    """SSE body: the current state, then every transition until the job finishes.
+
+    The hub only hears about jobs run by this worker, so each keep-alive
+    also looks the job up again; a job run by another worker (or replica)
+    is followed at that interval.
+    """
+    try:
+        last = first
+        yield _sse(first)
+        if first["status"] in TERMINAL_STATUSES:
+            return
+        while not await request.is_disconnected():
+            try:
+                update = await asyncio.wait_for(subscription.queue.get(), JOB_EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                update = await lookup(job_id)
+                if update is None or update == last:
+                    yield ": keep-alive\n\n"
+                    continue
+            last = update
+            yield _sse(update)
+            if update["status"] in TERMINAL_STATUSES:
+                return
+    finally:
+        job_hub.unsubscribe(subscription)
+
+
+async def open_job_stream(request: Request, job_id: str, lookup: JobLookup) -> StreamingResponse:
+    # subscribe before reading the state so no transition falls in between
+    subscription = job_hub.subscribe([job_id])
+    try:
+        state = await lookup(job_id)
+    except Exception:
+        job_hub.unsubscribe(subscription)
+        raise
+    if state is None:
+        job_hub.unsubscribe(subscription)
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return StreamingResponse(
+        job_event_stream(request, job_id, subscription, state, lookup),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _receive_message(websocket: WebSocket):
+    """The next frame's JSON value, or None if it is not JSON text."""
+    frame = await websocket.receive()
+    if frame["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(frame.get("code", 1000))
+    try:
+        return json.loads(frame.get("text") or "")
+    except json.JSONDecodeError:
+        return None
+
+
+def _job_ids(message: dict, key: str) -> Optional[list]:
+    """The job ids under ``key`` (missing = none), or None if they are not a list of strings."""
+    job_ids = message.get(key) or []
+    if not isinstance(job_ids, list) or not all(isinstance(job_id, str) for job_id in job_ids):
+        return None
+    return job_ids
+
+
+async def serve_job_socket(websocket: WebSocket, lookup: JobLookup, job_ids: Iterable[str] = ()):
+    """WebSocket loop for following many jobs on one connection.
+
+    Clients send ``{"subscribe": [...]}`` / ``{"unsubscribe": [...]}``; each
+    subscribed job is answered with its current state and then pushed every
+    transition. Finished jobs are dropped from the subscription. Every
+    JOB_EVENTS_KEEPALIVE seconds without traffic the jobs are looked up
+    again, for those run by another worker. A frame that is not a JSON
+    object is answered with an error and the connection stays open.
+    """
+    await websocket.accept()
+    subscription = job_hub.subscribe()
+    last: Dict[str, dict] = {}
+
+    async def follow(ids: Iterable[str]):
+        for job_id in ids:
+            if job_id in subscription.job_ids:
+                continue
+            if len(subscription.job_ids) >= JOB_EVENTS_MAX_SUBSCRIPTIONS:
+                await websocket.send_json({"job_id": job_id, "error": "too many subscriptions"})
+                continue
+            job_hub.add(subscription, [job_id])
+            state = await lookup(job_id)
+            if state is None:
+                job_hub.remove(subscription, [job_id])
+                await websocket.send_json({"job_id": job_id, "error": "Job not found"})
+            else:
+                await send(state)
+
+    async def send(update: dict):
+        job_id = update["job_id"]
+        if update["status"] in TERMINAL_STATUSES:
+            job_hub.remove(subscription, [job_id])
+            last.pop(job_id, None)
+        else:
+            last[job_id] = update
+        await websocket.send_json(update)
+
+    async def refresh():
+        for job_id in list(subscription.job_ids):
+            state = await lookup(job_id)
+            if state is not None and state != last.get(job_id) and job_id in subscription.job_ids:
+                await send(state)
+
+    receive = asyncio.ensure_future(_receive_message(websocket))
+    update = asyncio.ensure_future(subscription.queue.get())
+    try:
+        await follow(job_ids)
+        while True:
+            done, _ = await asyncio.wait(
+                {receive, update}, timeout=JOB_EVENTS_KEEPALIVE, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                await refresh()
+            if update in done:
+                await send(update.result())
+                update = asyncio.ensure_future(subscription.queue.get())
+            if receive in done:
+                message = receive.result()
+                if not isinstance(message, dict):
+                    await websocket.send_json({"error": "expected a JSON object"})
+                else:
+                    unsubscribe = _job_ids(message, "unsubscribe")
+                    subscribe = _job_ids(message, "subscribe")
+                    if unsubscribe is None or subscribe is None:
+                        await websocket.send_json({"error": "subscribe/unsubscribe must be lists of job ids"})
+                    else:
+                        job_hub.remove(subscription, unsubscribe)
+                        for job_id in unsubscribe:
+                            last.pop(job_id, None)
+                        await follow(subscribe)
+                receive = asyncio.ensure_future(_receive_message(websocket))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receive.cancel()
+        update.cancel()
+        job_hub.unsubscribe(subscription)
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+
+from framework.lazy import LazyResource
+from services.events import EventEmitter, FakePublisher
+
+
+# "gcp" = Google Cloud Pub/Sub; "fake" = in-memory FakePublisher (local runs, load tests)
+PUBSUB_BACKEND = os.environ.get("PUBSUB_BACKEND", "gcp").lower()
+PUBSUB_FAKE_LATENCY_MS = float(os.environ.get("PUBSUB_FAKE_LATENCY_MS", 0))
+PUBSUB_PROJECT = os.environ.get("PUBSUB_PROJECT", "cloudcomputing-473814")
+PUBSUB_TOPIC = os.environ.get("PUBSUB_TOPIC", "summarization-events")
+
+# client-side batching; the publisher sends when any limit is hit
+PUBSUB_BATCH_MAX_MESSAGES = int(os.environ.get("PUBSUB_BATCH_MAX_MESSAGES", 100))
+PUBSUB_BATCH_MAX_BYTES = int(os.environ.get("PUBSUB_BATCH_MAX_BYTES", 1024 * 1024))
+PUBSUB_BATCH_MAX_LATENCY = float(os.environ.get("PUBSUB_BATCH_MAX_LATENCY", 0.05))
+
+
+def _make_publisher():
+    if PUBSUB_BACKEND == "fake":
+        return FakePublisher(latency=PUBSUB_FAKE_LATENCY_MS / 1000)
+
+    from google.cloud import pubsub_v1  # heavy import, deferred until first use
+
+    return pubsub_v1.PublisherClient(
+        batch_settings=pubsub_v1.types.BatchSettings(
+            max_messages=PUBSUB_BATCH_MAX_MESSAGES,
+            max_bytes=PUBSUB_BATCH_MAX_BYTES,
+            max_latency=PUBSUB_BATCH_MAX_LATENCY,
+        )
+    )
+
+
+publisher = LazyResource("pubsub", _make_publisher)
+topic_path = f"projects/{PUBSUB_PROJECT}/topics/{PUBSUB_TOPIC}"
+
+# handlers emit through this; never call publisher.publish on the request path
+events = EventEmitter(publisher.get, topic_path)
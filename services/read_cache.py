@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+
+from framework.lazy import LazyResource
+from middleware import metrics
+
+
+# -----------------------------------------------------------------------------
+# Config
+# -----------------------------------------------------------------------------
+# "memory" = per replica (other replicas' writes are seen after at most the
+# TTL); "redis" = shared entries and generations, coherent across replicas;
+# "off" = every GET goes to MySQL
+READ_CACHE_BACKEND = os.environ.get("READ_CACHE_BACKEND", "memory").lower()
+READ_CACHE_TTL = float(os.environ.get("READ_CACHE_TTL", 10))
+READ_CACHE_MAX_ENTRIES = int(os.environ.get("READ_CACHE_MAX_ENTRIES", 10000))
+# generation counters kept in process before the least recently bumped are folded
+READ_CACHE_MAX_SCOPES = int(os.environ.get("READ_CACHE_MAX_SCOPES", 100000))
+READ_CACHE_REDIS_URL = os.environ.get("READ_CACHE_REDIS_URL", "redis://127.0.0.1:6379/0")
+READ_CACHE_REDIS_PREFIX = os.environ.get("READ_CACHE_REDIS_PREFIX", "summarizations:")
+READ_CACHE_REDIS_TIMEOUT = float(os.environ.get("READ_CACHE_REDIS_TIMEOUT", 0.05))
+
+if READ_CACHE_BACKEND not in ("memory", "redis", "off"):
+    raise ValueError(f"READ_CACHE_BACKEND must be 'memory', 'redis' or 'off', got {READ_CACHE_BACKEND!r}")
+
+
+# -----------------------------------------------------------------------------
+# Scopes: an entry is valid while every scope it was read under is unchanged
+# -----------------------------------------------------------------------------
+ALL = "all"            # unfiltered list pages
+PURGE = "purge"        # per-patient deletes, whose ids are not known
+
+
+def patient_scope(patient_id: str) -> str:
+    return f"patient:{patient_id}"
+
+
+def item_scope(summarization_id: int) -> str:
+    return f"item:{summarization_id}"
+
+
+def list_scopes(patient_id: Optional[str]) -> Tuple[str, ...]:
+    return (patient_scope(patient_id),) if patient_id is not None else (ALL,)
+
+
+def item_scopes(summarization_id: int) -> Tuple[str, ...]:
+    return (item_scope(summarization_id), PURGE)
+
+
+# variant: the ?fields=/?links= representation (utils/projection.py)
+def list_key(patient_id: Optional[str], cursor: Optional[str], limit: int, offset: int, variant: str = "") -> str:
+    return json.dumps(["list", patient_id, cursor, limit, offset, variant], separators=(",", ":"))
+
+
+def item_key(summarization_id: int, variant: str = "") -> str:
+    return json.dumps(["item", summarization_id, variant], separators=(",", ":"))
+
+
+class Entry(NamedTuple):
+    value: Any
+    generations: Tuple[int, ...]
+    stored_at: float  # wall clock, comparable across replicas
+
+
+class Lookup(NamedTuple):
+    key: str
+    scopes: Tuple[str, ...]
+    generations: Tuple[int, ...]  # current, captured before the database read
+    value: Any = None
+    hit: bool = False
+    age: float = 0.0
+
+
+# -----------------------------------------------------------------------------
+# Backends
+# -----------------------------------------------------------------------------
+class MemoryBackend:
+    """LRU of entries plus generation counters, all in this process."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = READ_CACHE_MAX_ENTRIES, ttl: float = READ_CACHE_TTL,
+                 max_scopes: int = READ_CACHE_MAX_SCOPES):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_scopes = max_scopes
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self._generations: "OrderedDict[str, int]" = OrderedDict()
+        # generations come from one counter; a scope folded out of the table
+        # reads as the highest folded value, so entries stored under it
+        # before its last bump can never validate
+        self._counter = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def _generation(self, scope: str) -> int:
+        return self._generations.get(scope, self._floor)
+
+    def lookup(self, key: str, scopes: Sequence[str]) -> Tuple[Optional[Entry], Tuple[int, ...]]:
+        with self._lock:
+            generations = tuple(self._generation(scope) for scope in scopes)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if time.time() - entry.stored_at > self.ttl:
+                    del self._entries[key]
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+            return entry, generations
+
+    def store(self, key: str, scopes: Sequence[str], entry: Entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def bump(self, scopes: Sequence[str]):
+        with self._lock:
+            for scope in scopes:
+                self._counter += 1
+                self._generations[scope] = self._counter
+                self._generations.move_to_end(scope)
+            while len(self._generations) > self.max_scopes:
+                _, generation = self._generations.popitem(last=False)
+                self._floor = max(self._floor, generation)
+
+    async def alookup(self, key: str, scopes: Sequence[str]):
+        return self.lookup(key, scopes)
+
+    async def astore(self, key: str, scopes: Sequence[str], entry: Entry):
+        self.store(key, scopes, entry)
+
+    async def abump(self, scopes: Sequence[str]):
+        self.bump(scopes)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "scopes": len(self._generations),
+            }
+
+
+def _make_redis():
+    import redis  # optional; only needed with READ_CACHE_BACKEND=redis
+
+    return redis.Redis.from_url(
+        READ_CACHE_REDIS_URL, socket_timeout=READ_CACHE_REDIS_TIMEOUT, socket_connect_timeout=READ_CACHE_REDIS_TIMEOUT
+    )
+
+
+def _make_async_redis():
+    import redis.asyncio
+
+    return redis.asyncio.Redis.from_url(
+        READ_CACHE_REDIS_URL, socket_timeout=READ_CACHE_REDIS_TIMEOUT, socket_connect_timeout=READ_CACHE_REDIS_TIMEOUT
+    )
+
+
+class RedisBackend:
+    """Entries and generations in Redis, shared by every replica.
+
+    A lookup is one MGET of the entry and its scopes' counters; a bump is
+    one pipelined INCR per scope. Counters outlive the entries read under
+    them: every lookup, store and bump pushes a counter's expiry out to 2x
+    TTL, and an entry is only stored while its counters still exist, so it
+    is never checked against a counter that expired and restarted.
+    """
+
+    name = "redis"
+
+    def __init__(self, ttl: float = READ_CACHE_TTL, prefix: str = READ_CACHE_REDIS_PREFIX):
+        self.ttl = ttl
+        self.prefix = prefix
+        self.counter_ttl = int(ttl * 2) + 1
+        self.client = LazyResource("redis", _make_redis, close=lambda c: c.close())
+        # the asyncio client belongs to the running loop; created on first await
+        self._async_client = None
+
+    def _async(self):
+        if self._async_client is None:
+            self._async_client = _make_async_redis()
+        return self._async_client
+
+    def _keys(self, key: str, scopes: Sequence[str]) -> List[str]:
+        return [self.prefix + "entry:" + key] + [self.prefix + "gen:" + scope for scope in scopes]
+
+    @staticmethod
+    def _decode(values: list) -> Tuple[Optional[Entry], Tuple[int, ...]]:
+        raw, counters = values[0], values[1:]
+        generations = tuple(int(value) if value is not None else 0 for value in counters)
+        if raw is None:
+            return None, generations
+        value, stored_generations, stored_at = json.loads(raw)
+        return Entry(value, tuple(stored_generations), stored_at), generations
+
+    def _encode(self, entry: Entry) -> bytes:
+        return json.dumps([entry.value, list(entry.generations), entry.stored_at], separators=(",", ":")).encode("utf-8")
+
+    def _bump_commands(self, pipeline, scopes: Sequence[str]):
+        for scope in scopes:
+            pipeline.incr(self.prefix + "gen:" + scope)
+            pipeline.expire(self.prefix + "gen:" + scope, self.counter_ttl)
+
+    def _lookup_commands(self, pipeline, key: str, scopes: Sequence[str]):
+        keys = self._keys(key, scopes)
+        pipeline.mget(keys)
+        for counter in keys[1:]:
+            pipeline.expire(counter, self.counter_ttl)
+
+    def _refresh_commands(self, pipeline, scopes: Sequence[str], entry: Entry) -> int:
+        # counters at 0 did not exist when read; their first INCR moves them
+        live = [scope for scope, generation in zip(scopes, entry.generations) if generation]
+        for scope in live:
+            pipeline.expire(self.prefix + "gen:" + scope, self.counter_ttl)
+        return len(live)
+
+    def lookup(self, key: str, scopes: Sequence[str]):
+        pipeline = self.client.get().pipeline(transaction=False)
+        self._lookup_commands(pipeline, key, scopes)
+        return self._decode(pipeline.execute()[0])
+
+    def store(self, key: str, scopes: Sequence[str], entry: Entry):
+        client = self.client.get()
+        pipeline = client.pipeline(transaction=False)
+        if self._refresh_commands(pipeline, scopes, entry) and not all(pipeline.execute()):
+            return  # a counter expired since the lookup; it may restart at this generation
+        client.set(self.prefix + "entry:" + key, self._encode(entry), px=int(self.ttl * 1000))
+
+    def bump(self, scopes: Sequence[str]):
+        pipeline = self.client.get().pipeline(transaction=False)
+        self._bump_commands(pipeline, scopes)
+        pipeline.execute()
+
+    async def alookup(self, key: str, scopes: Sequence[str]):
+        pipeline = self._async().pipeline(transaction=False)
+        self._lookup_commands(pipeline, key, scopes)
+        return self._decode((await pipeline.execute())[0])
+
+    async def astore(self, key: str, scopes: Sequence[str], entry: Entry):
+        client = self._async()
+        pipeline = client.pipeline(transaction=False)
+        if self._refresh_commands(pipeline, scopes, entry) and not all(await pipeline.execute()):
+            return
+        await client.set(self.prefix + "entry:" + key, self._encode(entry), px=int(self.ttl * 1000))
+
+    async def abump(self, scopes: Sequence[str]):
+        pipeline = self._async().pipeline(transaction=False)
+        self._bump_commands(pipeline, scopes)
+        await pipeline.execute()
+
+    def stats(self) -> dict:
+        return {"url": READ_CACHE_REDIS_URL.rsplit("@", 1)[-1], "prefix": self.prefix}
+
+
+# -----------------------------------------------------------------------------
+# Read-through cache
+# -----------------------------------------------------------------------------
+read_cache_age = metrics.registry.histogram(
+    "summarizer_read_cache_age_seconds",
+    "Age of read cache entries when served (staleness bound for other replicas' writes)",
+)
+
+
+class ReadCache:
+    """Read-through cache for GET results, invalidated by generation counters.
+
+    Every write bumps the counters of the scopes it touches (its patient,
+    the unfiltered list, the item); an entry records the counters it was
+    read under and is ignored once any of them moved. The counters are
+    captured before the database read, so a write racing a miss makes the
+    filled entry invalid instead of stale. Cache errors never fail a
+    request: lookups fall back to the database, failed bumps are counted.
+    """
+
+    def __init__(self, backend=None, ttl: float = READ_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0  # found, but a write moved one of its scopes
+        self.errors = 0
+        self.invalidation_errors = 0
+        self.age_total = 0.0
+        self.age_max = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _resolve(self, key: str, scopes: Tuple[str, ...], found) -> Lookup:
+        entry, generations = found
+        with self._lock:
+            if entry is not None and entry.generations == generations:
+                age = max(0.0, time.time() - entry.stored_at)
+                self.hits += 1
+                self.age_total += age
+                self.age_max = max(self.age_max, age)
+                read_cache_age.observe(age)
+                return Lookup(key, scopes, generations, entry.value, True, age)
+            if entry is not None:
+                self.invalidated += 1
+            self.misses += 1
+        return Lookup(key, scopes, generations)
+
+    def _miss(self, key: str, scopes: Tuple[str, ...]) -> Lookup:
+        with self._lock:
+            self.errors += 1
+            self.misses += 1
+        return Lookup(key, scopes, ())
+
+    def _error(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    # ---- sync ----
+    def get(self, key: str, scopes: Tuple[str, ...]) -> Lookup:
+        if self.backend is None:
+            return Lookup(key, scopes, ())
+        try:
+            return self._resolve(key, scopes, self.backend.lookup(key, scopes))
+        except Exception:
+            return self._miss(key, scopes)
+
+    def put(self, lookup: Lookup, value):
+        if self.backend is None or not lookup.generations:
+            return  # disabled, or the lookup itself failed
+        try:
+            self.backend.store(lookup.key, lookup.scopes, Entry(value, lookup.generations, time.time()))
+        except Exception:
+            self._error("errors")
+
+    def invalidate(self, *scopes: str):
+        if self.backend is None:
+            return
+        try:
+            self.backend.bump(scopes)
+        except Exception:
+            self._error("invalidation_errors")
+
+    # ---- async ----
+    async def aget(self, key: str, scopes: Tuple[str, ...]) -> Lookup:
+        if self.backend is None:
+            return Lookup(key, scopes, ())
+        try:
+            return self._resolve(key, scopes, await self.backend.alookup(key, scopes))
+        except Exception:
+            return self._miss(key, scopes)
+
+    async def aput(self, lookup: Lookup, value):
+        if self.backend is None or not lookup.generations:
+            return
+        try:
+            await self.backend.astore(lookup.key, lookup.scopes, Entry(value, lookup.generations, time.time()))
+        except Exception:
+            self._error("errors")
+
+    async def ainvalidate(self, *scopes: str):
+        if self.backend is None:
+            return
+        try:
+            await self.backend.abump(scopes)
+        except Exception:
+            self._error("invalidation_errors")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "backend": self.backend.name if self.backend is not None else "off",
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidated": self.invalidated,
+                "errors": self.errors,
+                "invalidation_errors": self.invalidation_errors,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "avg_age_ms": self.age_total / self.hits * 1000 if self.hits else 0.0,
+                "max_age_ms": self.age_max * 1000,
+            }
+        if self.backend is not None:
+            stats.update(self.backend.stats())
+        return stats
+
+
+def _make_backend():
+    if READ_CACHE_BACKEND == "memory":
+        return MemoryBackend()
+    if READ_CACHE_BACKEND == "redis":
+        return RedisBackend()
+    return None
+
+
+read_cache = ReadCache(_make_backend())
+
+metrics.registry.counter(
+    "summarizer_read_cache_lookups_total", "Read cache lookups by result",
+    lambda: {
+        ("hit",): read_cache.hits,
+        ("miss",): read_cache.misses - read_cache.invalidated,
+        ("invalidated",): read_cache.invalidated,
+    },
+    ("result",),
+)
+
+
+# ---- invalidation, one call per kind of write ----
+def invalidate_patient(patient_id: str, summarization_id: Optional[int] = None):
+    """Rows of ``patient_id`` were created or changed (``summarization_id``, if one)."""
+    scopes = (ALL, patient_scope(patient_id))
+    read_cache.invalidate(*scopes, *((item_scope(summarization_id),) if summarization_id is not None else ()))
+
+
+def invalidate_patient_rows(patient_id: str):
+    """Rows of ``patient_id`` were deleted without knowing their ids."""
+    read_cache.invalidate(ALL, patient_scope(patient_id), PURGE)
+
+
+def invalidate_patients(patient_ids):
+    scopes = {patient_scope(patient_id) for patient_id in patient_ids}
+    if scopes:
+        read_cache.invalidate(ALL, *sorted(scopes))
+
+
+async def ainvalidate_patient(patient_id: str, summarization_id: Optional[int] = None):
+    scopes = (ALL, patient_scope(patient_id))
+    await read_cache.ainvalidate(*scopes, *((item_scope(summarization_id),) if summarization_id is not None else ()))
+
+
+async def ainvalidate_patient_rows(patient_id: str):
+    await read_cache.ainvalidate(ALL, patient_scope(patient_id), PURGE)
+
+
+async def ainvalidate_patients(patient_ids):
+    scopes = {patient_scope(patient_id) for patient_id in patient_ids}
+    if scopes:
+        await read_cache.ainvalidate(ALL, *sorted(scopes))
+
+
+def set_cache_headers(response, lookup: Lookup):
+    # Age (RFC 9111) is how stale a hit may be when another replica wrote
+    response.headers["X-Cache"] = "HIT" if lookup.hit else "MISS"
+    if lookup.hit:
+        response.headers["Age"] = str(int(lookup.age))
@@ -0,0 +1,479 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import Awaitable, Callable, Optional
+
+
+# -----------------------------------------------------------------------------
+# Config
+# -----------------------------------------------------------------------------
+# seconds before a single upstream attempt is abandoned
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 30))
+# extra attempts after a retryable failure (429, 5xx, timeout, connection)
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 2))
+LLM_BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE", 0.5))
+LLM_BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX", 8))
+# send a second, identical request when the first is slower than the recent
+# p95 (never sooner than LLM_HEDGE_MIN_DELAY_MS); first answer wins
+LLM_HEDGE = os.environ.get("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_MIN_DELAY_MS = float(os.environ.get("LLM_HEDGE_MIN_DELAY_MS", 200))
+LLM_HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", 20))
+# account quotas (0 = unlimited); a call waits at most LLM_RATE_MAX_WAIT
+# seconds for quota before it is refused with 503
+LLM_RPM = int(os.environ.get("LLM_RPM", 0))
+LLM_TPM = int(os.environ.get("LLM_TPM", 0))
+LLM_RATE_MAX_WAIT = float(os.environ.get("LLM_RATE_MAX_WAIT", 5))
+# consecutive failed attempts that open the breaker, and seconds it stays
+# open before one probe request is let through
+LLM_BREAKER_FAILURES = int(os.environ.get("LLM_BREAKER_FAILURES", 5))
+LLM_BREAKER_RESET = float(os.environ.get("LLM_BREAKER_RESET", 30))
+
+_LATENCY_WINDOW = 200
+
+
+class LLMUnavailable(Exception):
+    """The LLM cannot answer now (breaker open, out of quota, retries spent);
+    carries a Retry-After hint. Served as 503 unless a fallback backend answers."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+
+def is_retryable(exc: Exception) -> bool:
+    try:
+        import openai
+    except ImportError:
+        return False
+    return isinstance(exc, (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError))
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    # honour the upstream hint on 429/503 responses
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+# -----------------------------------------------------------------------------
+# Token bucket (requests and tokens per minute)
+# -----------------------------------------------------------------------------
+class TokenBucket:
+    """Refills at ``per_minute / 60`` per second up to ``per_minute``.
+
+    ``reserve`` takes the amount immediately (the level may go negative)
+    and returns how long the caller must wait before using it, so the same
+    bucket serves threads (time.sleep) and coroutines (asyncio.sleep).
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float, max_wait: float) -> Optional[float]:
+        """Seconds to wait, or None (nothing taken) if that would exceed ``max_wait``."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            amount = min(amount, self.capacity)  # an oversized request still gets through eventually
+            delay = max((amount - self._level) / self.rate, self._blocked_until - now, 0.0)
+            if delay > max_wait:
+                return None
+            self._level -= amount
+            return delay
+
+    def credit(self, amount: float):
+        """Give back (or, negative, take more of) a reservation once the real size is known."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level = min(self.capacity, self._level + amount)
+
+    def block(self, seconds: float):
+        # upstream said we are over quota; nothing goes out until then
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def level(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._level
+
+
+class RateLimiter:
+    def __init__(self, rpm: int = LLM_RPM, tpm: int = LLM_TPM, max_wait: float = LLM_RATE_MAX_WAIT):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.max_wait = max_wait
+        self.waited = 0.0
+        self.rejected = 0
+
+    def acquire(self, tokens: int, max_wait: Optional[float] = None) -> float:
+        """Reserve one request and ``tokens`` tokens; seconds to wait first.
+
+        Raises LLMUnavailable when quota would not be available within ``max_wait``.
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        delays = []
+        if self.requests is not None:
+            delay = self.requests.reserve(1, max_wait)
+            if delay is None:
+                self.rejected += 1
+                raise LLMUnavailable("LLM request quota exhausted", retry_after=60 / self.requests.capacity)
+            delays.append(delay)
+        if self.tokens is not None:
+            delay = self.tokens.reserve(tokens, max_wait)
+            if delay is None:
+                if self.requests is not None:
+                    self.requests.credit(1)
+                self.rejected += 1
+                raise LLMUnavailable("LLM token quota exhausted", retry_after=tokens / self.tokens.rate)
+            delays.append(delay)
+        delay = max(delays, default=0.0)
+        self.waited += delay
+        return delay
+
+    def settle(self, estimated: int, used: Optional[int]):
+        if self.tokens is not None and used is not None:
+            self.tokens.credit(estimated - used)
+
+    def block(self, seconds: float):
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.block(seconds)
+
+    def stats(self) -> dict:
+        return {
+            "rpm": self.requests.capacity if self.requests else None,
+            "tpm": self.tokens.capacity if self.tokens else None,
+            "requests_available": self.requests.level() if self.requests else None,
+            "tokens_available": self.tokens.level() if self.tokens else None,
+            "waited_seconds": self.waited,
+            "rejected": self.rejected,
+        }
+
+
+# -----------------------------------------------------------------------------
+# Circuit breaker
+# -----------------------------------------------------------------------------
+class CircuitBreaker:
+    """closed -> open after ``failures`` consecutive failed attempts; open ->
+    half-open after ``reset`` seconds, when a single probe decides whether
+    it closes again. While open, calls fail at once instead of queueing on
+    a struggling upstream."""
+
+    def __init__(self, failures: int = LLM_BREAKER_FAILURES, reset: float = LLM_BREAKER_RESET):
+        self.failures = failures
+        self.reset = reset
+        self.state = "closed"
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._probing: Optional[object] = None  # token of the probe in flight
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def before(self) -> Optional[object]:
+        """Admit an attempt; returns a probe token when it is the half-open probe."""
+        with self._lock:
+            if self.state == "closed":
+                return None
+            remaining = self._opened_at + self.reset - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and self._probing is None:
+                self._probing = object()
+                return self._probing
+            self.rejected += 1
+            raise LLMUnavailable("LLM circuit breaker is open", retry_after=max(remaining, 1))
+
+    def success(self):
+        with self._lock:
+            self.state = "closed"
+            self._consecutive = 0
+            self._probing = None
+
+    def failure(self):
+        with self._lock:
+            self._consecutive += 1
+            if self.state == "half_open" or self._consecutive >= self.failures:
+                if self.state != "open":
+                    self.opened += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._probing = None
+
+    def release(self, probe: Optional[object]):
+        """Free the probe slot if its attempt ended without a verdict (cancelled,
+        refused quota), so the next caller can probe instead."""
+        if probe is None:
+            return
+        with self._lock:
+            if self._probing is probe:
+                self._probing = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self._consecutive,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+# -----------------------------------------------------------------------------
+# Resilient caller
+# -----------------------------------------------------------------------------
+class ResilientCaller:
+    """Runs upstream calls with quota, breaker, retries and optional hedging.
+
+    ``fn`` performs one attempt (the client itself has ``LLM_TIMEOUT`` and
+    no retries of its own). Retryable failures are retried with full-jitter
+    exponential backoff, honouring Retry-After; when the attempts are spent
+    LLMUnavailable is raised from the last error.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE,
+        backoff_max: float = LLM_BACKOFF_MAX,
+        hedge: bool = LLM_HEDGE,
+        limiter: Optional[RateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.limiter = limiter or RateLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        self._latencies: deque = deque(maxlen=_LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+        self.counts = {
+            "calls": 0, "attempts": 0, "retries": 0, "failed": 0,
+            "rate_limited": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0,
+        }
+
+    # ---- bookkeeping ----
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counts[name] += n
+
+    def _record_latency(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def _percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.hedge or len(self._latencies) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return max(LLM_HEDGE_MIN_DELAY_MS / 1000, self._percentile(0.95))
+
+    def _backoff(self, attempt: int, exc: Exception) -> Optional[float]:
+        """Seconds before the next attempt, or None if it is not worth retrying."""
+        if attempt >= self.max_retries:
+            return None
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        hint = _retry_after(exc)
+        if hint is not None:
+            if hint > self.backoff_max:
+                return None
+            delay = max(delay, hint)
+        return delay
+
+    def _failed(self, exc: Exception):
+        self.breaker.failure()
+        name = type(exc).__name__
+        if name == "RateLimitError":
+            self._count("rate_limited")
+            hint = _retry_after(exc)
+            if hint:
+                self.limiter.block(hint)
+        elif name == "APITimeoutError":
+            self._count("timeouts")
+
+    def _give_up(self, exc: Exception) -> LLMUnavailable:
+        self._count("failed")
+        hint = _retry_after(exc) or self.backoff_base
+        return LLMUnavailable(f"LLM unavailable: {exc}", retry_after=hint)
+
+    def _settle(self, estimated: int, response):
+        usage = getattr(response, "usage", None)
+        self.limiter.settle(estimated, getattr(usage, "total_tokens", None))
+
+    # ---- sync ----
+    def _hedged(self, fn: Callable, tokens: int):
+        delay = self.hedge_delay()
+        if delay is None:
+            return fn()
+        first = self._hedge_executor.submit(fn)
+        try:
+            return first.result(timeout=delay)
+        except FuturesTimeout:
+            pass
+        try:
+            self.limiter.acquire(tokens, max_wait=0)
+        except LLMUnavailable:
+            return first.result()  # no spare quota for a hedge
+        self._count("hedges")
+        # a blocking call cannot be cancelled; the slower one finishes unused
+        second = self._hedge_executor.submit(fn)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def call(self, fn: Callable, tokens: int, hedge: bool = True):
+        self._count("calls")
+        attempt = 0
+        while True:
+            probe = self.breaker.before()
+            try:
+                delay = self.limiter.acquire(tokens)
+                if delay:
+                    time.sleep(delay)
+                self._count("attempts")
+                started = time.monotonic()
+                try:
+                    response = self._hedged(fn, tokens) if hedge else fn()
+                except Exception as e:
+                    if not is_retryable(e):
+                        self.breaker.success()  # upstream answered, just not with a result
+                        raise
+                    self._failed(e)
+                    backoff = self._backoff(attempt, e)
+                    if backoff is None:
+                        raise self._give_up(e) from e
+                    self._count("retries")
+                    time.sleep(backoff)
+                    attempt += 1
+                    continue
+                self.breaker.success()
+                self._record_latency(time.monotonic() - started)
+                self._settle(tokens, response)
+                return response
+            finally:
+                self.breaker.release(probe)
+
+    # ---- async ----
+    async def _ahedged(self, fn: Callable[[], Awaitable], tokens: int):
+        delay = self.hedge_delay()
+        if delay is None:
+            return await fn()
+        first = asyncio.ensure_future(fn())
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+        try:
+            self.limiter.acquire(tokens, max_wait=0)
+        except LLMUnavailable:
+            return await first
+        self._count("hedges")
+        second = asyncio.ensure_future(fn())
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()  # the loser's HTTP request is aborted
+
+    async def acall(self, fn: Callable[[], Awaitable], tokens: int, hedge: bool = True):
+        self._count("calls")
+        attempt = 0
+        while True:
+            probe = self.breaker.before()
+            try:
+                delay = self.limiter.acquire(tokens)
+                if delay:
+                    await asyncio.sleep(delay)
+                self._count("attempts")
+                started = time.monotonic()
+                try:
+                    response = await (self._ahedged(fn, tokens) if hedge else fn())
+                except Exception as e:
+                    if not is_retryable(e):
+                        self.breaker.success()  # upstream answered, just not with a result
+                        raise
+                    self._failed(e)
+                    backoff = self._backoff(attempt, e)
+                    if backoff is None:
+                        raise self._give_up(e) from e
+                    self._count("retries")
+                    await asyncio.sleep(backoff)
+                    attempt += 1
+                    continue
+                self.breaker.success()
+                self._record_latency(time.monotonic() - started)
+                self._settle(tokens, response)
+                return response
+            finally:
+                self.breaker.release(probe)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+            samples = len(self._latencies)
+        p50, p95, p99 = (self._percentile(q) for q in (0.5, 0.95, 0.99))
+        hedge_delay = self.hedge_delay()
+        return dict(
+            counts,
+            timeout_seconds=LLM_TIMEOUT,
+            max_retries=self.max_retries,
+            hedge=self.hedge,
+            hedge_delay_ms=hedge_delay * 1000 if hedge_delay is not None else None,
+            latency_samples=samples,
+            p50_ms=p50 * 1000 if p50 is not None else None,
+            p95_ms=p95 * 1000 if p95 is not None else None,
+            p99_ms=p99 * 1000 if p99 is not None else None,
+            breaker=self.breaker.stats(),
+            limiter=self.limiter.stats(),
+        )
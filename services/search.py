@@ -0,0 +1,493 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import html
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import urlencode
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from middleware import metrics
+
+
+# -----------------------------------------------------------------------------
+# Config
+# -----------------------------------------------------------------------------
+# "mysql" = MATCH ... AGAINST over the FULLTEXT index (migrations/007);
+# "memory" = inverted index in this process, for databases without it
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "mysql").lower()
+SEARCH_SNIPPET_CHARS = int(os.environ.get("SEARCH_SNIPPET_CHARS", 160))
+# rows read per statement while the in-process index is built or catches up
+SEARCH_INDEX_BATCH = int(os.environ.get("SEARCH_INDEX_BATCH", 5000))
+# ids skipped by a catch-up (a transaction that had not committed yet) are
+# re-read for this many seconds before they are taken as rolled back
+SEARCH_INDEX_GAP_TTL = float(os.environ.get("SEARCH_INDEX_GAP_TTL", 30))
+SEARCH_INDEX_MAX_GAPS = int(os.environ.get("SEARCH_INDEX_MAX_GAPS", 1000))
+# a build batch that fails (database not reachable yet) is retried after
+# SEARCH_INDEX_RETRY_BASE seconds, doubling up to SEARCH_INDEX_RETRY_MAX
+SEARCH_INDEX_RETRY_BASE = float(os.environ.get("SEARCH_INDEX_RETRY_BASE", 1))
+SEARCH_INDEX_RETRY_MAX = float(os.environ.get("SEARCH_INDEX_RETRY_MAX", 60))
+
+if SEARCH_BACKEND not in ("mysql", "memory"):
+    raise ValueError(f"SEARCH_BACKEND must be 'mysql' or 'memory', got {SEARCH_BACKEND!r}")
+
+# tokens as InnoDB FULLTEXT sees them with its defaults (innodb_ft_min_token_size,
+# the built-in stopword list), so both backends match the same words
+MIN_TOKEN = 3
+STOPWORDS = frozenset(
+    "a about an are as at be by com de en for from how i in is it la of on or "
+    "that the this to was what when where who will with und www".split()
+)
+_TOKEN_RE = re.compile(r"\w+")
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return [token for token in _TOKEN_RE.findall(text.lower()) if len(token) >= MIN_TOKEN and token not in STOPWORDS]
+
+
+def query_terms(q: str) -> List[str]:
+    terms = list(dict.fromkeys(tokenize(q)))
+    if not terms:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Query has no searchable terms (words of {MIN_TOKEN}+ characters, not stopwords)",
+        )
+    return terms
+
+
+# -----------------------------------------------------------------------------
+# Results: ranked rows -> highlighted page
+# -----------------------------------------------------------------------------
+def highlight_pattern(terms: Sequence[str]) -> "re.Pattern":
+    return re.compile(r"\b(?:" + "|".join(map(re.escape, terms)) + r")\b", re.IGNORECASE)
+
+
+def highlight(text: Optional[str], pattern: "re.Pattern", chars: int = SEARCH_SNIPPET_CHARS) -> Optional[str]:
+    """HTML-escaped snippet around the first match, matches wrapped in <mark>."""
+    match = pattern.search(text) if text else None
+    if match is None:
+        return None
+    start = max(0, min(match.start() - chars // 3, len(text) - chars))
+    end = min(len(text), start + chars)
+    window = text[start:end]
+
+    parts, last = [], 0
+    for found in pattern.finditer(window):
+        parts.append(html.escape(window[last:found.start()]))
+        parts.append("<mark>" + html.escape(found.group()) + "</mark>")
+        last = found.end()
+    parts.append(html.escape(window[last:]))
+    return ("…" if start else "") + "".join(parts) + ("…" if end < len(text) else "")
+
+
+def search_page(hits: List[Tuple[dict, float]], terms: Sequence[str], limit: int) -> List[dict]:
+    pattern = highlight_pattern(terms)
+    page = []
+    for row, score in hits[:limit]:
+        highlights = {}
+        for field in ("input_text", "summary"):
+            snippet = highlight(row[field], pattern)
+            if snippet is not None:
+                highlights[field] = snippet
+        page.append({
+            "summarization_id": row["id"],
+            "patient_id": row["patient_id"],
+            "score": round(float(score), 4),
+            "summary": row["summary"],
+            "highlights": highlights,
+            "links": [
+                {"rel": "self", "href": f"/summarizations/{row['id']}"},
+                {"rel": "collection", "href": f"/summarizations?patient_id={row['patient_id']}"},
+            ]
+        })
+    return page
+
+
+def search_next_link(q: str, patient_id: Optional[str], limit: int, offset: int) -> str:
+    params = {"q": q, "limit": limit, "offset": offset + limit}
+    if patient_id:
+        params["patient_id"] = patient_id
+    return "/summarizations/search?" + urlencode(params)
+
+
+# -----------------------------------------------------------------------------
+# MySQL FULLTEXT
+# -----------------------------------------------------------------------------
+def fulltext_query(terms: Sequence[str], patient_id: Optional[str], limit: int, offset: int) -> Tuple[str, list]:
+    # natural language mode: relevance-ranked, no operators to escape
+    against = " ".join(terms)
+    sql = """
+        SELECT id, patient_id, input_text, summary,
+               MATCH (input_text, summary) AGAINST (%s IN NATURAL LANGUAGE MODE) AS score
+        FROM summaries
+        WHERE MATCH (input_text, summary) AGAINST (%s IN NATURAL LANGUAGE MODE)
+    """
+    params = [against, against]
+    if patient_id:
+        sql += " AND patient_id = %s"
+        params.append(patient_id)
+    sql += " ORDER BY score DESC, id LIMIT %s OFFSET %s"
+    params.extend([limit, offset])
+    return sql, params
+
+
+# -----------------------------------------------------------------------------
+# In-process inverted index
+# -----------------------------------------------------------------------------
+TAIL_SQL = "SELECT id, patient_id, input_text, summary FROM summaries WHERE id > %s ORDER BY id LIMIT %s"
+ROWS_SQL = "SELECT id, patient_id, input_text, summary FROM summaries WHERE id IN ({})"
+
+
+def _rows_query(ids: Sequence[int]) -> str:
+    return ROWS_SQL.format(", ".join(["%s"] * len(ids)))
+
+
+class InvertedIndex:
+    """BM25 over input_text + summary, held in this process.
+
+    New rows are picked up by reading past the highest indexed id before
+    each search (one index seek), which covers every insert path and other
+    replicas. Updates and deletes made here are applied through the hooks
+    below; those made by other replicas are not, but every hit is re-read
+    from MySQL before it is returned, so deleted rows never surface and
+    snippets always show the current text.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._catch_up_lock = threading.Lock()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        # doc -> (patient_id, term counts per field); kept so updates can
+        # replace one field and deletes can unlink the doc's postings
+        self._docs: Dict[int, Tuple[str, Dict[str, Counter]]] = {}
+        self._lengths: Dict[int, int] = {}
+        self._total_length = 0
+        self._by_patient: Dict[str, Set[int]] = {}
+        self._gaps: Dict[int, float] = {}
+        self.watermark = 0
+        self.ready = False
+        self.build_seconds: Optional[float] = None
+        # consecutive failed build batches, and the last one's error
+        self.build_failures = 0
+        self.build_error: Optional[str] = None
+
+    # ---- maintenance, under self._lock ----
+    def _unlink(self, doc_id: int) -> Optional[Tuple[str, Dict[str, Counter]]]:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return None
+        patient_id, fields = doc
+        for term in sum(fields.values(), Counter()):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+        patient_docs = self._by_patient[patient_id]
+        patient_docs.discard(doc_id)
+        if not patient_docs:
+            del self._by_patient[patient_id]
+        return doc
+
+    def _link(self, doc_id: int, patient_id: str, fields: Dict[str, Counter]):
+        combined = sum(fields.values(), Counter())
+        for term, count in combined.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+        self._docs[doc_id] = (patient_id, fields)
+        self._lengths[doc_id] = sum(combined.values())
+        self._total_length += self._lengths[doc_id]
+        self._by_patient.setdefault(patient_id, set()).add(doc_id)
+
+    # ---- hooks for writes made by this replica ----
+    def add_row(self, row: dict):
+        fields = {"input_text": Counter(tokenize(row["input_text"])), "summary": Counter(tokenize(row["summary"]))}
+        with self._lock:
+            self._unlink(row["id"])
+            self._link(row["id"], row["patient_id"], fields)
+
+    def update(self, doc_id: int, **texts: Optional[str]):
+        """Replace the given fields (input_text=..., summary=...) of an indexed row."""
+        counts = {field: Counter(tokenize(text)) for field, text in texts.items()}
+        with self._lock:
+            doc = self._unlink(doc_id)
+            if doc is not None:
+                patient_id, fields = doc
+                self._link(doc_id, patient_id, {**fields, **counts})
+
+    def append(self, doc_id: int, input_text: str, summary: Optional[str]):
+        """A segment was appended to input_text and the summary rewritten."""
+        appended, counts = Counter(tokenize(input_text)), Counter(tokenize(summary))
+        with self._lock:
+            doc = self._unlink(doc_id)
+            if doc is not None:
+                patient_id, fields = doc
+                self._link(doc_id, patient_id, {"input_text": fields["input_text"] + appended, "summary": counts})
+
+    def remove(self, doc_id: int):
+        with self._lock:
+            self._unlink(doc_id)
+
+    def remove_patient(self, patient_id: str):
+        with self._lock:
+            for doc_id in list(self._by_patient.get(patient_id, ())):
+                self._unlink(doc_id)
+
+    # ---- queries ----
+    def search(self, terms: Sequence[str], patient_id: Optional[str], limit: int) -> List[Tuple[int, float]]:
+        """Top ``limit`` (id, score), best first; ties go to the lower id."""
+        with self._lock:
+            count = len(self._docs)
+            if not count:
+                return []
+            lengths = self._lengths
+            # BM25's length normalisation, K1 * (1 - B + B * length / average)
+            base, scale = self.K1 * (1 - self.B), self.K1 * self.B * count / (self._total_length or 1)
+            scope = self._by_patient.get(patient_id, set()) if patient_id else None
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                weight = idf * (self.K1 + 1)
+                if scope is None:
+                    matches = postings.items()
+                elif len(scope) < len(postings):
+                    matches = ((doc_id, postings[doc_id]) for doc_id in scope if doc_id in postings)
+                else:
+                    matches = ((doc_id, tf) for doc_id, tf in postings.items() if doc_id in scope)
+                for doc_id, tf in matches:
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * tf / (tf + base + scale * lengths[doc_id])
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+    def retry_delay(self) -> float:
+        """Seconds until the next build attempt after the failures so far."""
+        if not self.build_failures:
+            return 0.0
+        return min(SEARCH_INDEX_RETRY_MAX, SEARCH_INDEX_RETRY_BASE * 2 ** (self.build_failures - 1))
+
+    def check_ready(self):
+        if not self.ready:
+            raise HTTPException(
+                status_code=503,
+                detail="Search index is still being built",
+                headers={"Retry-After": str(max(5, math.ceil(self.retry_delay())))},
+            )
+
+    # ---- catch-up: rows past the watermark, and late commits in gaps ----
+    def _apply(self, tail: List[dict], late: List[dict], checked: Sequence[int]) -> int:
+        for row in tail:
+            self.add_row(row)
+        for row in late:
+            self.add_row(row)
+        now = time.monotonic()
+        with self._lock:
+            for row in late:
+                self._gaps.pop(row["id"], None)
+            for doc_id in checked:
+                if now - self._gaps.get(doc_id, now) > SEARCH_INDEX_GAP_TTL:
+                    del self._gaps[doc_id]
+            if tail:
+                last = tail[-1]["id"]
+                # ids assigned to transactions that commit after a later id
+                # did; not tracked while building, where gaps are deletes
+                if self.ready and last - self.watermark <= SEARCH_INDEX_MAX_GAPS:
+                    seen = {row["id"] for row in tail}
+                    for doc_id in range(self.watermark + 1, last):
+                        if doc_id not in seen:
+                            self._gaps[doc_id] = now
+                self.watermark = max(self.watermark, last)
+        return len(tail)
+
+    def catch_up(self, conn, batch: int = SEARCH_INDEX_BATCH) -> int:
+        # one catch-up at a time; a concurrent search goes ahead without
+        if not self._catch_up_lock.acquire(blocking=False):
+            return 0
+        try:
+            gaps = list(self._gaps)
+            with conn.cursor() as cursor:
+                cursor.execute(TAIL_SQL, (self.watermark, batch))
+                tail = list(cursor.fetchall())
+                late = []
+                if gaps:
+                    cursor.execute(_rows_query(gaps), gaps)
+                    late = list(cursor.fetchall())
+            return self._apply(tail, late, gaps)
+        finally:
+            self._catch_up_lock.release()
+
+    async def acatch_up(self, conn, batch: int = SEARCH_INDEX_BATCH, offload: bool = False) -> int:
+        if not self._catch_up_lock.acquire(blocking=False):
+            return 0
+        try:
+            gaps = list(self._gaps)
+            async with conn.cursor() as cursor:
+                await cursor.execute(TAIL_SQL, (self.watermark, batch))
+                tail = list(await cursor.fetchall())
+                late = []
+                if gaps:
+                    await cursor.execute(_rows_query(gaps), gaps)
+                    late = list(await cursor.fetchall())
+            if offload:
+                # tokenizing a full batch would stall the event loop
+                return await run_in_threadpool(self._apply, tail, late, gaps)
+            return self._apply(tail, late, gaps)
+        finally:
+            self._catch_up_lock.release()
+
+    def _build_failed(self, exc: Exception) -> float:
+        self.build_failures += 1
+        self.build_error = f"{type(exc).__name__}: {exc}"
+        delay = self.retry_delay()
+        logger.warning("search index build failed (%s); retrying in %.0fs", self.build_error, delay)
+        return delay
+
+    def _built(self, started: float):
+        self.build_seconds = time.perf_counter() - started
+        self.build_failures = 0
+        self.build_error = None
+        self.ready = True
+
+    def build(self, get_pool):
+        """Index every row, in batches; searches answer 503 until done.
+
+        A failed batch (database not reachable yet) is retried with
+        exponential backoff; stats() shows the failures meanwhile.
+        """
+        started = time.perf_counter()
+        while True:
+            try:
+                with get_pool().connection() as conn:
+                    if self.catch_up(conn) < SEARCH_INDEX_BATCH:
+                        break
+                self.build_failures = 0
+            except Exception as e:
+                time.sleep(self._build_failed(e))
+        self._built(started)
+
+    async def abuild(self, get_pool):
+        started = time.perf_counter()
+        while True:
+            try:
+                pool = await get_pool()
+                async with pool.acquire() as conn:
+                    if await self.acatch_up(conn, offload=True) < SEARCH_INDEX_BATCH:
+                        break
+                self.build_failures = 0
+            except Exception as e:
+                await asyncio.sleep(self._build_failed(e))
+        self._built(started)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "build_seconds": self.build_seconds,
+                "build_failures": self.build_failures,
+                "build_error": self.build_error,
+                "documents": len(self._docs),
+                "terms": len(self._postings),
+                "patients": len(self._by_patient),
+                "watermark": self.watermark,
+                "pending_gaps": len(self._gaps),
+            }
+
+
+search_index = InvertedIndex()
+
+
+def _in_index_order(ranked: List[Tuple[int, float]], rows: List[dict]) -> List[Tuple[dict, float]]:
+    by_id = {row["id"]: row for row in rows}
+    hits = []
+    for doc_id, score in ranked:
+        row = by_id.get(doc_id)
+        if row is None:
+            search_index.remove(doc_id)  # deleted by another replica
+        else:
+            hits.append((row, score))
+    return hits
+
+
+# ---- SYNC ----
+def search(conn, terms: Sequence[str], patient_id: Optional[str], limit: int, offset: int) -> List[Tuple[dict, float]]:
+    """Up to ``limit + 1`` (row, score) pairs from ``offset``, best first."""
+    with metrics.stage("search"):
+        if SEARCH_BACKEND == "mysql":
+            sql, params = fulltext_query(terms, patient_id, limit + 1, offset)
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                return [(row, row["score"]) for row in cursor.fetchall()]
+
+        search_index.check_ready()
+        search_index.catch_up(conn)
+        ranked = search_index.search(terms, patient_id, offset + limit + 1)[offset:]
+        if not ranked:
+            return []
+        ids = [doc_id for doc_id, _ in ranked]
+        with conn.cursor() as cursor:
+            cursor.execute(_rows_query(ids), ids)
+            return _in_index_order(ranked, cursor.fetchall())
+
+
+# ---- ASYNC ----
+async def asearch(conn, terms: Sequence[str], patient_id: Optional[str], limit: int, offset: int) -> List[Tuple[dict, float]]:
+    with metrics.stage("search"):
+        if SEARCH_BACKEND == "mysql":
+            sql, params = fulltext_query(terms, patient_id, limit + 1, offset)
+            async with conn.cursor() as cursor:
+                await cursor.execute(sql, params)
+                return [(row, row["score"]) for row in await cursor.fetchall()]
+
+        search_index.check_ready()
+        await search_index.acatch_up(conn)
+        ranked = search_index.search(terms, patient_id, offset + limit + 1)[offset:]
+        if not ranked:
+            return []
+        ids = [doc_id for doc_id, _ in ranked]
+        async with conn.cursor() as cursor:
+            await cursor.execute(_rows_query(ids), ids)
+            return _in_index_order(ranked, await cursor.fetchall())
+
+
+# ---- index hooks, one call per kind of write (no-ops with SEARCH_BACKEND=mysql) ----
+def index_update(summarization_id: int, **texts: Optional[str]):
+    if SEARCH_BACKEND == "memory":
+        search_index.update(summarization_id, **texts)
+
+
+def index_append(summarization_id: int, input_text: str, summary: Optional[str]):
+    if SEARCH_BACKEND == "memory":
+        search_index.append(summarization_id, input_text, summary)
+
+
+def index_remove(summarization_id: int):
+    if SEARCH_BACKEND == "memory":
+        search_index.remove(summarization_id)
+
+
+def index_remove_patient(patient_id: str):
+    if SEARCH_BACKEND == "memory":
+        search_index.remove_patient(patient_id)
+
+
+def search_stats() -> dict:
+    stats = {"backend": SEARCH_BACKEND}
+    if SEARCH_BACKEND == "memory":
+        stats.update(search_index.stats())
+    return stats
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import HTTPException
+
+from services.backends import Summary
+
+
+# rolling summary state lives on the summaries row: the current summary and
+# segment_count, which is also the version checked by concurrent appends
+SELECT_SQL = "SELECT id, patient_id, summary, segment_count FROM summaries WHERE id = %s"
+APPEND_SQL = """
+    UPDATE summaries
+    SET input_text = CONCAT(input_text, '\\n', %s),
+        summary = %s,
+        input_hash = NULL,
+        segment_count = segment_count + 1
+    WHERE id = %s AND segment_count = %s
+"""
+INSERT_SEGMENT_SQL = """
+    INSERT INTO summary_segments (summarization_id, seq, input_text)
+    VALUES (%s, %s, %s)
+"""
+
+
+def _conflict():
+    return HTTPException(
+        status_code=409,
+        detail="Summarization was updated concurrently; retry the append",
+    )
+
+
+def segment_response(row: dict, summary: Summary) -> dict:
+    summarization_id = row["id"]
+    return {
+        "summarization_id": summarization_id,
+        "patient_id": row["patient_id"],
+        "segment": row["segment_count"] + 1,
+        "summary": summary.text,
+        "backend": summary.backend,
+        "links": [
+            {"rel": "self", "href": f"/summarizations/{summarization_id}"},
+            {"rel": "append", "href": f"/summarizations/{summarization_id}/segments"},
+            {"rel": "collection", "href": "/summarizations"},
+        ]
+    }
+
+
+# ---- SYNC ----
+def get_state(pool, summarization_id: int) -> Optional[dict]:
+    with pool.connection() as conn, conn.cursor() as cursor:
+        cursor.execute(SELECT_SQL, (summarization_id,))
+        return cursor.fetchone()
+
+
+def append_segment(pool, row: dict, input_text: str, summary: str):
+    with pool.connection() as conn, conn.cursor() as cursor:
+        cursor.execute(APPEND_SQL, (input_text, summary, row["id"], row["segment_count"]))
+        if cursor.rowcount == 0:
+            conn.rollback()
+            raise _conflict()
+        cursor.execute(INSERT_SEGMENT_SQL, (row["id"], row["segment_count"] + 1, input_text))
+        conn.commit()
+
+
+# ---- ASYNC ----
+async def aget_state(pool, summarization_id: int) -> Optional[dict]:
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(SELECT_SQL, (summarization_id,))
+            return await cursor.fetchone()
+
+
+async def aappend_segment(pool, row: dict, input_text: str, summary: str):
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(APPEND_SQL, (input_text, summary, row["id"], row["segment_count"]))
+            if cursor.rowcount == 0:
+                await conn.rollback()
+                raise _conflict()
+            await cursor.execute(INSERT_SEGMENT_SQL, (row["id"], row["segment_count"] + 1, input_text))
+        await conn.commit()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class StreamTimings:
+    """Time to first token vs. total time for streamed summaries."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.outcomes = {"completed": 0, "cancelled": 0, "failed": 0}
+        self._ttft_total = 0.0
+        self._ttft_max = 0.0
+        self._ttft_count = 0
+        self._total_total = 0.0
+        self._total_max = 0.0
+
+    def record(self, outcome: str, ttft: Optional[float], total: float):
+        with self._lock:
+            self.outcomes[outcome] += 1
+            if ttft is not None:
+                self._ttft_count += 1
+                self._ttft_total += ttft
+                self._ttft_max = max(self._ttft_max, ttft)
+            if outcome == "completed":
+                self._total_total += total
+                self._total_max = max(self._total_max, total)
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self.outcomes["completed"]
+            return dict(
+                self.outcomes,
+                avg_ttft_ms=self._ttft_total / self._ttft_count * 1000 if self._ttft_count else 0.0,
+                max_ttft_ms=self._ttft_max * 1000,
+                avg_total_ms=self._total_total / completed * 1000 if completed else 0.0,
+                max_total_ms=self._total_max * 1000,
+            )
+
+
+stream_timings = StreamTimings()
+
+
+async def iterate_sync(iterator: Iterator[str]) -> AsyncIterator[str]:
+    """Drive a blocking generator from the threadpool, closing it when we stop early.
+
+    If we stop while a ``next`` is still running in a worker thread (the
+    client went away while we waited on the upstream), the generator cannot
+    be closed from here; that thread closes it as soon as its call returns.
+    """
+    done = object()
+    lock = threading.Lock()
+    stopped = False
+
+    def step():
+        try:
+            return next(iterator, done)
+        finally:
+            with lock:
+                if stopped:
+                    iterator.close()
+
+    try:
+        while True:
+            item = await run_in_threadpool(step)
+            if item is done:
+                return
+            yield item
+    finally:
+        with lock:
+            stopped = True
+            try:
+                iterator.close()
+            except ValueError:
+                pass  # still running in a worker thread; step closes it
+
+
+async def stream_summary(
+    request: Request,
+    tokens: AsyncIterator[str],
+    persist: Callable[[str], Awaitable[dict]],
+    started: float,
+):
+    """SSE body for ``POST /summarizations?stream=true``.
+
+    Emits ``token`` events as text arrives, then persists the assembled
+    summary and ends with a ``done`` event carrying the created resource and
+    its timings. If the client goes away mid-stream the upstream completion
+    is aborted and nothing is stored.
+    """
+    parts = []
+    ttft = None
+    outcome = "cancelled"
+    try:
+        async for text in tokens:
+            if await request.is_disconnected():
+                break
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            parts.append(text)
+            yield sse_event("token", {"text": text})
+        else:
+            created = await persist("".join(parts).strip())
+            outcome = "completed"
+            total = time.perf_counter() - started
+            created["timings"] = {
+                "ttft_ms": ttft * 1000 if ttft is not None else None,
+                "total_ms": total * 1000,
+            }
+            yield sse_event("done", created)
+    except Exception as e:
+        outcome = "failed"
+        yield sse_event("error", {"detail": str(e)})
+    finally:
+        try:
+            # stops the upstream request if we broke out early
+            await tokens.aclose()
+        finally:
+            # also when the close is itself cancelled (a cancelled response
+            # task is cancelled again at every await)
+            stream_timings.record(outcome, ttft, time.perf_counter() - started)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+
+SUMMARY_CACHE_TTL = float(os.environ.get("SUMMARY_CACHE_TTL", 3600))
+SUMMARY_CACHE_MAX_BYTES = int(os.environ.get("SUMMARY_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# look up previously stored rows by summaries.input_hash (migrations/001)
+SUMMARY_CACHE_PERSISTENT = os.environ.get("SUMMARY_CACHE_PERSISTENT", "0") == "1"
+
+
+def normalize_text(text: str) -> str:
+    # re-submitted transcripts often differ only in whitespace
+    return " ".join(text.split())
+
+
+def cache_key(input_text: str, model: str, prompt: str, temperature: float, max_tokens: Optional[int]) -> str:
+    payload = json.dumps(
+        [normalize_text(input_text), model, prompt, temperature, max_tokens],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SummariesTableTier:
+    """Persistent tier: reuse a summary already stored in the summaries table."""
+
+    SQL = "SELECT summary FROM summaries WHERE input_hash = %s ORDER BY id DESC LIMIT 1"
+
+    def __init__(self, get_pool: Callable):
+        self._get_pool = get_pool
+
+    def get(self, key: str) -> Optional[str]:
+        with self._get_pool().connection() as conn, conn.cursor() as cursor:
+            cursor.execute(self.SQL, (key,))
+            row = cursor.fetchone()
+        return row["summary"] if row else None
+
+    async def aget(self, key: str) -> Optional[str]:
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(self.SQL, (key,))
+                row = await cursor.fetchone()
+        return row["summary"] if row else None
+
+
+class SummaryCache:
+    """In-process LRU of key -> summary with TTL and a total byte budget,
+    optionally backed by a persistent tier."""
+
+    def __init__(self, ttl: float = SUMMARY_CACHE_TTL, max_bytes: int = SUMMARY_CACHE_MAX_BYTES, persistent=None):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.persistent = persistent
+
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _get_local(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, size = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get(self, key: str, persistent: bool = True) -> Optional[str]:
+        value = self._get_local(key)
+        if value is not None:
+            return value
+
+        if persistent and self.persistent is not None:
+            value = self.persistent.get(key)
+            if value is not None:
+                self._record_persistent_hit(key, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def aget(self, key: str, persistent: bool = True) -> Optional[str]:
+        value = self._get_local(key)
+        if value is not None:
+            return value
+
+        if persistent and self.persistent is not None:
+            value = await self.persistent.aget(key)
+            if value is not None:
+                self._record_persistent_hit(key, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _record_persistent_hit(self, key: str, value: str):
+        with self._lock:
+            self.persistent_hits += 1
+        self.put(key, value)
+
+    def put(self, key: str, value: str):
+        size = len(key) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+
+            self._entries[key] = (value, time.monotonic() + self.ttl, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.persistent_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "persistent": self.persistent is not None,
+                "hits": self.hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": ((self.hits + self.persistent_hits) / lookups) if lookups else 0.0,
+            }
+
+
+summary_cache = SummaryCache()
@@ -0,0 +1,437 @@
+"""SQLite stand-in for MySQL, for tests and benchmarks that should not need a server.
+
+    from tests import sqlite_shim
+    sqlite_shim.install("/tmp/bench.db")   # before main is imported
+    sqlite_shim.seed("/tmp/bench.db", rows=10000, patients=100)
+
+Replaces ``pymysql.connect`` and ``aiomysql.create_pool`` with SQLite-backed
+objects that speak the small part of their APIs the service uses (dict
+rows, ``%s`` parameters, commit/rollback, lastrowid/rowcount, fetchmany),
+and rewrites the MySQL-only SQL in the service (CONCAT, ON DUPLICATE KEY
+UPDATE, NOW() - INTERVAL, DELETE ... LIMIT, FOR UPDATE) into SQLite. The
+schema matches migrations/ applied to the base summaries table.
+
+Numbers measured against it are for comparing runs, not for sizing MySQL:
+SQLite serializes writers, and the aiomysql stand-in runs each query
+inline on the event loop.
+"""
+from __future__ import annotations
+
+import random
+import re
+import sqlite3
+from functools import lru_cache
+from typing import List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id    VARCHAR(64) NOT NULL,
+    input_text    TEXT NOT NULL,
+    summary       TEXT,
+    input_hash    CHAR(64),
+    segment_count INT NOT NULL DEFAULT 0,
+    version       INT NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_input_hash ON summaries (input_hash);
+CREATE INDEX IF NOT EXISTS idx_summaries_patient_id_id ON summaries (patient_id, id);
+
+CREATE TABLE IF NOT EXISTS patient_versions (
+    patient_id VARCHAR(64) NOT NULL PRIMARY KEY,
+    version    INT NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS summaries_row_version AFTER UPDATE ON summaries
+WHEN NEW.version = OLD.version
+BEGIN
+    UPDATE summaries SET version = OLD.version + 1 WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS summaries_patient_version_insert AFTER INSERT ON summaries
+BEGIN
+    INSERT INTO patient_versions (patient_id, version) VALUES (NEW.patient_id, 1)
+    ON CONFLICT (patient_id) DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS summaries_patient_version_update AFTER UPDATE ON summaries
+WHEN NEW.version = OLD.version
+BEGIN
+    INSERT INTO patient_versions (patient_id, version) VALUES (NEW.patient_id, 1)
+    ON CONFLICT (patient_id) DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS summaries_patient_version_delete AFTER DELETE ON summaries
+BEGIN
+    INSERT INTO patient_versions (patient_id, version) VALUES (OLD.patient_id, 1)
+    ON CONFLICT (patient_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TABLE IF NOT EXISTS summary_segments (
+    summarization_id INT NOT NULL,
+    seq              INT NOT NULL,
+    input_text       TEXT NOT NULL,
+    created_at       TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (summarization_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id     CHAR(36) NOT NULL PRIMARY KEY,
+    kind       VARCHAR(16) NOT NULL DEFAULT 'single',
+    patient_id VARCHAR(64) NOT NULL,
+    input_text TEXT NOT NULL,
+    model      VARCHAR(64) NOT NULL,
+    status     VARCHAR(16) NOT NULL DEFAULT 'pending',
+    summary    TEXT,
+    error      TEXT,
+    total      INT,
+    processed  INT,
+    failed     INT,
+    results    TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_updated ON jobs (status, updated_at);
+CREATE TRIGGER IF NOT EXISTS jobs_updated_at AFTER UPDATE ON jobs
+WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE jobs SET updated_at = CURRENT_TIMESTAMP WHERE job_id = NEW.job_id;
+END;
+"""
+
+# primary keys, for ON DUPLICATE KEY UPDATE -> ON CONFLICT (...)
+_KEYS = {
+    "jobs": "job_id", "summaries": "id", "summary_segments": "summarization_id, seq",
+    "patient_versions": "patient_id",
+}
+
+
+# -----------------------------------------------------------------------------
+# SQL translation
+# -----------------------------------------------------------------------------
+_CONCAT_RE = re.compile(r"CONCAT\(([^()]*)\)", re.I)
+_INTERVAL_RE = re.compile(r"NOW\(\)\s*-\s*INTERVAL\s+(%s|\d+)\s+SECOND", re.I)
+_UPSERT_RE = re.compile(r"INSERT\s+INTO\s+(\w+)(.*?)ON\s+DUPLICATE\s+KEY\s+UPDATE\s+(.*)", re.I | re.S)
+_VALUES_FN_RE = re.compile(r"VALUES\((\w+)\)", re.I)
+_DELETE_LIMIT_RE = re.compile(r"DELETE\s+FROM\s+(\w+)\s+WHERE\s+(.*?)\s+LIMIT\s+(%s|\d+)\s*$", re.I | re.S)
+
+
+def _split_args(args: str) -> List[str]:
+    # top-level commas only; quoted strings may contain commas
+    parts, current, quote = [], "", None
+    for ch in args:
+        if quote:
+            current += ch
+            if ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+            current += ch
+        elif ch == ",":
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += ch
+    parts.append(current.strip())
+    return parts
+
+
+@lru_cache(maxsize=512)
+def translate(sql: str) -> str:
+    sql = sql.strip().rstrip(";")
+    sql = _CONCAT_RE.sub(lambda m: "(" + " || ".join(_split_args(m.group(1))) + ")", sql)
+    sql = sql.replace("'\\n'", "char(10)")  # MySQL reads '\n' as a newline, SQLite does not
+    sql = _INTERVAL_RE.sub(lambda m: "datetime('now', '-' || %s || ' seconds')" if m.group(1) == "%s"
+                           else f"datetime('now', '-{m.group(1)} seconds')", sql)
+    sql = re.sub(r"\bNOW\(\)", "CURRENT_TIMESTAMP", sql, flags=re.I)
+    sql = re.sub(r"\s+FOR\s+UPDATE\b", "", sql, flags=re.I)
+    sql = re.sub(r"\bINSERT\s+IGNORE\b", "INSERT OR IGNORE", sql, flags=re.I)
+
+    upsert = _UPSERT_RE.match(sql)
+    if upsert:
+        table, body, updates = upsert.groups()
+        updates = _VALUES_FN_RE.sub(r"excluded.\1", updates)
+        sql = f"INSERT INTO {table}{body}ON CONFLICT ({_KEYS[table]}) DO UPDATE SET {updates}"
+
+    delete = _DELETE_LIMIT_RE.match(sql)
+    if delete:
+        table, where, limit = delete.groups()
+        sql = f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {where} LIMIT {limit})"
+
+    return sql.replace("%s", "?")
+
+
+# -----------------------------------------------------------------------------
+# pymysql stand-in
+# -----------------------------------------------------------------------------
+class Cursor:
+    def __init__(self, conn: "Connection"):
+        self._conn = conn
+        self._cursor = conn._db.cursor()
+        self.rowcount = -1
+        self.lastrowid: Optional[int] = None
+
+    def _row(self, row) -> Optional[dict]:
+        if row is None:
+            return None
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def execute(self, sql: str, params=None) -> int:
+        # through the connection, like pymysql, so instrumented connections time it
+        self._conn.query(self._cursor.execute, translate(sql), tuple(params or ()))
+        return self._done()
+
+    def executemany(self, sql: str, seq) -> int:
+        self._conn.query(self._cursor.executemany, translate(sql), [tuple(params) for params in seq])
+        return self._done()
+
+    def _done(self) -> int:
+        self.rowcount = self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+        return self.rowcount
+
+    def fetchone(self) -> Optional[dict]:
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size: int = 1) -> List[dict]:
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self) -> List[dict]:
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        for row in self._cursor:
+            yield self._row(row)
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Connection:
+    def __init__(self, path: str):
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA busy_timeout = 30000")
+        self.open = True
+
+    def cursor(self, cursorclass=None) -> Cursor:
+        return Cursor(self)
+
+    def query(self, run, sql: str, params):
+        run(sql, params)
+
+    def commit(self):
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+    def begin(self):
+        pass
+
+    def ping(self, reconnect: bool = False):
+        if not self.open:
+            raise sqlite3.ProgrammingError("connection closed")
+
+    def close(self):
+        if self.open:
+            self._db.close()
+            self.open = False
+
+
+# -----------------------------------------------------------------------------
+# aiomysql stand-in
+# -----------------------------------------------------------------------------
+class AsyncCursor:
+    def __init__(self, conn: "AsyncConnection", cursor: Cursor):
+        self._conn = conn
+        self._cursor = cursor
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        return self._cursor.lastrowid
+
+    async def execute(self, sql: str, params=None) -> int:
+        await self._conn.query(self._cursor.execute, sql, params)
+        return self._cursor.rowcount
+
+    async def executemany(self, sql: str, seq) -> int:
+        await self._conn.query(self._cursor.executemany, sql, seq)
+        return self._cursor.rowcount
+
+    async def fetchone(self):
+        return self._cursor.fetchone()
+
+    async def fetchmany(self, size: int = 1):
+        return self._cursor.fetchmany(size)
+
+    async def fetchall(self):
+        return self._cursor.fetchall()
+
+    async def close(self):
+        self._cursor.close()
+
+    def __await__(self):
+        # ``await conn.cursor(...)`` as well as ``async with conn.cursor()``
+        yield from ()
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._cursor.close()
+
+
+class AsyncConnection:
+    def __init__(self, path: str):
+        self._conn = Connection(path)
+
+    def cursor(self, cursorclass=None) -> AsyncCursor:
+        return AsyncCursor(self, self._conn.cursor())
+
+    async def query(self, run, sql: str, params):
+        run(sql, params)
+
+    async def commit(self):
+        self._conn.commit()
+
+    async def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+    @property
+    def closed(self) -> bool:
+        return not self._conn.open
+
+
+class _Acquire:
+    def __init__(self, pool: "AsyncPool"):
+        self._pool = pool
+        self._conn: Optional[AsyncConnection] = None
+
+    def __await__(self):
+        return self._pool._acquire().__await__()
+
+    async def __aenter__(self) -> AsyncConnection:
+        self._conn = await self._pool._acquire()
+        return self._conn
+
+    async def __aexit__(self, *exc):
+        self._pool.release(self._conn)
+
+
+class AsyncPool:
+    def __init__(self, path: str, minsize: int, maxsize: int):
+        import asyncio
+
+        self._path = path
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self._free: List[AsyncConnection] = []
+        self._used = 0
+        self._cond = asyncio.Condition()
+
+    @property
+    def size(self) -> int:
+        return len(self._free) + self._used
+
+    @property
+    def freesize(self) -> int:
+        return len(self._free)
+
+    def acquire(self) -> _Acquire:
+        return _Acquire(self)
+
+    async def _acquire(self) -> AsyncConnection:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._free or self.size < self.maxsize)
+            conn = self._free.pop() if self._free else AsyncConnection(self._path)
+            self._used += 1
+            return conn
+
+    def release(self, conn: AsyncConnection):
+        import asyncio
+
+        self._used -= 1
+        if not conn.closed:
+            self._free.append(conn)
+
+        async def notify():
+            async with self._cond:
+                self._cond.notify()
+
+        asyncio.ensure_future(notify())
+
+    def close(self):
+        for conn in self._free:
+            conn.close()
+        self._free.clear()
+
+    async def wait_closed(self):
+        pass
+
+
+# -----------------------------------------------------------------------------
+# Setup
+# -----------------------------------------------------------------------------
+def create_schema(path: str):
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.executescript(SCHEMA)
+    db.commit()
+    db.close()
+
+
+def install(path: str):
+    """Create the schema in ``path`` and route pymysql/aiomysql to it."""
+    create_schema(path)
+
+    import pymysql
+
+    pymysql.connect = lambda *args, **kwargs: Connection(path)
+
+    try:
+        import aiomysql
+    except ImportError:
+        return
+
+    async def create_pool(minsize: int = 1, maxsize: int = 10, **kwargs) -> AsyncPool:
+        return AsyncPool(path, minsize, maxsize)
+
+    aiomysql.create_pool = create_pool
+
+
+def patient_ids(patients: int) -> List[str]:
+    return [f"patient-{i:05d}" for i in range(patients)]
+
+
+def seed(path: str, rows: int, patients: int, text_words: int = 200, seed: int = 0) -> List[str]:
+    """Insert ``rows`` summaries spread over ``patients`` patients; returns the patient ids."""
+    rng = random.Random(seed)
+    vocabulary = (
+        "patient reports pain chest shortness breath fever cough nausea dizziness "
+        "history hypertension diabetes medication dose daily follow up imaging "
+        "blood pressure heart rate normal elevated referral cardiology plan"
+    ).split()
+    ids = patient_ids(patients)
+
+    def text() -> str:
+        return " ".join(rng.choice(vocabulary) for _ in range(text_words)) + "."
+
+    db = sqlite3.connect(path)
+    db.executemany(
+        "INSERT INTO summaries (patient_id, input_text, summary) VALUES (?, ?, ?)",
+        ((rng.choice(ids), text(), "Seeded summary. " + text()[:200]) for _ in range(rows)),
+    )
+    db.commit()
+    db.close()
+    return ids
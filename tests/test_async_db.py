@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from framework import async_db
+
+
+class FakeConnection:
+    def __init__(self, rollback_error=None):
+        self.rollback_error = rollback_error
+        self.rolled_back = False
+        self.closed = False
+
+    async def rollback(self):
+        if self.rollback_error is not None:
+            raise self.rollback_error
+        self.rolled_back = True
+
+    def close(self):
+        self.closed = True
+
+
+class FakeAcquire:
+    def __init__(self, pool):
+        self._pool = pool
+
+    def __await__(self):
+        return self._get().__await__()
+
+    async def _get(self):
+        return self._pool.conn
+
+    async def __aenter__(self):
+        return self._pool.conn
+
+    async def __aexit__(self, *exc):
+        self._pool.release(self._pool.conn)
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.released = []
+
+    def acquire(self):
+        return FakeAcquire(self)
+
+    def release(self, conn):
+        # what aiomysql's Pool.release does with an open transaction
+        self.released.append((conn, conn.rolled_back or conn.closed))
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    def install(conn):
+        fake = FakePool(conn)
+        monkeypatch.setattr(async_db, "pool", async_db.InstrumentedPool(fake))
+        return fake
+    return install
+
+
+async def use_checkout(fail: bool = False):
+    async with async_db.checkout():
+        if fail:
+            raise RuntimeError("handler failed")
+
+
+def test_checkout_releases_when_rollback_fails(pool):
+    conn = FakeConnection(rollback_error=ConnectionError("connection dropped"))
+    fake = pool(conn)
+
+    asyncio.run(use_checkout())
+
+    assert conn.closed
+    assert fake.released == [(conn, True)]
+
+
+def test_checkout_keeps_handler_error_when_rollback_fails(pool):
+    conn = FakeConnection(rollback_error=ConnectionError("connection dropped"))
+    fake = pool(conn)
+
+    with pytest.raises(RuntimeError, match="handler failed"):
+        asyncio.run(use_checkout(fail=True))
+    assert len(fake.released) == 1
+
+
+def test_acquire_context_ends_read_transaction_before_release(pool):
+    conn = FakeConnection()
+    fake = pool(conn)
+
+    async def read():
+        async with async_db.pool.acquire():
+            pass
+
+    asyncio.run(read())
+
+    assert conn.rolled_back and not conn.closed
+    assert fake.released == [(conn, True)]
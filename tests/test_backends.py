@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from services import extractive
+from services.backends import ExtractiveBackend, SummarizerBackend, backend_for_model, backends
+from services.extractive import extract_summary, rank_sentences
+
+TRANSCRIPT = (
+    "Patient reports chest pain for three days. "
+    "The chest pain gets worse on exertion and eases with rest. "
+    "She mentioned her cat is doing well. "
+    "No fever was reported. "
+    "An ECG for the chest pain showed no acute changes. "
+    "We talked about the weather."
+)
+
+
+def test_backend_must_implement_every_method():
+    with pytest.raises(TypeError):
+        SummarizerBackend()
+
+    class NoStreaming(SummarizerBackend):
+        def summarize(self, text): ...
+        def summarize_clinical(self, text): ...
+        def update(self, summary, segment): ...
+        async def asummarize(self, text): ...
+        async def asummarize_clinical(self, text): ...
+        async def aupdate(self, summary, segment): ...
+
+    with pytest.raises(TypeError, match="astream"):
+        NoStreaming()
+
+
+def test_extractive_keeps_the_central_sentences_in_transcript_order():
+    summary = extract_summary(TRANSCRIPT, 2)
+
+    assert summary == [
+        "Patient reports chest pain for three days.",
+        "An ECG for the chest pain showed no acute changes.",
+    ]
+    assert extract_summary(TRANSCRIPT, 2) == summary
+
+
+def test_extractive_skips_near_duplicates():
+    sentences = ["Chest pain on exertion.", "Chest pain on exertion!", "Pain in the chest at night.", "No fever."]
+
+    chosen = rank_sentences(sentences, 2)
+
+    assert chosen[0] == 0 and 1 not in chosen
+
+
+def test_extractive_ranks_long_transcripts_in_groups(monkeypatch):
+    monkeypatch.setattr(extractive, "EXTRACTIVE_MAX_SENTENCES", 3)
+
+    summary = extract_summary(TRANSCRIPT * 3, 2)
+
+    assert len(summary) == 2
+    assert all("chest pain" in sentence for sentence in summary)
+
+
+def test_extractive_backend_streams_and_awaits_the_same_summary():
+    backend = ExtractiveBackend(sentences=2)
+
+    summary = backend.summarize(TRANSCRIPT)
+    stream = backend.stream(TRANSCRIPT)
+
+    assert summary.backend == "extractive" and summary.key == backend.key(TRANSCRIPT)
+    assert "".join(stream) == summary.text and stream.key == summary.key
+    assert asyncio.run(backend.asummarize_clinical(TRANSCRIPT)) == summary
+    assert backend.key(TRANSCRIPT) != ExtractiveBackend(sentences=3).key(TRANSCRIPT)
+
+
+def test_jobs_resume_on_the_backend_that_recorded_their_model():
+    assert backend_for_model("extractive") is backends["extractive"]
+    assert backend_for_model("gpt-4o-mini") is backends["llm"]
+    assert backend_for_model(None) is backends["llm"]
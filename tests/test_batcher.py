@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+from services.batcher import MicroBatcher
+
+
+def test_tasks_on_one_loop_share_a_batch():
+    batches = []
+    batcher = MicroBatcher(lambda items: batches.append(items) or [item.upper() for item in items], window_ms=50)
+
+    async def run():
+        return await asyncio.gather(*(asyncio.wrap_future(batcher.submit(text)) for text in ("a", "b", "c")))
+
+    assert asyncio.run(run()) == ["A", "B", "C"]
+    assert batches == [["a", "b", "c"]]
+
+
+def test_cancelled_task_is_left_out_of_the_batch():
+    release = threading.Event()
+    batches = []
+
+    def submit_batch(items):
+        batches.append(items)
+        release.wait(2)
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(submit_batch, window_ms=50, max_in_flight=1)
+
+    async def run():
+        # the first batch holds the only dispatch slot while "b" is cancelled
+        first = asyncio.wrap_future(batcher.submit("a"))
+        await asyncio.sleep(0.1)
+        cancelled = asyncio.ensure_future(asyncio.wrap_future(batcher.submit("b")))
+        kept = asyncio.wrap_future(batcher.submit("c"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        release.set()
+        return await asyncio.wait_for(first, 2), await asyncio.wait_for(kept, 2)
+
+    assert asyncio.run(run()) == ("A", "C")
+    assert batches == [["a"], ["c"]]
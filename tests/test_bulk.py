@@ -0,0 +1,45 @@
+import pytest
+from fastapi import HTTPException
+
+from models.summarization import SummarizationBatchItem
+from services.backends import Summary
+from services.bulk import NOT_AN_OBJECT, ItemError, JobSlots, build_results, parse_items, unique_texts
+
+
+def test_job_slots_reject_past_limit_until_released():
+    slots = JobSlots(limit=2)
+    slots.acquire()
+    slots.acquire()
+
+    with pytest.raises(HTTPException) as rejected:
+        slots.acquire()
+    assert rejected.value.status_code == 429
+    assert "Retry-After" in rejected.value.headers
+
+    slots.release()
+    slots.acquire()
+    assert len(slots) == 2
+
+
+def test_invalid_items_are_reported_without_echoing_them():
+    body = b'[{"patient_id": "patient-1", "input_text": "chest pain"}, "Jane Doe, DOB 1970-01-01, HIV+", 7, {"patient_id": "patient-2"}]'
+
+    items = parse_items(body, "application/json")
+
+    assert isinstance(items[0], SummarizationBatchItem)
+    assert items[1] == items[2] == ItemError(NOT_AN_OBJECT)
+    assert isinstance(items[3], ItemError) and "Field required" in items[3].error
+    summaries = {key: Summary("Chest pain.", "extractive", None) for key in unique_texts(items)}
+    results, rows = build_results(items, summaries)
+    assert [result["status"] for result in results] == ["created"] + ["invalid"] * 3
+    assert "Jane Doe" not in str(results)
+
+
+def test_ndjson_lines_that_are_not_json_are_invalid_items():
+    body = b'{"patient_id": "patient-1", "input_text": "chest pain"}\n{not json\n\n"just text"\n'
+
+    items = parse_items(body, "application/x-ndjson")
+
+    assert len(items) == 3
+    assert items[1].error.startswith("line 2:")
+    assert items[2] == ItemError(NOT_AN_OBJECT)
@@ -0,0 +1,78 @@
+from services import llm
+from services.chunking import _SEGMENT_RE, chunk_text, count_tokens
+from services.summary_cache import SummaryCache
+
+
+def transcript(sentences: int = 300, edited: int = -1) -> str:
+    lines = [
+        f"Visit note {i}: the patient reported symptom {i * 7} and was advised on item {i * 13}."
+        for i in range(sentences)
+    ]
+    if edited >= 0:
+        lines[edited] = f"Visit note {edited}: corrected after review, no new symptoms."
+    return " ".join(lines)
+
+
+def sentences(chunk: str):
+    return [segment for segment in _SEGMENT_RE.split(chunk) if segment.strip()]
+
+
+def test_chunks_stay_within_the_token_limit_and_cover_the_transcript():
+    text = transcript()
+    chunks = chunk_text(text, chunk_tokens=200, overlap_tokens=40)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert sum(count_tokens(segment) for segment in sentences(chunk)) <= 200
+    covered = {segment for chunk in chunks for segment in sentences(chunk)}
+    assert covered == set(sentences(text))
+
+
+def test_each_chunk_starts_with_the_end_of_the_previous_one():
+    chunks = chunk_text(transcript(), chunk_tokens=200, overlap_tokens=40)
+
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert sentences(chunk)[0] in sentences(previous)
+        assert sentences(previous)[-1] in sentences(chunk)
+
+
+def test_an_edit_only_changes_the_chunks_around_it():
+    before = chunk_text(transcript(), chunk_tokens=200, overlap_tokens=40)
+    after = chunk_text(transcript(edited=150), chunk_tokens=200, overlap_tokens=40)
+
+    changed = set(after) - set(before)
+    assert 1 <= len(changed) <= 3
+    assert len(set(after) & set(before)) >= len(before) - 4
+
+
+def test_a_sentence_longer_than_a_chunk_is_split():
+    text = "x" * 4000
+    chunks = chunk_text(text, chunk_tokens=200, overlap_tokens=0)
+
+    assert "".join(chunks) == text
+    assert all(count_tokens(chunk) <= 200 for chunk in chunks)
+
+
+def test_long_transcript_is_reduced_from_chunk_summaries(monkeypatch):
+    calls = []
+
+    def call(request):
+        text = request["messages"][-1]["content"]
+        calls.append(text)
+        return f"summary {len(calls)}"
+
+    monkeypatch.setattr(llm, "_call", call)
+    monkeypatch.setattr(llm, "summary_cache", SummaryCache())
+    text = transcript(600)
+    assert llm.is_long(text)
+
+    request = llm.medical_final_request(text)
+    chunks = chunk_text(text)
+    assert len(calls) == len(chunks) > 1
+    reduce_prompt = request["messages"][-1]["content"]
+    assert all(f"summary {n}\n" in reduce_prompt + "\n" for n in range(1, len(chunks) + 1))
+
+    # the edited transcript only pays for the chunks that changed
+    calls.clear()
+    llm.medical_final_request(transcript(600, edited=300))
+    assert 1 <= len(calls) < len(chunks)
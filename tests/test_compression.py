@@ -0,0 +1,118 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from middleware import compression
+from middleware.compression import CompressionMiddleware, negotiate
+
+BODY = json.dumps([{"summary": "Chest pain for three days, worse on exertion."}] * 100).encode()
+
+
+def call(app, accept_encoding="gzip", if_none_match=None):
+    """Run ``app`` behind the middleware; returns the messages sent downstream."""
+    headers = [(b"accept-encoding", accept_encoding.encode())]
+    if if_none_match:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(CompressionMiddleware(app(sent))(scope, receive, send))
+    return sent
+
+
+def response(body=BODY, media_type="application/json", status=200, etag='"abc"'):
+    def app(sent):
+        async def asgi(scope, receive, send):
+            headers = [(b"content-type", media_type.encode())]
+            if etag:
+                headers.append((b"etag", etag.encode()))
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+        return asgi
+    return app
+
+
+def header(message, name):
+    return dict(message["headers"]).get(name.encode(), b"").decode()
+
+
+def test_negotiation_prefers_zstd_and_honours_q_values(monkeypatch):
+    monkeypatch.setattr(compression, "available_encodings", lambda: ("zstd", "gzip"))
+
+    assert negotiate("gzip, deflate, br, zstd") == "zstd"
+    assert negotiate("gzip;q=1.0, zstd;q=0.5") == "gzip"
+    assert negotiate("zstd;q=0, *") == "gzip"
+    assert negotiate("gzip;q=0") is None
+    assert negotiate("identity") is None
+    assert negotiate("") is None
+
+
+def test_without_zstandard_only_gzip_is_offered(monkeypatch):
+    monkeypatch.setattr(compression, "_zstandard", lambda: None)
+
+    assert negotiate("zstd") is None
+    assert negotiate("zstd, gzip") == "gzip"
+
+
+def test_json_is_gzipped_with_an_encoded_etag():
+    start, body = call(response())
+
+    assert header(start, "content-encoding") == "gzip"
+    assert header(start, "vary") == "Accept-Encoding"
+    assert header(start, "etag") == '"abc-gzip"'
+    assert int(header(start, "content-length")) == len(body["body"])
+    assert gzip.decompress(body["body"]) == BODY
+
+
+def test_zstd_round_trips():
+    zstandard = pytest.importorskip("zstandard")
+
+    start, body = call(response(), accept_encoding="zstd")
+
+    assert header(start, "content-encoding") == "zstd"
+    assert zstandard.ZstdDecompressor().decompress(body["body"]) == BODY
+
+
+def test_small_bodies_and_identity_clients_are_sent_as_they_are():
+    for sent in (call(response(body=b"{}")), call(response(), accept_encoding="identity")):
+        start, body = sent
+        assert not header(start, "content-encoding")
+        assert header(start, "vary") == "Accept-Encoding"
+
+
+def test_304_repeats_the_encoded_tag_the_client_holds():
+    start, _ = call(response(body=b"", status=304), if_none_match='"abc-gzip"')
+
+    assert start["status"] == 304
+    assert header(start, "etag") == '"abc-gzip"'
+
+
+@pytest.mark.parametrize("media_type", ["text/event-stream", "application/x-ndjson"])
+def test_streams_pass_through_without_waiting_for_a_body(monkeypatch, media_type):
+    # even when listed as compressible
+    monkeypatch.setattr(compression, "COMPRESSIBLE_TYPES", ("application/json", media_type))
+    started_first = []
+
+    def app(sent):
+        async def asgi(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", media_type.encode())]})
+            # the client has the headers before the first event is produced
+            started_first.append(len(sent) == 1)
+            for chunk in (b"event: token\n\n", b"event: done\n\n"):
+                await send({"type": "http.response.body", "body": chunk * 200, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        return asgi
+
+    sent = call(app)
+
+    assert started_first == [True]
+    assert not header(sent[0], "content-encoding") and not header(sent[0], "vary")
+    assert b"".join(message.get("body", b"") for message in sent[1:]) == (b"event: token\n\n" * 200) + (b"event: done\n\n" * 200)
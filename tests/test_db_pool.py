@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+
+from framework.db import ConnectionPool, PoolClosed, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self, rollback=None):
+        self._rollback = rollback
+        self.closed = False
+
+    def rollback(self):
+        if self._rollback is not None:
+            self._rollback()
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def failing_rollback():
+    raise ConnectionError("connection dropped")
+
+
+def test_release_discards_connection_when_rollback_fails():
+    pool = ConnectionPool(min_size=0, max_size=1, timeout=0.1, factory=lambda: FakeConnection(failing_rollback))
+    conn = pool.acquire()
+    pool.release(conn)
+
+    assert conn.closed
+    assert pool.stats()["size"] == 0
+    # the slot is free again
+    pool.release(pool.acquire())
+
+
+def test_rollback_runs_outside_the_pool_lock():
+    in_rollback, unblock = threading.Event(), threading.Event()
+
+    def slow_rollback():
+        in_rollback.set()
+        unblock.wait(5)
+
+    connections = iter([FakeConnection(slow_rollback), FakeConnection()])
+    pool = ConnectionPool(min_size=0, max_size=2, timeout=1, factory=lambda: next(connections))
+    first = pool.acquire()
+    releasing = threading.Thread(target=pool.release, args=(first,))
+    releasing.start()
+    assert in_rollback.wait(5)
+
+    # a checkout while the other connection is still rolling back
+    second = pool.acquire(timeout=0.5)
+    pool.release(second)
+    assert pool.stats()["idle"] == 1
+
+    unblock.set()
+    releasing.join(5)
+    assert pool.stats()["idle"] == 2
+
+
+def test_close_closes_checked_out_connections_on_release():
+    pool = ConnectionPool(min_size=1, max_size=2, timeout=0.1, factory=FakeConnection)
+    conn = pool.acquire()
+    idle = pool.acquire()
+    pool.release(idle)
+
+    pool.close()
+    assert idle.closed and not conn.closed
+
+    pool.release(conn)
+    assert conn.closed
+    assert pool.stats()["size"] == 0
+
+
+def test_acquire_times_out_when_pool_is_exhausted():
+    pool = ConnectionPool(min_size=0, max_size=1, timeout=0.05, factory=FakeConnection)
+    pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+
+def test_acquire_fails_once_the_pool_is_closed():
+    pool = ConnectionPool(min_size=1, max_size=1, timeout=5, factory=FakeConnection)
+    held = pool.acquire()
+    failed = []
+
+    def wait_for_a_connection():
+        try:
+            pool.acquire()
+        except PoolClosed:
+            failed.append(True)
+
+    waiter = threading.Thread(target=wait_for_a_connection)
+    waiter.start()
+    pool.close()
+    waiter.join(1)
+    # the waiter is woken by the close, not left until its timeout
+    assert failed == [True]
+
+    pool.release(held)
+    with pytest.raises(PoolClosed):
+        pool.acquire()
+    assert pool.stats()["size"] == 0
@@ -0,0 +1,88 @@
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from framework import db
+from framework.db import ConnectionPool
+from framework.lazy import LazyResource
+from services import read_cache
+from services.job_store import JobRecord, MemoryJobStore
+from services.read_cache import MemoryBackend, ReadCache
+from tests.sqlite_shim import Connection, create_schema
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    path = str(tmp_path / "etags.db")
+    create_schema(path)
+    setup = sqlite3.connect(path)
+    setup.execute("INSERT INTO summaries (id, patient_id, input_text, summary) VALUES (1, 'patient-1', 'cough', 'Dry cough.')")
+    setup.commit()
+    setup.close()
+    pool = ConnectionPool(min_size=0, max_size=2, factory=lambda: Connection(path))
+    monkeypatch.setattr(db, "db_pool", LazyResource("mysql", lambda: pool))
+    cache = ReadCache(MemoryBackend(ttl=10), ttl=10)
+    monkeypatch.setattr(read_cache, "read_cache", cache)
+    monkeypatch.setattr(main, "read_cache", cache)
+    yield TestClient(main.app)
+    pool.close()
+
+
+def update(text: str, summarization_id: int = 1) -> dict:
+    return {"id": summarization_id, "input_text": text, "summary": text.capitalize() + "."}
+
+
+def test_unchanged_summary_is_not_modified(client):
+    first = client.get("/summarizations/1")
+    etag = first.headers["etag"]
+
+    again = client.get("/summarizations/1", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["etag"] == etag
+    # the tag of a compressed copy and a weak tag name the same version
+    assert client.get("/summarizations/1", headers={"If-None-Match": "W/" + etag[:-1] + '-gzip"'}).status_code == 304
+
+    client.put("/summarizations/1", json=update("wet cough"))
+    changed = client.get("/summarizations/1", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+
+def test_projected_representation_has_its_own_tag(client):
+    full = client.get("/summarizations/1").headers["etag"]
+    projected = client.get("/summarizations/1", params={"fields": "summary"}).headers["etag"]
+
+    assert projected != full
+    assert client.get("/summarizations/1", headers={"If-None-Match": projected}).status_code == 200
+
+
+def test_write_with_a_stale_if_match_is_refused(client):
+    etag = client.get("/summarizations/1").headers["etag"]
+    assert client.put("/summarizations/1", json=update("wet cough"), headers={"If-Match": etag}).status_code == 200
+
+    # etag named the version before that update
+    stale = client.put("/summarizations/1", json=update("no cough"), headers={"If-Match": etag})
+    assert stale.status_code == 412
+    assert client.delete("/summarizations/1", headers={"If-Match": etag}).status_code == 412
+    assert client.get("/summarizations/1").json()["summary"] == "Wet cough."
+
+    current = client.get("/summarizations/1").headers["etag"]
+    assert client.put("/summarizations/1", json=update("no cough"), headers={"If-Match": "W/" + current}).status_code == 412
+    assert client.delete("/summarizations/1", headers={"If-Match": f'"other", {current}'}).status_code == 200
+
+
+def test_if_match_any_needs_the_row_to_exist(client):
+    assert client.put("/summarizations/2", json=update("fever", 2), headers={"If-Match": "*"}).status_code == 404
+    assert client.put("/summarizations/1", json=update("fever"), headers={"If-Match": "*"}).status_code == 200
+
+
+def test_job_tag_moves_with_its_progress(client, monkeypatch):
+    store = MemoryJobStore()
+    store.add(JobRecord("job-1", kind="delete", patient_id="patient-1", processed=0, failed=0))
+    monkeypatch.setattr(main, "job_store", store)
+    etag = client.get("/jobs/job-1").headers["etag"]
+
+    assert client.get("/jobs/job-1", headers={"If-None-Match": etag}).status_code == 304
+    store.add_progress("job-1", 10, 0)
+    assert client.get("/jobs/job-1", headers={"If-None-Match": etag}).status_code == 200
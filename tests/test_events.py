@@ -0,0 +1,88 @@
+import json
+import threading
+from concurrent.futures import Future
+
+from services import pubsub
+from services.events import EventEmitter, FakePublisher
+
+TOPIC = "projects/test/topics/summarization-events"
+
+
+def test_close_publishes_everything_emitted_and_stops_the_publisher():
+    publisher = FakePublisher(latency=0.001)
+    stopped = []
+    publisher.stop = lambda: stopped.append(True)
+    emitter = EventEmitter(lambda: publisher, TOPIC, buffer_size=100)
+
+    for i in range(20):
+        emitter.emit("summarization.created", summarization_id=i)
+    emitter.close(timeout=5)
+
+    assert [json.loads(data)["data"]["summarization_id"] for _, data, _ in publisher.messages] == list(range(20))
+    assert publisher.messages[0][2] == {"event_type": "summarization.created"}
+    assert stopped == [True]
+    assert emitter.stats()["published"] == 20
+
+    emitter.emit("summarization.created", summarization_id=20)
+    assert emitter.stats()["emitted"] == 20
+
+
+def test_close_waits_for_publishes_still_in_flight():
+    futures = []
+
+    class SlowAckPublisher:
+        def publish(self, topic, data, **attrs):
+            future = Future()
+            futures.append(future)
+            threading.Timer(0.1, future.set_result, ("1",)).start()
+            return future
+
+    emitter = EventEmitter(SlowAckPublisher, TOPIC)
+    emitter.emit("job.completed", job_id="job-1")
+    emitter.close(timeout=5)
+
+    assert len(futures) == 1 and futures[0].done()
+    assert emitter.stats()["published"] == 1 and emitter.stats()["in_flight"] == 0
+
+
+def test_a_full_buffer_drops_and_counts_instead_of_blocking():
+    release = threading.Event()
+
+    class StuckPublisher(FakePublisher):
+        def publish(self, topic, data, **attrs):
+            release.wait(5)
+            return super().publish(topic, data, **attrs)
+
+    emitter = EventEmitter(StuckPublisher, TOPIC, buffer_size=2)
+    for i in range(10):
+        emitter.emit("summarization.created", summarization_id=i)
+    stats = emitter.stats()
+    release.set()
+    emitter.close(timeout=5)
+
+    assert stats["dropped"] > 0 and stats["emitted"] + stats["dropped"] == 10
+    assert emitter.stats()["published"] == stats["emitted"]
+
+
+def test_publish_failures_are_counted():
+    emitter = EventEmitter(lambda: FakePublisher(fail=True), TOPIC)
+    emitter.emit("summarization.created", summarization_id=1)
+    emitter.close(timeout=5)
+
+    assert emitter.stats()["failed"] == 1
+    assert emitter.stats()["last_error"] == "publish failed"
+
+
+def test_closing_an_unused_emitter_never_creates_the_publisher():
+    created = []
+    emitter = EventEmitter(lambda: created.append(True), TOPIC)
+
+    emitter.close(timeout=1)
+
+    assert created == [] and emitter.publisher is None
+
+
+def test_fake_backend_publishes_in_memory(monkeypatch):
+    monkeypatch.setattr(pubsub, "PUBSUB_BACKEND", "fake")
+
+    assert isinstance(pubsub._make_publisher(), FakePublisher)
@@ -0,0 +1,37 @@
+import csv
+import io
+import json
+
+from utils.export import csv_header, export_query, format_rows
+
+ROWS = [
+    {"id": 1, "patient_id": "patient-1", "input_text": 'said "it hurts",\nthen left', "summary": "Douleur thoracique."},
+    {"id": 2, "patient_id": "patient-2", "input_text": "fever", "summary": None},
+]
+
+
+def test_export_query_filters_by_patients_and_id_range():
+    sql, params = export_query(["patient-1", "patient-2"], 10, 20)
+
+    assert sql == (
+        "SELECT id, patient_id, input_text, summary FROM summaries"
+        " WHERE patient_id IN (%s, %s) AND id >= %s AND id <= %s ORDER BY id"
+    )
+    assert params == ["patient-1", "patient-2", 10, 20]
+    assert export_query(None, None, None) == ("SELECT id, patient_id, input_text, summary FROM summaries ORDER BY id", [])
+
+
+def test_ndjson_is_one_object_per_line():
+    lines = format_rows(ROWS, "ndjson").splitlines()
+
+    assert [json.loads(line) for line in lines] == ROWS
+    assert "Douleur" in lines[0]  # not \\u-escaped
+
+
+def test_csv_quotes_embedded_newlines_and_quotes():
+    body = csv_header() + format_rows(ROWS, "csv")
+
+    rows = list(csv.reader(io.StringIO(body)))
+    assert rows[0] == ["id", "patient_id", "input_text", "summary"]
+    assert rows[1] == ["1", "patient-1", 'said "it hurts",\nthen left', "Douleur thoracique."]
+    assert rows[2] == ["2", "patient-2", "fever", ""]
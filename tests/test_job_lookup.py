@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+import main
+from framework.db import ConnectionPool
+from models.summarization import SummarizationBatchItem
+from services import notifications
+from services.bulk import finish_batch_job, new_batch_job
+from services.job_queue import JobRepository
+from services.job_store import MemoryJobStore
+from services.jobs import job_response
+from tests.sqlite_shim import Connection, create_schema
+
+
+@pytest.fixture
+def workers(tmp_path, monkeypatch):
+    """Two workers' in-process job stores over one jobs table; returns a
+    function that makes main's job functions act as worker 0 or 1."""
+    path = str(tmp_path / "jobs.db")
+    create_schema(path)
+    pool = ConnectionPool(min_size=0, max_size=2, factory=lambda: Connection(path))
+    monkeypatch.setattr(main, "job_repository", JobRepository(lambda: pool))
+    stores = [MemoryJobStore(), MemoryJobStore()]
+
+    def on(worker: int) -> MemoryJobStore:
+        monkeypatch.setattr(main, "job_store", stores[worker])
+        return stores[worker]
+
+    yield on
+    pool.close()
+
+
+def test_batch_job_is_found_by_the_other_worker(workers):
+    items = [SummarizationBatchItem(patient_id="patient-1", input_text="chest pain for three days")]
+    store = workers(0)
+    new_batch_job("job-1", items, store)
+    main.publish_job("job-1")
+
+    workers(1)
+    record = main.find_job("job-1")
+    assert record.kind == "batch" and record.status == "pending"
+    assert record.total == 1
+
+    workers(0)
+    finish_batch_job(store, "job-1", [{"status": "created", "id": 7}])
+    main.publish_job("job-1")
+
+    workers(1)
+    record = main.find_job("job-1")
+    assert record.status == "completed"
+    assert record.results == [{"status": "created", "id": 7}]
+
+
+def test_event_stream_on_the_other_worker_ends_with_the_job(workers, monkeypatch):
+    monkeypatch.setattr(notifications, "JOB_EVENTS_KEEPALIVE", 0.05)
+    store = workers(0)
+    main.new_delete_job("job-2", "patient-1", store)
+    main.publish_job("job-2")
+
+    class Request:
+        async def is_disconnected(self):
+            return False
+
+    async def lookup(job_id):
+        record = main.find_job(job_id)
+        return job_response(record) if record is not None else None
+
+    async def follow():
+        subscription = notifications.job_hub.subscribe(["job-2"])
+        first = await lookup("job-2")
+        return [
+            event async for event in
+            notifications.job_event_stream(Request(), "job-2", subscription, first, lookup)
+        ]
+
+    async def run():
+        workers(1)
+        stream = asyncio.ensure_future(follow())
+        await asyncio.sleep(0.1)
+        # worker 0 finishes the job (what its publish_job writes); worker 1's
+        # hub never hears of it
+        store.update("job-2", status="completed")
+        main.job_repository.save(store.get("job-2"))
+        return await asyncio.wait_for(stream, timeout=2)
+
+    events = asyncio.run(run())
+
+    assert events[0].startswith("event: pending")
+    assert events[-1].startswith("event: completed")
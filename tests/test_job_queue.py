@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.job_queue import AsyncJobQueue, JobQueue, QueueFull
+
+
+def test_saturated_model_does_not_block_other_models():
+    release_slow = threading.Event()
+    fast_done = threading.Event()
+
+    def handler(job_id):
+        if job_id.startswith("slow"):
+            release_slow.wait(5)
+        else:
+            fast_done.set()
+
+    queue = JobQueue(handler, workers=2, max_size=10, model_concurrency={"slow-model": 1})
+    queue.submit("slow-1", "slow-model")
+    queue.submit("slow-2", "slow-model")
+    queue.submit("fast-1", "fast-model")
+    queue.start()
+    try:
+        # slow-2 waits for slow-model's only slot in the queue, not in a worker
+        assert fast_done.wait(2)
+        assert queue.stats()["depth"] == 1
+    finally:
+        release_slow.set()
+        queue.stop(timeout=5)
+
+
+def test_submit_rejects_when_full():
+    queue = JobQueue(lambda job_id: None, workers=1, max_size=1)
+    queue.submit("job-1", "model")
+    with pytest.raises(QueueFull):
+        queue.submit("job-2", "model")
+    assert queue.stats()["rejected"] == 1
+
+
+def test_async_saturated_model_does_not_block_other_models():
+    async def run():
+        release_slow = asyncio.Event()
+        fast_done = asyncio.Event()
+
+        async def handler(job_id):
+            if job_id.startswith("slow"):
+                await release_slow.wait()
+            else:
+                fast_done.set()
+
+        queue = AsyncJobQueue(handler, workers=2, max_size=10, model_concurrency={"slow-model": 1})
+        queue.start()
+        queue.submit("slow-1", "slow-model")
+        queue.submit("slow-2", "slow-model")
+        queue.submit("fast-1", "fast-model")
+        try:
+            await asyncio.wait_for(fast_done.wait(), timeout=2)
+            assert queue.stats()["depth"] == 1
+        finally:
+            release_slow.set()
+            await queue.stop(timeout=5)
+
+    asyncio.run(run())
@@ -0,0 +1,63 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from middleware import metrics
+from middleware.metrics import Histogram, MetricsMiddleware, Registry
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+    for seconds in (0.05, 0.5, 0.5, 3):
+        histogram.observe(seconds, ('/jobs/{job_id}',))
+
+    lines = list(histogram.collect())
+
+    assert lines == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/jobs/{job_id}",le="0.1"} 1',
+        'latency_seconds_bucket{route="/jobs/{job_id}",le="1"} 3',
+        'latency_seconds_bucket{route="/jobs/{job_id}",le="+Inf"} 4',
+        'latency_seconds_sum{route="/jobs/{job_id}"} 4.05',
+        'latency_seconds_count{route="/jobs/{job_id}"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(1,))
+    histogram.observe(0.5, ('say "hi"\\\n',))
+
+    assert 'latency_seconds_count{route="say \\"hi\\"\\\\\\n"} 1' in histogram.collect()
+
+
+def test_registry_skips_unavailable_gauges_and_refuses_duplicates():
+    registry = Registry()
+    registry.gauge("pool_size", "Connections", lambda: {("primary",): 3}, ("pool",))
+    registry.counter("cache_hits_total", "Hits", lambda: 1 / 0)
+
+    assert registry.render() == '# HELP pool_size Connections\n# TYPE pool_size gauge\npool_size{pool="primary"} 3\n'
+    with pytest.raises(ValueError):
+        registry.gauge("pool_size", "Again", lambda: 0)
+
+
+def test_requests_are_labelled_with_the_route_template(monkeypatch):
+    histogram = Histogram("http_request_duration_seconds", "Latency", ("method", "route", "status"))
+    monkeypatch.setattr(metrics, "request_latency", histogram)
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/jobs/{job_id}")
+    def get_job(job_id: str):
+        return {"job_id": job_id}
+
+    client = TestClient(app)
+    for job_id in ("a", "b", "c"):
+        client.get(f"/jobs/{job_id}")
+    client.get("/nowhere")
+
+    counts = [line for line in histogram.collect() if line.startswith("http_request_duration_seconds_count")]
+    assert counts == [
+        'http_request_duration_seconds_count{method="GET",route="/jobs/{job_id}",status="200"} 3',
+        'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1',
+    ]
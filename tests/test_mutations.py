@@ -0,0 +1,66 @@
+import pytest
+from fastapi import HTTPException, Response
+
+import main
+from framework.db import ConnectionPool
+from services.bulk import JobSlots
+from services.job_store import MemoryJobStore
+from services.mutations import UPDATE_PATIENT_SUMMARY_SQL, UPDATE_SUMMARY_SQL, execute_write
+from services.summary_cache import SummariesTableTier
+from tests.sqlite_shim import Connection, create_schema
+
+INPUT_HASH = "a" * 64
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = str(tmp_path / "summaries.db")
+    create_schema(path)
+    pool = ConnectionPool(min_size=0, max_size=2, factory=lambda: Connection(path))
+    with pool.connection() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO summaries (patient_id, input_text, summary, input_hash) VALUES (%s, %s, %s, %s)",
+            ("patient-1", "chest pain for three days", "Model summary.", INPUT_HASH),
+        )
+        conn.commit()
+    yield pool
+    pool.close()
+
+
+@pytest.mark.parametrize("sql, params", [
+    (UPDATE_SUMMARY_SQL, ("new transcript", "Edited summary.", 1)),
+    (UPDATE_PATIENT_SUMMARY_SQL, ("Edited summary.", 1, "patient-1")),
+])
+def test_put_stops_cached_lookups_of_the_edited_row(pool, sql, params):
+    tier = SummariesTableTier(lambda: pool)
+    assert tier.get(INPUT_HASH) == "Model summary."
+
+    with pool.connection() as conn:
+        assert execute_write(conn, sql, params) == 1
+
+    assert tier.get(INPUT_HASH) is None
+
+
+def test_background_deletes_past_the_cap_are_refused_until_one_finishes(pool, monkeypatch):
+    monkeypatch.setattr(main, "delete_slots", JobSlots(1, kind="delete"))
+    monkeypatch.setattr(main, "job_store", MemoryJobStore())
+    monkeypatch.setattr(main, "publish_job", lambda job_id: None)
+    monkeypatch.setattr(main, "get_pool", lambda: pool)
+    accepted = []
+    monkeypatch.setattr(main, "submit_background", lambda executor, fn, *args: accepted.append(args))
+
+    def delete():
+        with pool.connection() as conn:
+            return main.delete_summaries_by_patient(Response(), "patient-1", run_async=True, conn=conn)
+
+    delete()
+    with pytest.raises(HTTPException) as refused:
+        delete()
+    assert refused.value.status_code == 429
+
+    main.run_delete_job(*accepted[0])
+    assert main.job_store.get(accepted[0][0]).status == "completed"
+    with pytest.raises(HTTPException) as gone:
+        delete()
+    assert gone.value.status_code == 404
+    assert len(main.delete_slots) == 0
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services import notifications
+from services.job_store import JobRecord, MemoryJobStore
+from services.notifications import JobHub
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = MemoryJobStore()
+    monkeypatch.setattr(main, "job_store", store)
+    store.add(JobRecord("job-1", kind="delete", patient_id="patient-1", processed=0, failed=0))
+    return store
+
+
+def test_malformed_frames_get_an_error_and_the_socket_stays_open(store):
+    with TestClient(main.app).websocket_connect("/jobs/events") as socket:
+        socket.send_text("{not json")
+        assert socket.receive_json() == {"error": "expected a JSON object"}
+        socket.send_bytes(b"\x00")
+        assert socket.receive_json() == {"error": "expected a JSON object"}
+
+        socket.send_json({"subscribe": ["job-1"]})
+        state = socket.receive_json()
+        assert state["job_id"] == "job-1" and state["status"] == "pending"
+
+
+def test_notify_pushes_the_record_it_is_given_without_a_lookup(monkeypatch):
+    class Unreachable:
+        def get(self, job_id):
+            raise AssertionError("job store read on notify")
+
+    monkeypatch.setattr(notifications, "job_store", Unreachable())
+    hub = JobHub()
+    record = JobRecord("job-1", kind="delete", patient_id="patient-1", processed=0, failed=0)
+    record.status = "completed"
+
+    async def run():
+        subscription = hub.subscribe(["job-1"])
+        hub.notify("job-1", record)
+        return await asyncio.wait_for(subscription.queue.get(), timeout=1)
+
+    update = asyncio.run(run())
+
+    assert update["status"] == "completed"
+    assert hub.stats()["delivered"] == 1
@@ -0,0 +1,96 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from framework.db import ConnectionPool
+from tests.sqlite_shim import Connection, create_schema
+from utils.pagination import decode_cursor, encode_cursor, keyset_query, next_link, resolve_cursor
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = str(tmp_path / "pages.db")
+    create_schema(path)
+    pool = ConnectionPool(min_size=0, max_size=2, factory=lambda: Connection(path))
+    with pool.connection() as conn, conn.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO summaries (patient_id, input_text, summary) VALUES (%s, %s, %s)",
+            [(f"patient-{i % 2}", f"transcript {i}", f"summary {i}") for i in range(25)],
+        )
+        conn.commit()
+    yield pool
+    pool.close()
+
+
+def pages(pool, patient_id, limit):
+    """Follow next links from the first page; yields each page's ids."""
+    after_id = None
+    while True:
+        sql, params = keyset_query("id, patient_id", patient_id, after_id, limit)
+        with pool.connection() as conn, conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        yield [row["id"] for row in rows]
+        link = next_link("/summarizations", patient_id, rows, limit)
+        if link is None:
+            return
+        query = parse_qs(urlparse(link).query)
+        after_id = resolve_cursor(query["cursor"][0], query.get("patient_id", [None])[0], 0)
+
+
+def test_cursor_round_trips_and_is_url_safe():
+    cursor = encode_cursor("patient/1?&", 12345)
+
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+    assert decode_cursor(cursor) == ("patient/1?&", 12345)
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", encode_cursor("p", 1)[:-3], "eyJwIjpudWxsfQ"])
+def test_malformed_cursors_are_refused(cursor):
+    with pytest.raises(ValueError, match="invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_cursor_must_match_the_patient_and_not_be_combined_with_offset():
+    cursor = encode_cursor("patient-1", 10)
+
+    assert resolve_cursor(cursor, "patient-1", 0) == 10
+    with pytest.raises(ValueError, match="does not match"):
+        resolve_cursor(cursor, "patient-2", 0)
+    with pytest.raises(ValueError, match="does not match"):
+        resolve_cursor(cursor, None, 0)
+    with pytest.raises(ValueError, match="cannot be combined"):
+        resolve_cursor(cursor, "patient-1", 10)
+    assert resolve_cursor(None, "patient-1", 10) is None
+
+
+def test_pages_cover_every_row_once_and_stop_at_the_end(pool):
+    walked = list(pages(pool, None, 10))
+
+    assert [len(page) for page in walked] == [10, 10, 5]
+    assert sum(walked, []) == list(range(1, 26))
+
+
+def test_a_full_last_page_is_followed_by_an_empty_one(pool):
+    walked = list(pages(pool, "patient-1", 4))
+
+    # patient-1 has ids 2, 4, ..., 24: twelve rows, three full pages
+    assert [len(page) for page in walked] == [4, 4, 4, 0]
+    assert sum(walked, []) == list(range(2, 25, 2))
+
+
+def test_next_link_keeps_the_page_size_patient_and_variant():
+    link = next_link("/summarizations", "patient-1", [{"id": 3}, {"id": 9}], 2, {"fields": "summary"})
+    query = parse_qs(urlparse(link).query)
+
+    assert decode_cursor(query["cursor"][0]) == ("patient-1", 9)
+    assert query["limit"] == ["2"] and query["patient_id"] == ["patient-1"] and query["fields"] == ["summary"]
+    assert next_link("/summarizations", None, [{"id": 3}], 2) is None
+
+
+def test_offset_pages_are_still_supported():
+    sql, params = keyset_query("id", "patient-1", None, 10, offset=20)
+
+    assert sql == "SELECT id FROM summaries WHERE patient_id = %s ORDER BY id LIMIT %s OFFSET %s"
+    assert params == ["patient-1", 10, 20]
@@ -0,0 +1,39 @@
+import pytest
+
+from utils.projection import parse_fields, project, representation, select_columns, variant_params
+
+ROW = {"id": 7, "patient_id": "patient-1", "input_text": "chest pain", "summary": "Chest pain."}
+
+
+def test_fields_come_back_in_canonical_order_with_the_id():
+    assert parse_fields(None) == ("summarization_id", "patient_id", "input_text", "summary")
+    assert parse_fields(" summary , patient_id,") == ("summarization_id", "patient_id", "summary")
+
+
+def test_unknown_fields_are_refused():
+    with pytest.raises(ValueError, match="unknown fields: diagnosis"):
+        parse_fields("summary,diagnosis")
+
+
+def test_only_the_selected_columns_are_read():
+    fields = parse_fields("summary")
+
+    assert select_columns(fields) == "id, summary"
+    # extra columns the query needs (the cursor's) are added once
+    assert select_columns(fields, "patient_id", "id") == "id, summary, patient_id"
+
+
+def test_projected_rows_carry_the_requested_links():
+    fields = parse_fields("summary")
+
+    assert project(ROW, fields, "none", "/summarizations") == {"summarization_id": 7, "summary": "Chest pain."}
+    assert project(ROW, fields, "compact", "/summarizations")["links"] == [{"rel": "self", "href": "/summarizations/7"}]
+    assert [link["rel"] for link in project(ROW, fields, "full", "/summarizations")["links"]] == [
+        "self", "collection", "update", "delete",
+    ]
+
+
+def test_variants_are_named_and_carried_to_the_next_page():
+    assert representation(parse_fields("summary"), "compact") == "summarization_id,summary;compact"
+    assert variant_params("summary", "compact") == {"fields": "summary", "links": "compact"}
+    assert variant_params(None, "full") == {}
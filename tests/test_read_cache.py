@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+
+from services import read_cache
+from services.read_cache import (
+    MemoryBackend,
+    ReadCache,
+    RedisBackend,
+    invalidate_patient,
+    item_key,
+    item_scopes,
+    list_key,
+    list_scopes,
+)
+
+
+class FakeRedis:
+    """The few Redis commands RedisBackend uses, on a clock the test moves."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.values = {}
+        self.expires = {}
+
+    def _alive(self, key) -> bool:
+        if key in self.expires and self.expires[key] <= self.now:
+            del self.values[key], self.expires[key]
+        return key in self.values
+
+    def mget(self, keys):
+        return [self.values[key] if self._alive(key) else None for key in keys]
+
+    def set(self, key, value, px=None):
+        self.values[key] = value
+        self.expires.pop(key, None)
+        if px is not None:
+            self.expires[key] = self.now + px / 1000
+
+    def incr(self, key):
+        # like Redis: an existing key keeps its expiry, a missing one starts at 1
+        self.values[key] = int(self.values[key]) + 1 if self._alive(key) else 1
+        return self.values[key]
+
+    def expire(self, key, seconds):
+        if not self._alive(key):
+            return False
+        self.expires[key] = self.now + seconds
+        return True
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._commands.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self._redis, name)(*args, **kwargs) for name, args, kwargs in self._commands]
+
+
+def redis_cache(ttl: float = 10):
+    redis = FakeRedis()
+    backend = RedisBackend(ttl=ttl, prefix="test:")
+    backend.client = SimpleNamespace(get=lambda: redis)
+    return ReadCache(backend, ttl=ttl), redis
+
+
+def test_entry_is_not_served_after_its_counter_expired_and_restarted():
+    cache, redis = redis_cache(ttl=10)
+    scopes = list_scopes("patient-1")
+    key = list_key("patient-1", None, 10, 0)
+
+    cache.invalidate(*scopes)  # t=0: generation 1, counter kept for 2x TTL
+    redis.now = 15
+    lookup = cache.get(key, scopes)
+    cache.put(lookup, ["page read at t=15"])  # lives until t=25
+
+    redis.now = 22  # past the counter's first expiry (t=21)
+    cache.invalidate(*scopes)
+    redis.now = 23
+    assert not cache.get(key, scopes).hit
+
+
+def test_entry_is_not_stored_when_its_counter_expired_after_the_lookup():
+    cache, redis = redis_cache(ttl=10)
+    scopes = list_scopes("patient-1")
+    key = list_key("patient-1", None, 10, 0)
+    cache.invalidate(*scopes)
+
+    lookup = cache.get(key, scopes)
+    redis.values.pop("test:gen:" + scopes[0])  # expired while the database was read
+    cache.put(lookup, ["page"])
+
+    assert redis.mget(["test:entry:" + key]) == [None]
+
+
+def test_item_write_leaves_other_patients_lists_cached(monkeypatch):
+    cache = ReadCache(MemoryBackend(ttl=10), ttl=10)
+    monkeypatch.setattr(read_cache, "read_cache", cache)
+    lists = {patient: (list_key(patient, None, 10, 0), list_scopes(patient)) for patient in ("patient-1", "patient-2")}
+    for key, scopes in lists.values():
+        cache.put(cache.get(key, scopes), ["page"])
+    cache.put(cache.get(item_key(7), item_scopes(7)), {"id": 7})
+
+    # a by-id write to row 7, which the write found to be patient-1's
+    invalidate_patient("patient-1", 7)
+
+    assert not cache.get(*lists["patient-1"]).hit
+    assert cache.get(*lists["patient-2"]).hit
+    assert not cache.get(item_key(7), item_scopes(7)).hit
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from services.resilience import CircuitBreaker, LLMUnavailable, RateLimiter, ResilientCaller
+
+
+def half_open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failures=1, reset=0)
+    breaker.failure()
+    return breaker
+
+
+def test_cancelled_probe_frees_the_probe_slot():
+    breaker = half_open_breaker()
+    caller = ResilientCaller(max_retries=0, hedge=False, breaker=breaker)
+
+    async def run():
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(60)
+
+        probe = asyncio.ensure_future(caller.acall(hang, tokens=1))
+        await asyncio.wait_for(started.wait(), timeout=2)
+        # while the probe is in flight, everyone else is turned away
+        with pytest.raises(LLMUnavailable):
+            breaker.before()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(run())
+
+    assert breaker.state == "half_open"
+    assert breaker.before() is not None
+
+
+def test_probe_refused_quota_frees_the_probe_slot():
+    breaker = half_open_breaker()
+    limiter = RateLimiter(rpm=60, tpm=0, max_wait=0)
+    limiter.block(60)
+    caller = ResilientCaller(max_retries=0, hedge=False, limiter=limiter, breaker=breaker)
+
+    with pytest.raises(LLMUnavailable, match="request quota"):
+        caller.call(lambda: "unused", tokens=1)
+
+    assert breaker.before() is not None
+
+
+def test_probe_success_closes_the_breaker():
+    breaker = half_open_breaker()
+    caller = ResilientCaller(max_retries=0, hedge=False, breaker=breaker)
+
+    assert caller.call(lambda: "ok", tokens=1) == "ok"
+    assert breaker.state == "closed"
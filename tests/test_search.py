@@ -0,0 +1,126 @@
+import pytest
+from fastapi import HTTPException
+
+from framework.db import ConnectionPool
+from services import search
+from services.search import InvertedIndex, fulltext_query, query_terms
+from tests.sqlite_shim import Connection, create_schema
+
+ROWS = [
+    (1, "patient-1", "Chest pain for three days, worse on exertion.", "Chest pain on exertion."),
+    (2, "patient-1", "Follow up on blood pressure medication.", "Blood pressure follow-up."),
+    (3, "patient-2", "Chest tightness and shortness of breath.", "Chest tightness."),
+]
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = str(tmp_path / "search.db")
+    create_schema(path)
+    pool = ConnectionPool(min_size=0, max_size=2, factory=lambda: Connection(path))
+    insert(pool, *ROWS)
+    yield pool
+    pool.close()
+
+
+def insert(pool, *rows):
+    with pool.connection() as conn, conn.cursor() as cursor:
+        cursor.executemany("INSERT INTO summaries (id, patient_id, input_text, summary) VALUES (%s, %s, %s, %s)", rows)
+        conn.commit()
+
+
+def built(pool) -> InvertedIndex:
+    index = InvertedIndex()
+    index.build(lambda: pool)
+    return index
+
+
+def test_bm25_ranks_by_term_and_filters_by_patient(pool):
+    index = built(pool)
+
+    ranked = index.search(query_terms("chest pain"), None, 10)
+    assert [doc_id for doc_id, _ in ranked] == [1, 3]
+    assert ranked[0][1] > ranked[1][1]
+    assert [doc_id for doc_id, _ in index.search(["chest"], "patient-2", 10)] == [3]
+    assert index.search(["migraine"], None, 10) == []
+
+
+def test_catch_up_indexes_new_rows_and_rereads_gaps(pool):
+    index = built(pool)
+
+    # id 5 is taken by a transaction that commits after id 6 did
+    insert(pool, (4, "patient-3", "Migraine with aura.", "Migraine."), (6, "patient-3", "Migraine again.", "Migraine."))
+    with pool.connection() as conn:
+        assert index.catch_up(conn) == 2
+    assert index.watermark == 6 and index.stats()["pending_gaps"] == 1
+
+    insert(pool, (5, "patient-3", "Late migraine note.", "Migraine."))
+    with pool.connection() as conn:
+        assert index.catch_up(conn) == 0
+    assert sorted(doc_id for doc_id, _ in index.search(["migraine"], None, 10)) == [4, 5, 6]
+    assert index.stats()["pending_gaps"] == 0
+
+
+def test_gaps_are_given_up_after_their_ttl(pool, monkeypatch):
+    index = built(pool)
+    insert(pool, (5, "patient-3", "Migraine.", "Migraine."))
+    with pool.connection() as conn:
+        index.catch_up(conn)
+    assert index.stats()["pending_gaps"] == 1
+
+    monkeypatch.setattr(search, "SEARCH_INDEX_GAP_TTL", -1)
+    with pool.connection() as conn:
+        index.catch_up(conn)
+    assert index.stats()["pending_gaps"] == 0
+
+
+def test_writes_made_here_update_the_index(pool):
+    index = built(pool)
+
+    index.update(1, summary="Resolved.")
+    index.append(2, "Now also chest pain.", "Blood pressure and chest pain.")
+    index.remove_patient("patient-2")
+
+    assert sorted(doc_id for doc_id, _ in index.search(["chest"], None, 10)) == [1, 2]
+    assert index.search(["resolved"], None, 10)[0][0] == 1
+
+
+def test_build_backs_off_while_the_database_is_down(pool, monkeypatch):
+    monkeypatch.setattr(search, "SEARCH_INDEX_RETRY_BASE", 1)
+    monkeypatch.setattr(search, "SEARCH_INDEX_RETRY_MAX", 3)
+    index = InvertedIndex()
+    delays, attempts = [], iter(range(10))
+
+    def get_pool():
+        if next(attempts) < 4:
+            raise ConnectionError("database not reachable")
+        return pool
+
+    def sleep(delay):
+        delays.append(delay)
+        with pytest.raises(HTTPException) as unavailable:
+            index.check_ready()
+        assert unavailable.value.status_code == 503
+        assert int(unavailable.value.headers["Retry-After"]) >= 5
+
+    monkeypatch.setattr(search.time, "sleep", sleep)
+    index.build(get_pool)
+
+    assert delays == [1, 2, 3, 3]
+    assert index.ready and index.stats()["build_failures"] == 0 and index.stats()["build_error"] is None
+    assert index.stats()["documents"] == 3
+
+
+def test_fulltext_query_is_parameterized_and_scoped():
+    sql, params = fulltext_query(["chest", "pain"], "patient-1", 11, 20)
+
+    assert sql.count("AGAINST (%s IN NATURAL LANGUAGE MODE)") == 2
+    assert "AND patient_id = %s" in sql and sql.rstrip().endswith("ORDER BY score DESC, id LIMIT %s OFFSET %s")
+    assert params == ["chest pain", "chest pain", "patient-1", 11, 20]
+    assert "patient_id" not in fulltext_query(["chest"], None, 11, 0)[0].split("WHERE")[1]
+
+
+def test_queries_without_searchable_terms_are_refused():
+    with pytest.raises(HTTPException) as refused:
+        query_terms("is it on")
+    assert refused.value.status_code == 400
@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+from fastapi import HTTPException
+
+from framework.db import ConnectionPool
+from services import segments
+from tests.sqlite_shim import Connection, create_schema
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "segments.db")
+    create_schema(path)
+    setup = sqlite3.connect(path)
+    setup.execute(
+        "INSERT INTO summaries (id, patient_id, input_text, summary) VALUES (1, 'patient-1', 'first visit', 'summary 1')"
+    )
+    setup.commit()
+    setup.close()
+    pool = ConnectionPool(min_size=0, max_size=2, factory=lambda: Connection(path))
+    yield pool, path
+    pool.close()
+
+
+def stored(path):
+    db = sqlite3.connect(path)
+    try:
+        row = db.execute("SELECT input_text, summary, segment_count FROM summaries WHERE id = 1").fetchone()
+        seqs = [seq for seq, in db.execute("SELECT seq FROM summary_segments ORDER BY seq")]
+    finally:
+        db.close()
+    return row, seqs
+
+
+def test_appends_extend_the_transcript_and_number_the_segments(db):
+    pool, path = db
+    segments.append_segment(pool, segments.get_state(pool, 1), "second visit", "summary 2")
+    segments.append_segment(pool, segments.get_state(pool, 1), "third visit", "summary 3")
+
+    row, seqs = stored(path)
+    assert row == ("first visit\nsecond visit\nthird visit", "summary 3", 2)
+    assert seqs == [1, 2]
+
+
+def test_append_from_a_stale_state_is_a_conflict(db):
+    pool, path = db
+    # two appends read the same state; the second to write loses
+    first = segments.get_state(pool, 1)
+    second = segments.get_state(pool, 1)
+    segments.append_segment(pool, first, "second visit", "summary 2")
+
+    with pytest.raises(HTTPException) as raised:
+        segments.append_segment(pool, second, "other visit", "other summary")
+
+    assert raised.value.status_code == 409
+    row, seqs = stored(path)
+    assert row == ("first visit\nsecond visit", "summary 2", 1)
+    assert seqs == [1]
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+
+from services import streaming
+from services.streaming import StreamTimings, iterate_sync, stream_summary
+
+
+class Request:
+    def __init__(self, disconnect_after: int = 0):
+        self.checks = 0
+        self.disconnect_after = disconnect_after
+
+    async def is_disconnected(self):
+        self.checks += 1
+        return self.disconnect_after and self.checks >= self.disconnect_after
+
+
+def test_client_disconnect_stops_the_stream_and_stores_nothing(monkeypatch):
+    monkeypatch.setattr(streaming, "stream_timings", StreamTimings())
+    closed = []
+    stored = []
+
+    async def tokens():
+        try:
+            for text in ("Chest", " pain", " for", " three days"):
+                yield text
+        finally:
+            closed.append(True)
+
+    async def persist(text):
+        stored.append(text)
+        return {}
+
+    async def run():
+        return [event async for event in stream_summary(Request(disconnect_after=3), tokens(), persist, 0.0)]
+
+    events = asyncio.run(run())
+
+    assert len(events) == 2 and all(event.startswith("event: token") for event in events)
+    assert closed and not stored
+    assert streaming.stream_timings.outcomes["cancelled"] == 1
+
+
+def test_cancelled_response_is_timed_even_if_closing_is_cancelled(monkeypatch):
+    monkeypatch.setattr(streaming, "stream_timings", StreamTimings())
+
+    class Tokens:
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            await asyncio.sleep(60)
+
+        async def aclose(self):
+            raise asyncio.CancelledError
+
+    async def run():
+        body = stream_summary(Request(), Tokens(), None, 0.0)
+        task = asyncio.ensure_future(body.__anext__())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+
+    assert streaming.stream_timings.outcomes["cancelled"] == 1
+
+
+def test_blocking_generator_is_closed_when_its_reader_is_cancelled_mid_next():
+    upstream = threading.Event()
+    closed = threading.Event()
+
+    def summary():
+        try:
+            yield "Chest pain"
+            upstream.wait(2)  # the next chunk is slow to arrive
+            yield " for three days"
+        finally:
+            closed.set()
+
+    generator = summary()  # kept alive, so only an explicit close runs its finally
+
+    async def run():
+        parts = iterate_sync(generator)
+        assert await parts.__anext__() == "Chest pain"
+        task = asyncio.ensure_future(parts.__anext__())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await parts.aclose()
+
+    asyncio.run(run())
+    upstream.set()
+
+    assert closed.wait(2)
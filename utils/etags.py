@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Callable, Optional
+
+from fastapi import HTTPException, Request, Response
+
+from utils.projection import parse_fields, representation
+from utils.responses import carried_headers
+
+
+# Strong ETags for GET /summarizations, /summarizations/{id} and /jobs/{id}.
+# Tags are derived from versions kept by MySQL (migrations/006), never from
+# the body, so a matching If-None-Match is answered before anything is
+# serialized -- and for a patient's collection before any row is read.
+# If-Match on PUT/DELETE /summarizations/{id} is checked against the row
+# the write has locked, so a stale tag is a 412 and nothing is written.
+
+# bump when the JSON shape of these resources changes, so tags cached by
+# clients before a deploy stop matching
+REPRESENTATION = "1"
+
+PATIENT_VERSION_SQL = "SELECT version FROM patient_versions WHERE patient_id = %s"
+
+_ENCODING_SUFFIXES = ('-gzip"', '-zstd"')
+# the representation of GET /summarizations/{id} without ?fields=/?links=
+FULL_VARIANT = representation(parse_fields(None), "full")
+
+
+def _tag(*parts) -> str:
+    raw = json.dumps((REPRESENTATION,) + parts, separators=(",", ":"), default=str)
+    return '"' + hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+
+def collection_etag(
+    patient_id: str, version: int, cursor: Optional[str], limit: int, offset: int, variant: str = ""
+) -> str:
+    # variant: the ?fields=/?links= representation (utils/projection.py)
+    return _tag("collection", patient_id, version, cursor, limit, offset, variant)
+
+
+def summary_etag(summarization_id: int, version: int, variant: str = "") -> str:
+    return _tag("summary", summarization_id, version, variant)
+
+
+def job_etag(record) -> str:
+    # summary, results and error are fixed once the job reaches a final
+    # status, so status and progress determine the whole representation
+    return _tag("job", record.job_id, record.status, record.processed, record.failed)
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Tag of the ``encoding``-compressed body: a strong tag names exact bytes."""
+    if etag.startswith("W/") or not etag.endswith('"'):
+        return etag
+    return etag[:-1] + "-" + encoding + '"'
+
+
+def _unencoded(candidate: str) -> str:
+    for suffix in _ENCODING_SUFFIXES:
+        if candidate.endswith(suffix):
+            return candidate[:-len(suffix)] + '"'
+    return candidate
+
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """If-None-Match holds ``etag`` (weak comparison, RFC 9110 13.1.2),
+    in any content coding (middleware/compression.py)."""
+    header = request.headers.get("if-none-match")
+    if not header or etag is None:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if _unencoded(candidate) == etag:
+            return True
+    return False
+
+
+def if_match_check(request: Request, summarization_id: int) -> Optional[Callable[[dict], None]]:
+    """The request's If-Match as a check of the locked row (services/mutations.py),
+    or None without the header.
+
+    Strong comparison (RFC 9110 13.1.1) with the tag of the full
+    representation; the check raises a 412 when the row has moved on.
+    """
+    header = request.headers.get("if-match")
+    if not header:
+        return None
+
+    def check(row: dict):
+        if header.strip() == "*":
+            return
+        etag = summary_etag(summarization_id, row["version"], FULL_VARIANT)
+        candidates = (candidate.strip() for candidate in header.split(","))
+        if not any(_unencoded(candidate) == etag for candidate in candidates if not candidate.startswith("W/")):
+            raise HTTPException(status_code=412, detail="Summarization was modified; fetch it again and retry")
+
+    return check
+
+
+def set_etag(response: Response, etag: Optional[str]):
+    if etag is not None:
+        response.headers["ETag"] = etag
+        # stored copies must be revalidated, which is a 304 when unchanged
+        response.headers["Cache-Control"] = "no-cache"
+
+
+def not_modified(etag: str, response: Optional[Response] = None) -> Response:
+    # keep headers already set for the full response (X-Cache, Age, Link)
+    headers = carried_headers(response)
+    headers.update({"etag": etag, "cache-control": "no-cache"})
+    return Response(status_code=304, headers=headers)
+
+
+# ---- SYNC ----
+def patient_version(conn, patient_id: str) -> Optional[int]:
+    with conn.cursor() as cursor:
+        cursor.execute(PATIENT_VERSION_SQL, (patient_id,))
+        row = cursor.fetchone()
+    return int(row["version"]) if row is not None else None
+
+
+# ---- ASYNC ----
+async def apatient_version(conn, patient_id: str) -> Optional[int]:
+    async with conn.cursor() as cursor:
+        await cursor.execute(PATIENT_VERSION_SQL, (patient_id,))
+        row = await cursor.fetchone()
+    return int(row["version"]) if row is not None else None
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+from typing import List, Optional, Tuple
+
+
+EXPORT_FETCH_SIZE = int(os.environ.get("EXPORT_FETCH_SIZE", 500))
+EXPORT_COLUMNS = ["id", "patient_id", "input_text", "summary"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def export_query(
+    patient_ids: Optional[List[str]],
+    min_id: Optional[int],
+    max_id: Optional[int],
+) -> Tuple[str, List]:
+    sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM summaries"
+    where, params = [], []
+
+    if patient_ids:
+        where.append("patient_id IN (" + ", ".join(["%s"] * len(patient_ids)) + ")")
+        params.extend(patient_ids)
+    if min_id is not None:
+        where.append("id >= %s")
+        params.append(min_id)
+    if max_id is not None:
+        where.append("id <= %s")
+        params.append(max_id)
+
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id"
+    return sql, params
+
+
+def csv_header() -> str:
+    return format_csv_row({column: column for column in EXPORT_COLUMNS})
+
+
+def format_csv_row(row: dict) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow([row[column] for column in EXPORT_COLUMNS])
+    return buf.getvalue()
+
+
+def format_ndjson_row(row: dict) -> str:
+    return json.dumps({column: row[column] for column in EXPORT_COLUMNS}, ensure_ascii=False) + "\n"
+
+
+def format_rows(rows: list, fmt: str) -> str:
+    formatter = format_csv_row if fmt == "csv" else format_ndjson_row
+    return "".join(formatter(row) for row in rows)
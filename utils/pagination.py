@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import List, Optional, Tuple
+from urllib.parse import urlencode
+
+
+# Opaque keyset cursors for GET /summarizations: the last row's (patient_id, id),
+# so the next page is a "WHERE [patient_id = ? AND] id > ?" index seek
+def encode_cursor(patient_id: Optional[str], last_id: int) -> str:
+    raw = json.dumps({"p": patient_id, "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[str], int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return data["p"], int(data["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError):
+        raise ValueError("invalid cursor")
+
+
+def resolve_cursor(cursor: Optional[str], patient_id: Optional[str], offset: int) -> Optional[int]:
+    if cursor is None:
+        return None
+    if offset:
+        raise ValueError("cursor and offset cannot be combined")
+
+    cursor_patient_id, after_id = decode_cursor(cursor)
+    if cursor_patient_id != (patient_id or None):
+        raise ValueError("cursor does not match patient_id")
+    return after_id
+
+
+def keyset_query(
+    columns: str,
+    patient_id: Optional[str],
+    after_id: Optional[int],
+    limit: int,
+    offset: int = 0,
+) -> Tuple[str, List]:
+    sql = f"SELECT {columns} FROM summaries"
+    where, params = [], []
+
+    if patient_id:
+        where.append("patient_id = %s")
+        params.append(patient_id)
+    if after_id is not None:
+        where.append("id > %s")
+        params.append(after_id)
+
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+
+    # (patient_id, id) index, migrations/003
+    sql += " ORDER BY id LIMIT %s"
+    params.append(limit)
+
+    if offset:
+        sql += " OFFSET %s"
+        params.append(offset)
+
+    return sql, params
+
+
+def next_link(
+    path: str, patient_id: Optional[str], rows: list, limit: int, extra: Optional[dict] = None
+) -> Optional[str]:
+    if len(rows) < limit:
+        return None
+
+    query = {"cursor": encode_cursor(patient_id, rows[-1]["id"]), "limit": limit}
+    if patient_id:
+        query["patient_id"] = patient_id
+    # other parameters the next page must keep (fields, links)
+    query.update(extra or {})
+    return f"{path}?{urlencode(query)}"
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+
+# Sparse fieldsets for GET /summarizations and /summarizations/{id}:
+# ?fields= picks the row fields -- and so the SELECT list -- and ?links=
+# picks full, compact or no hypermedia links per row
+FIELD_COLUMNS = {
+    "summarization_id": "id",
+    "patient_id": "patient_id",
+    "input_text": "input_text",
+    "summary": "summary",
+}
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Requested fields in canonical order; the id is always included."""
+    if fields is None:
+        return tuple(FIELD_COLUMNS)
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(names - set(FIELD_COLUMNS))
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}; choose from {', '.join(FIELD_COLUMNS)}")
+    # the id is what links and cursors point at, so it is never left out
+    return tuple(name for name in FIELD_COLUMNS if name in names or name == "summarization_id")
+
+
+def select_columns(fields: Tuple[str, ...], *extra: str) -> str:
+    columns = [FIELD_COLUMNS[field] for field in fields]
+    columns.extend(column for column in extra if column not in columns)
+    return ", ".join(columns)
+
+
+def representation(fields: Tuple[str, ...], links: str) -> str:
+    """Names the variant, for cache keys and ETags."""
+    return ",".join(fields) + ";" + links
+
+
+def variant_params(fields: Optional[str], links: str) -> Dict[str, str]:
+    """Query parameters that carry the variant over to the next page."""
+    params = {}
+    if fields is not None:
+        params["fields"] = fields
+    if links != "full":
+        params["links"] = links
+    return params
+
+
+def row_links(summarization_id: int, links: str, collection: str) -> Optional[List[dict]]:
+    href = f"/summarizations/{summarization_id}"
+    if links == "none":
+        return None
+    if links == "compact":
+        # update and delete are the self URL with PUT/DELETE
+        return [{"rel": "self", "href": href}]
+    return [
+        {"rel": "self", "href": href},
+        {"rel": "collection", "href": collection},
+        {"rel": "update", "href": href},
+        {"rel": "delete", "href": href}
+    ]
+
+
+def project(row: dict, fields: Tuple[str, ...], links: str, collection: str) -> dict:
+    item = {field: row[FIELD_COLUMNS[field]] for field in fields}
+    hypermedia = row_links(row["id"], links, collection)
+    if hypermedia is not None:
+        item["links"] = hypermedia
+    return item
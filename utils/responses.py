@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+
+# "orjson" uses orjson when it is installed and the stdlib encoder otherwise;
+# "json" always uses the stdlib encoder
+JSON_ENCODER = os.environ.get("JSON_ENCODER", "orjson").lower()
+
+
+@lru_cache(maxsize=1)
+def _orjson():
+    if JSON_ENCODER != "orjson":
+        return None
+    try:
+        import orjson  # optional; several times faster than json.dumps on list pages
+    except ImportError:
+        return None
+    return orjson
+
+
+def dumps(content: Any) -> bytes:
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def encoder_name() -> str:
+    return "orjson" if _orjson() is not None else "json"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson when it is available.
+
+    Returned directly from a route, it also skips FastAPI's jsonable_encoder
+    pass over the content, which on list pages costs more than the encoding
+    itself; content must already be plain dicts, lists and scalars.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def carried_headers(response: Optional[Response]) -> Dict[str, str]:
+    """Headers set on a route's injected ``response`` (X-Cache, ETag, Link, ...);
+    a Response returned by the route replaces it, so they are copied over."""
+    if response is None:
+        return {}
+    return {
+        name: value for name, value in response.headers.items()
+        if name not in ("content-length", "content-type")
+    }
+
+
+def json_response(content: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    status_code = response.status_code if response is not None and response.status_code else 200
+    return FastJSONResponse(content, status_code=status_code, headers=carried_headers(response))